@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+SAFETY PARAMETER CERTIFICATION
+Branch-and-bound map of the provably safe SafetyParameters region
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+
+# Add project to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.formal.parameter_search import ParameterSpaceCertifier, SEARCH_FIELDS, SAFE, UNSAFE
+
+def parse_range(text: str):
+    """name=low:high"""
+    name, _, bounds = text.partition('=')
+    low, separator, high = bounds.partition(':')
+    if name not in SEARCH_FIELDS or not separator:
+        raise argparse.ArgumentTypeError(f"Expected one of {', '.join(SEARCH_FIELDS)} as name=low:high, got '{text}'")
+    return name, (float(low), float(high))
+
+def main():
+    parser = argparse.ArgumentParser(description="Certify the safe region of the controller's safety parameters")
+    parser.add_argument("--range", action="append", type=parse_range, default=[],
+                        help="search range, e.g. reaction_time=0.1:0.4 (defaults cover the rest)")
+    parser.add_argument("--max-depth", type=int, default=10, help="bisections per box before giving up")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="write every classified box as JSON lines")
+    args = parser.parse_args()
+    
+    certifier = ParameterSpaceCertifier(dict(args.range), workers=args.workers, max_depth=args.max_depth)
+    
+    print("=" * 70)
+    print("SAFETY PARAMETER CERTIFICATION")
+    print("=" * 70)
+    for name in SEARCH_FIELDS:
+        low, high = certifier.ranges[name]
+        print(f"📐 {name}: [{low}, {high}]")
+    
+    started = time.time()
+    regions = []
+    output = open(args.output, "w") if args.output else None
+    try:
+        for region in certifier.iter_regions():
+            regions.append(region)
+            if output:
+                output.write(json.dumps(asdict(region)) + "\n")
+            if region.status == SAFE:
+                print(f"✅ depth {region.depth}: {region.low} .. {region.high}")
+            elif region.status == UNSAFE:
+                print(f"💥 depth {region.depth}: collision at {region.witness}")
+    finally:
+        if output:
+            output.close()
+    
+    summary = certifier.summarize(regions)
+    print("\n" + "=" * 70)
+    print("RESULTS")
+    print("=" * 70)
+    print(f"📊 {summary['regions']} boxes: {summary['safe_fraction'] * 100:.1f}% certified safe, "
+          f"{summary['unsafe_fraction'] * 100:.1f}% refuted, {summary['unknown_fraction'] * 100:.1f}% undecided")
+    print(f"⏱️  Wall time: {time.time() - started:.1f}s")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
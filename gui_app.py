@@ -714,6 +714,26 @@ Start a simulation and select vehicles to see their decision-making process!"""
         
         self.agent_text.insert(tk.END, reasoning)
     
+    def _history_columns(self):
+        """(times, vehicle ids, positions, velocities, emergency flags) of the recorded steps
+        
+        The per-vehicle arrays are (steps x vehicles). The enhanced simulation's
+        HistoryStore hands out whole columns; the basic simulation's list of
+        per-step dicts is read in one pass.
+        """
+        history = self.simulation.history
+        if hasattr(history, 'column'):
+            return (history.times(), list(history.vehicle_ids), history.column('x'), history.column('velocity'),
+                    history.column('emergency'))
+        
+        vehicle_ids = list(history[0]['vehicles'].keys())
+        times = np.array([step['time'] for step in history])
+        positions = np.array([[step['vehicles'][vid]['position'] for vid in vehicle_ids] for step in history])
+        velocities = np.array([[step['vehicles'][vid]['velocity'] for vid in vehicle_ids] for step in history])
+        emergency = np.array([[bool(self._has_emergency_action(step['actions'].get(vid))) for vid in vehicle_ids]
+                              for step in history])
+        return times, vehicle_ids, positions, velocities, emergency
+    
     def show_safety_overview(self):
         if not self.simulation or not self.simulation.history:
             messagebox.showwarning("Warning", "Run simulation first to generate data")
@@ -722,16 +742,11 @@ Start a simulation and select vehicles to see their decision-making process!"""
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
         fig.patch.set_facecolor('#1e1e1e')
         
-        times = [step['time'] for step in self.simulation.history]
-        vehicle_ids = list(self.simulation.history[0]['vehicles'].keys())
+        times, vehicle_ids, positions, velocities, emergency = self._history_columns()
         
         # Position plot
-        for vid in vehicle_ids:
-            if hasattr(self.simulation.vehicles[vid], 'x'):
-                positions = [step['vehicles'][vid]['x'] for step in self.simulation.history]
-            else:
-                positions = [step['vehicles'][vid]['position'] for step in self.simulation.history]
-            ax1.plot(times, positions, label=vid, linewidth=2)
+        for k, vid in enumerate(vehicle_ids):
+            ax1.plot(times, positions[:, k], label=vid, linewidth=2)
         
         ax1.set_title('Vehicle Positions', color='white')
         ax1.set_ylabel('Position (m)', color='white')
@@ -739,9 +754,8 @@ Start a simulation and select vehicles to see their decision-making process!"""
         ax1.grid(True, alpha=0.3)
         
         # Velocity plot
-        for vid in vehicle_ids:
-            velocities = [step['vehicles'][vid]['velocity'] for step in self.simulation.history]
-            ax2.plot(times, velocities, label=vid, linewidth=2)
+        for k, vid in enumerate(vehicle_ids):
+            ax2.plot(times, velocities[:, k], label=vid, linewidth=2)
         
         ax2.set_title('Vehicle Velocities', color='white')
         ax2.set_ylabel('Velocity (m/s)', color='white')
@@ -749,18 +763,9 @@ Start a simulation and select vehicles to see their decision-making process!"""
         ax2.grid(True, alpha=0.3)
         
         # Distance plot
-        if len(vehicle_ids) > 1:
-            for i in range(len(vehicle_ids)-1):
-                gaps = []
-                for step in self.simulation.history:
-                    if hasattr(self.simulation.vehicles[vehicle_ids[i]], 'x'):
-                        pos1 = step['vehicles'][vehicle_ids[i]]['x']
-                        pos2 = step['vehicles'][vehicle_ids[i+1]]['x']
-                    else:
-                        pos1 = step['vehicles'][vehicle_ids[i]]['position']
-                        pos2 = step['vehicles'][vehicle_ids[i+1]]['position']
-                    gaps.append(pos1 - pos2 - self.vehicle_length)
-                ax3.plot(times, gaps, label=f'Gap {i+1}', linewidth=2)
+        gaps = positions[:, :-1] - positions[:, 1:] - self.vehicle_length
+        for i in range(len(vehicle_ids)-1):
+            ax3.plot(times, gaps[:, i], label=f'Gap {i+1}', linewidth=2)
         
         ax3.set_title('Following Distances', color='white')
         ax3.set_ylabel('Distance (m)', color='white')
@@ -768,14 +773,7 @@ Start a simulation and select vehicles to see their decision-making process!"""
         ax3.grid(True, alpha=0.3)
         
         # Emergency events
-        emergencies = []
-        for step in self.simulation.history:
-            has_emergency = False
-            for action_data in step['actions'].values():
-                if self._has_emergency_action(action_data):
-                    has_emergency = True
-                    break
-            emergencies.append(1.0 if has_emergency else 0.0)
+        emergencies = emergency.any(axis=1).astype(float)
         
         ax4.plot(times, emergencies, 'r-', linewidth=2, label='Emergency Events')
         ax4.set_title('Emergency Events', color='white')
@@ -817,16 +815,10 @@ Start a simulation and select vehicles to see their decision-making process!"""
         fig.patch.set_facecolor('#1e1e1e')
         ax.set_facecolor('#1e1e1e')
         
-        times = [step['time'] for step in self.simulation.history]
+        times, _, _, _, emergency = self._history_columns()
         
         # Count emergency actions per time step
-        emergency_counts = []
-        for step in self.simulation.history:
-            emergency_count = 0
-            for vid, action_data in step['actions'].items():
-                if self._has_emergency_action(action_data):
-                    emergency_count += 1
-            emergency_counts.append(emergency_count)
+        emergency_counts = emergency.sum(axis=1)
         
         # Plot emergency events
         ax.plot(times, emergency_counts, 'r-', linewidth=3, label='Emergency Actions', marker='o', markersize=4)
@@ -835,10 +827,9 @@ Start a simulation and select vehicles to see their decision-making process!"""
         # Add markers for significant events
         if self.emergency_triggered:
             # Find when emergency was triggered
-            for i, step in enumerate(self.simulation.history):
-                if any(self._has_emergency_action(action_data) for action_data in step['actions'].values()):
-                    ax.axvline(x=step['time'], color='yellow', linestyle='--', alpha=0.7, label='Emergency Triggered')
-                    break
+            if emergency_counts.any():
+                ax.axvline(x=times[np.argmax(emergency_counts > 0)], color='yellow', linestyle='--', alpha=0.7,
+                           label='Emergency Triggered')
         
         ax.set_xlabel('Time (s)', color='white', fontsize=12)
         ax.set_ylabel('Number of Emergency Actions', color='white', fontsize=12)
@@ -853,8 +844,8 @@ Start a simulation and select vehicles to see their decision-making process!"""
         ax.yaxis.label.set_color('white')
         
         # Add statistics
-        total_emergencies = sum(emergency_counts)
-        max_emergencies = max(emergency_counts) if emergency_counts else 0
+        total_emergencies = int(emergency_counts.sum())
+        max_emergencies = int(emergency_counts.max()) if len(emergency_counts) else 0
         
         stats_text = f"Total Emergency Events: {total_emergencies}\nMax Simultaneous: {max_emergencies}"
         ax.text(0.02, 0.98, stats_text, transform=ax.transAxes, color='white', 
@@ -879,41 +870,20 @@ Start a simulation and select vehicles to see their decision-making process!"""
         fig.patch.set_facecolor('#1e1e1e')
         ax.set_facecolor('#1e1e1e')
         
-        times = [step['time'] for step in self.simulation.history]
-        vehicle_ids = list(self.simulation.history[0]['vehicles'].keys())
+        times, vehicle_ids, positions, velocities, emergency = self._history_columns()
         
         if graph_type == 'position':
-            for vid in vehicle_ids:
-                if hasattr(self.simulation.vehicles[vid], 'x'):
-                    positions = [step['vehicles'][vid]['x'] for step in self.simulation.history]
-                else:
-                    positions = [step['vehicles'][vid]['position'] for step in self.simulation.history]
-                ax.plot(times, positions, label=vid, linewidth=2)
+            for k, vid in enumerate(vehicle_ids):
+                ax.plot(times, positions[:, k], label=vid, linewidth=2)
         elif graph_type == 'velocity':
-            for vid in vehicle_ids:
-                velocities = [step['vehicles'][vid]['velocity'] for step in self.simulation.history]
-                ax.plot(times, velocities, label=vid, linewidth=2)
+            for k, vid in enumerate(vehicle_ids):
+                ax.plot(times, velocities[:, k], label=vid, linewidth=2)
         elif graph_type == 'distance':
-            if len(vehicle_ids) > 1:
-                for i in range(len(vehicle_ids)-1):
-                    gaps = []
-                    for step in self.simulation.history:
-                        if hasattr(self.simulation.vehicles[vehicle_ids[i]], 'x'):
-                            pos1 = step['vehicles'][vehicle_ids[i]]['x']
-                            pos2 = step['vehicles'][vehicle_ids[i+1]]['x']
-                        else:
-                            pos1 = step['vehicles'][vehicle_ids[i]]['position']
-                            pos2 = step['vehicles'][vehicle_ids[i+1]]['position']
-                        gaps.append(pos1 - pos2 - self.vehicle_length)
-                    ax.plot(times, gaps, label=f'Gap {i+1}', linewidth=2)
+            gaps = positions[:, :-1] - positions[:, 1:] - self.vehicle_length
+            for i in range(len(vehicle_ids)-1):
+                ax.plot(times, gaps[:, i], label=f'Gap {i+1}', linewidth=2)
         elif graph_type == 'emergency':
-            emergency_counts = []
-            for step in self.simulation.history:
-                emergency_count = 0
-                for action_data in step['actions'].values():
-                    if self._has_emergency_action(action_data):
-                        emergency_count += 1
-                emergency_counts.append(emergency_count)
+            emergency_counts = emergency.sum(axis=1)
             
             ax.plot(times, emergency_counts, 'r-', linewidth=3, label='Emergency Actions', marker='o', markersize=4)
             ax.fill_between(times, 0, emergency_counts, alpha=0.3, color='red')
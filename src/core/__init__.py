@@ -2,7 +2,20 @@
 Core components for formally verified platooning system
 """
 
-from .verified_controller import FormalPlatooningController, VehicleRole, ControlAction
-from .safety_monitor import SafetyMonitor
+from .verified_controller import FormalPlatooningController, VehicleRole, ControlAction, compute_verified_actions
+from .safety_monitor import SafetyMonitor, VIOLATION_DTYPE, VIOLATION_TYPES
+from .violation_log import ViolationLog, ViolationView
+from .topology import PlatoonTopology
+from .async_monitor import AsyncSafetyMonitor, BACKPRESSURE_POLICIES
+from .safety_kernels import safe_distance, time_gap_distance, safe_margin_horizon, stopping_horizon
+from .lookup_controller import PolicyTable, LookupTableController, compile_policy_table
+from .stl_monitor import (STLMonitor, SlidingExtremum, Predicate, Not, And, Or, Implies, Eventually, Always,
+                          Once, Historically, gap_duration_spec, velocity_recovery_spec)
 
-__all__ = ['FormalPlatooningController', 'VehicleRole', 'ControlAction', 'SafetyMonitor']
\ No newline at end of file
+__all__ = ['FormalPlatooningController', 'VehicleRole', 'ControlAction', 'compute_verified_actions', 'SafetyMonitor',
+           'VIOLATION_DTYPE', 'VIOLATION_TYPES', 'ViolationLog', 'ViolationView',
+           'AsyncSafetyMonitor', 'BACKPRESSURE_POLICIES',
+           'PlatoonTopology', 'safe_distance', 'time_gap_distance', 'safe_margin_horizon', 'stopping_horizon',
+           'STLMonitor', 'SlidingExtremum', 'Predicate',
+           'Not', 'And', 'Or', 'Implies', 'Eventually', 'Always', 'Once', 'Historically', 'gap_duration_spec',
+           'velocity_recovery_spec', 'PolicyTable', 'LookupTableController', 'compile_policy_table']
\ No newline at end of file
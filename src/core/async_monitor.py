@@ -0,0 +1,265 @@
+"""
+Safety monitoring off the control loop, in a worker thread or process
+"""
+
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .safety_monitor import SafetyMonitor
+
+# What submit() does when the queue is full: wait for room, discard the oldest
+# queued snapshot to make room, or thin the stream (keep every stride-th
+# snapshot, doubling the stride whenever a kept one finds the queue full and
+# halving it once the queue is at most half full again)
+BACKPRESSURE_POLICIES = ('block', 'drop_oldest', 'sample')
+MODES = ('thread', 'process')
+
+# (sequence number, simulation time, vehicle ids, positions, velocities)
+Snapshot = Tuple[int, float, Tuple[str, ...], np.ndarray, np.ndarray]
+
+def check_snapshots(monitor: SafetyMonitor, batch: List[Snapshot]) -> List[Tuple[Tuple[str, ...], np.ndarray]]:
+    """verify_trajectory over runs of snapshots with the same vehicles
+    
+    Returns (vehicle ids, VIOLATION_DTYPE rows) per run, with 'front'/'rear' as
+    indices into the ids, 'step' the snapshot's sequence number and 'time' its
+    simulation time.
+    """
+    results = []
+    start = 0
+    while start < len(batch):
+        ids = batch[start][2]
+        end = start + 1
+        while end < len(batch) and batch[end][2] == ids:
+            end += 1
+        run = batch[start:end]
+        table = monitor.verify_trajectory(np.stack([snapshot[3] for snapshot in run]),
+                                          np.stack([snapshot[4] for snapshot in run]), ids,
+                                          np.array([snapshot[1] for snapshot in run]))
+        table['step'] = np.array([snapshot[0] for snapshot in run])[table['step']]
+        results.append((ids, table))
+        start = end
+    return results
+
+def _process_worker(inbox, outbox, monitor: SafetyMonitor):
+    """Worker process loop: batches from inbox, (count, results) or an exception to outbox"""
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            return
+        try:
+            outbox.put((len(batch), check_snapshots(monitor, batch)))
+        except Exception as error:
+            outbox.put((len(batch), error))
+
+class AsyncSafetyMonitor:
+    """Feeds a SafetyMonitor from the control loop without running it there
+    
+    submit() only copies positions and velocities into a snapshot and queues
+    it; a worker checks queued snapshots in batches with verify_trajectory,
+    which finds exactly the violations verify_safety would. Results are folded
+    into monitor.violation_history by poll() and flush() on the caller's
+    thread, so the log is never touched concurrently. Every row carries the
+    simulation time given to submit() and the snapshot's sequence number as
+    'step', whatever the delay or policy.
+    
+    The queue is a bounded deque, whose appends and pops are atomic, so
+    submit() takes no lock unless the policy makes it wait. A worker thread
+    pops it directly and uses the given monitor, including later topology
+    changes. A worker process sidesteps the GIL for large platoons: submit()
+    and poll() hand it whole batches, at most two in flight, and it checks
+    with a copy of the monitor's parameters and topology taken at start.
+    """
+    
+    PROCESS_BATCHES_IN_FLIGHT = 2
+    
+    def __init__(self, monitor: Optional[SafetyMonitor] = None, capacity: int = 64, policy: str = 'block',
+                 mode: str = 'thread', max_batch: int = 64):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{policy}', expected one of {BACKPRESSURE_POLICIES}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.monitor = monitor or SafetyMonitor()
+        self.capacity = capacity
+        self.policy = policy
+        self.mode = mode
+        self.max_batch = max_batch
+        
+        self.submitted = 0  # submit() calls, the sequence number of the next snapshot
+        self.dropped = 0    # Snapshots skipped or discarded by the policy
+        self.processed = 0  # Snapshots checked and folded into the log
+        self._enqueued = 0
+        self._stride = 1  # 'sample': only sequence numbers divisible by it are queued
+        self._queue = deque()    # Snapshots waiting for the worker, oldest first
+        self._results = deque()  # (count, results) of finished batches, oldest first
+        self._closed = False
+        
+        if mode == 'thread':
+            self._wake = threading.Event()      # Set by submit(), waited on by an idle worker
+            self._space = threading.Event()     # Set by the worker, waited on by a blocked submit()
+            self._progress = threading.Event()  # Set by the worker after every batch
+            self._stopping = False
+            self._worker = threading.Thread(target=self._thread_worker, name="safety-monitor", daemon=True)
+        else:
+            context = multiprocessing.get_context()
+            self._inbox = context.Queue()
+            self._outbox = context.Queue()
+            self._in_flight = 0
+            replica = SafetyMonitor(topology=self.monitor.topology, safety_params=self.monitor.safety_params)
+            self._worker = context.Process(target=_process_worker, name="safety-monitor", daemon=True,
+                                           args=(self._inbox, self._outbox, replica))
+        self._worker.start()
+    
+    def submit(self, platoon_states: Dict, current_time: Optional[float] = None) -> bool:
+        """Queue a snapshot of the platoon; False when the policy skipped it"""
+        if self._closed:
+            raise RuntimeError("monitor is closed")
+        count = len(platoon_states)
+        snapshot = (self.submitted, np.nan if current_time is None else float(current_time), tuple(platoon_states),
+                    np.fromiter((state['position'] for state in platoon_states.values()), float, count),
+                    np.fromiter((state['velocity'] for state in platoon_states.values()), float, count))
+        self.submitted += 1
+        
+        pending = self._queue
+        if self.policy == 'sample':
+            if self._stride > 1 and len(pending) <= self.capacity // 2:
+                self._stride //= 2
+            if snapshot[0] % self._stride or len(pending) >= self.capacity:
+                if not snapshot[0] % self._stride:
+                    self._stride *= 2  # Still backlogged at this rate
+                self.dropped += 1
+                return False
+        elif len(pending) >= self.capacity:
+            if self.policy == 'drop_oldest':
+                try:
+                    pending.popleft()
+                    self.dropped += 1
+                    self._enqueued -= 1
+                except IndexError:
+                    pass  # The worker took it meanwhile
+            else:
+                self._wait_for_space()
+        pending.append(snapshot)
+        self._enqueued += 1
+        if self.mode == 'thread':
+            self._wake.set()
+        else:
+            self._pump()
+        return True
+    
+    def _wait_for_space(self):
+        pending = self._queue
+        while len(pending) >= self.capacity:
+            if self.mode == 'thread':
+                self._space.clear()
+                if len(pending) >= self.capacity:
+                    self._space.wait()
+            else:
+                self._receive()
+                self._pump()
+    
+    def _thread_worker(self):
+        pending = self._queue
+        while True:
+            self._wake.clear()
+            if not pending:
+                if self._stopping:
+                    return
+                self._wake.wait()
+                continue
+            batch = []
+            while pending and len(batch) < self.max_batch:
+                batch.append(pending.popleft())
+            self._space.set()
+            try:
+                self._results.append((len(batch), check_snapshots(self.monitor, batch)))
+            except Exception as error:
+                self._results.append((len(batch), error))
+            self._progress.set()
+    
+    def _receive(self):
+        """Wait for the worker process's next finished batch"""
+        self._results.append(self._outbox.get())
+        self._in_flight -= 1
+    
+    def _pump(self):
+        """Collect finished batches from the worker process and send it queued snapshots"""
+        while self._in_flight:
+            try:
+                self._results.append(self._outbox.get_nowait())
+            except queue.Empty:
+                break
+            self._in_flight -= 1
+        pending = self._queue
+        while pending and self._in_flight < self.PROCESS_BATCHES_IN_FLIGHT:
+            self._inbox.put([pending.popleft() for _ in range(min(len(pending), self.max_batch))])
+            self._in_flight += 1
+    
+    def _collect(self) -> int:
+        """Fold finished batches into the log; returns the number of violations added"""
+        if self.mode == 'process':
+            self._pump()
+        
+        log = self.monitor.violation_history
+        added = 0
+        while self._results:
+            count, results = self._results.popleft()
+            self.processed += count
+            self.monitor.checks += count
+            if isinstance(results, Exception):
+                raise RuntimeError("safety monitor worker failed") from results
+            for ids, table in results:
+                if len(table):
+                    index = np.array([log.vehicle_index(vid) for vid in ids], dtype=np.int32)
+                    table['rear'] = np.where(table['rear'] >= 0, index[table['rear']], -1)
+                    table['front'] = index[table['front']]
+                    log.record(table)
+                    added += len(table)
+        return added
+    
+    def poll(self) -> int:
+        """Fold in whatever the worker has finished, without waiting"""
+        return self._collect()
+    
+    def flush(self) -> int:
+        """Wait until every queued snapshot is checked and folded into the log"""
+        added = 0
+        while True:
+            added += self._collect()
+            if self.processed >= self._enqueued:
+                return added
+            if self.mode == 'thread':
+                self._progress.clear()
+                if not self._results:
+                    self._progress.wait()
+            else:
+                self._receive()
+    
+    def close(self):
+        """Check everything still queued, then stop the worker"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        if self.mode == 'thread':
+            self._stopping = True
+            self._wake.set()
+        else:
+            self._inbox.put(None)
+        self._worker.join()
+    
+    def get_stats(self) -> Dict:
+        return {'submitted': self.submitted, 'processed': self.processed, 'dropped': self.dropped,
+                'pending': self._enqueued - self.processed}
+    
+    def __enter__(self) -> 'AsyncSafetyMonitor':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
\ No newline at end of file
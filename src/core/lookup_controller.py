@@ -0,0 +1,223 @@
+"""
+Follower policy compiled into an interpolated lookup table with a certified error bound
+"""
+
+import json
+import os
+from dataclasses import asdict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .verified_controller import ControlAction, FormalPlatooningController, SafetyParameters, VehicleRole
+from .topology import PlatoonTopology
+from .safety_kernels import GAP_GAIN, VELOCITY_GAIN, safe_distance
+
+# Covers the float64 rounding of a lookup's interpolation arithmetic
+_QUERY_SLACK = 1e-6
+
+def _cell_corners(values: np.ndarray) -> list:
+    """Values at the 2**ndim corners of every grid cell, one array per corner"""
+    corners = [values]
+    for axis in range(values.ndim):
+        low = (slice(None),) * axis + (slice(None, -1),)
+        high = (slice(None),) * axis + (slice(1, None),)
+        corners = [corner[low] for corner in corners] + [corner[high] for corner in corners]
+    return corners
+
+def _min_bound(first: list, second: list, steps: int = 11) -> np.ndarray:
+    """Per-cell upper bound of min(I first, I second) over the cell
+    
+    I is multilinear interpolation of the corner values, so for any lam in
+    [0, 1], min(I first, I second) <= I (lam * first + (1 - lam) * second),
+    whose maximum over the cell is at a corner.
+    """
+    bound = None
+    for lam in np.linspace(0.0, 1.0, steps):
+        worst = np.max([lam * p + (1.0 - lam) * n for p, n in zip(first, second)], axis=0)
+        bound = worst if bound is None else np.minimum(bound, worst)
+    return bound
+
+def _to_float32_up(values: np.ndarray) -> np.ndarray:
+    """float32 copy, rounded towards +inf"""
+    rounded = values.astype(np.float32)
+    low = rounded < values
+    rounded[low] = np.nextafter(rounded[low], np.float32(np.inf))
+    return rounded
+
+class PolicyTable:
+    """The verified follower law tabulated over (gap, v_ego, v_pred)
+    
+    accelerations[i, j, k] is the bounded law at gap i * gap_step and
+    velocities j, k * velocity_step, continued below the safe distance (the
+    emergency branch is decided separately), and thresholds[j, k] the safe
+    distance plus a margin. A lookup brakes at max_deceleration when the gap is
+    below the bilinearly interpolated threshold and otherwise interpolates the
+    accelerations trilinearly; gaps beyond the table clamp to its edge, where
+    the law is saturated at max_acceleration.
+    
+    The compile step certifies, for every point of the velocity range:
+    
+    - every analytic emergency is a table emergency: the margin covers the
+      interpolation error of the safe distance, so the table may brake early,
+      by at most emergency_band metres of gap, but never late;
+    - where both take the normal branch, |table - analytic| <= max_error.
+    
+    Arrays may be memory-mapped (load(mmap=True)); lookup() reads eleven
+    entries through flat memoryviews, without building arrays.
+    """
+    
+    def __init__(self, accelerations: np.ndarray, thresholds: np.ndarray, params: SafetyParameters,
+                 gap_step: float, velocity_step: float, max_error: float, emergency_band: float):
+        self.accelerations = accelerations
+        self.thresholds = thresholds
+        self.params = params
+        self.gap_step = gap_step
+        self.velocity_step = velocity_step
+        self.max_error = max_error
+        self.emergency_band = emergency_band
+        
+        self._gaps, self._velocities = accelerations.shape[0], accelerations.shape[1]
+        self.max_velocity = (self._velocities - 1) * velocity_step
+        self.max_gap = (self._gaps - 1) * gap_step
+        self._acceleration_cells = memoryview(np.ascontiguousarray(accelerations)).cast('B').cast('f')
+        self._threshold_cells = memoryview(np.ascontiguousarray(thresholds)).cast('B').cast('f')
+    
+    def lookup(self, gap: float, v_ego: float, v_pred: float) -> Optional[Tuple[float, bool]]:
+        """(acceleration, emergency), or None when a velocity is outside [0, max_velocity]"""
+        n = self._velocities
+        x = v_ego / self.velocity_step
+        y = v_pred / self.velocity_step
+        if not (0.0 <= x <= n - 1 and 0.0 <= y <= n - 1):
+            return None
+        j = min(int(x), n - 2)
+        k = min(int(y), n - 2)
+        fx = x - j
+        fy = y - k
+        
+        thresholds = self._threshold_cells
+        base = j * n + k
+        threshold = ((thresholds[base] * (1.0 - fy) + thresholds[base + 1] * fy) * (1.0 - fx) +
+                     (thresholds[base + n] * (1.0 - fy) + thresholds[base + n + 1] * fy) * fx)
+        if gap < threshold:
+            return -self.params.max_deceleration, True
+        
+        z = min(gap / self.gap_step, self._gaps - 1.0)
+        i = min(int(z), self._gaps - 2)
+        fz = z - i
+        cells = self._acceleration_cells
+        plane = n * n
+        base = i * plane + base
+        near = ((cells[base] * (1.0 - fy) + cells[base + 1] * fy) * (1.0 - fx) +
+                (cells[base + n] * (1.0 - fy) + cells[base + n + 1] * fy) * fx)
+        base += plane
+        far = ((cells[base] * (1.0 - fy) + cells[base + 1] * fy) * (1.0 - fx) +
+               (cells[base + n] * (1.0 - fy) + cells[base + n + 1] * fy) * fx)
+        return near * (1.0 - fz) + far * fz, False
+    
+    def save(self, directory: str):
+        """Write the arrays as .npy files and the rest as JSON, so load() can memory-map them"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'accelerations.npy'), np.asarray(self.accelerations))
+        np.save(os.path.join(directory, 'thresholds.npy'), np.asarray(self.thresholds))
+        meta = {'params': asdict(self.params), 'gap_step': self.gap_step, 'velocity_step': self.velocity_step,
+                'max_error': self.max_error, 'emergency_band': self.emergency_band,
+                'gains': [GAP_GAIN, VELOCITY_GAIN]}
+        with open(os.path.join(directory, 'policy.json'), 'w') as handle:
+            json.dump(meta, handle, indent=2)
+    
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'PolicyTable':
+        with open(os.path.join(directory, 'policy.json')) as handle:
+            meta = json.load(handle)
+        if meta['gains'] != [GAP_GAIN, VELOCITY_GAIN]:
+            raise ValueError(f"Table was compiled for gains {meta['gains']}, the law uses "
+                             f"{[GAP_GAIN, VELOCITY_GAIN]}")
+        mode = 'r' if mmap else None
+        return cls(np.load(os.path.join(directory, 'accelerations.npy'), mmap_mode=mode),
+                   np.load(os.path.join(directory, 'thresholds.npy'), mmap_mode=mode),
+                   SafetyParameters(**meta['params']), meta['gap_step'], meta['velocity_step'],
+                   meta['max_error'], meta['emergency_band'])
+
+def compile_policy_table(params: Optional[SafetyParameters] = None, max_velocity: float = 30.0,
+                         gap_step: float = 1.0, velocity_step: float = 0.25) -> PolicyTable:
+    """Tabulate the follower law and certify the table against it
+    
+    The bound is derived per cell, not sampled. With h = GAP_GAIN * (gap - S)
+    + VELOCITY_GAIN * (v_pred - v_ego) and S the safe distance, everything in h
+    is multilinear except phi = max(0, (v_ego^2 - v_pred^2) / 2D), so
+    interpolating h errs by GAP_GAIN times the error on phi: phi - I phi <=
+    c = velocity_step^2 / 8D (Jensen on max(0, .) and the exact error of
+    interpolating a square), and I phi - phi <= min(I phi, I max(0, -q) + c).
+    The bounds [-D, A] add the Jensen gaps of the two clipping ramps, each at
+    most min(I over, I under) of the corner overshoots; cells clipped at every
+    corner are exact, the law being monotone in each argument. float32
+    storage error is measured and added.
+    """
+    params = params or SafetyParameters()
+    decel, accel = params.max_deceleration, params.max_acceleration
+    velocity_count = int(np.ceil(max_velocity / velocity_step)) + 1
+    velocities = np.arange(velocity_count) * velocity_step
+    top = velocities[-1]
+    # Past this gap the law is saturated at max_acceleration for every velocity pair
+    saturated = safe_distance(top, 0.0, params) + (accel + VELOCITY_GAIN * top) / GAP_GAIN
+    gaps = np.arange(int(np.ceil(saturated / gap_step)) + 2) * gap_step
+    
+    v_ego, v_pred = velocities[:, None], velocities[None, :]
+    safe = safe_distance(v_ego, v_pred, params)
+    law = GAP_GAIN * (gaps[:, None, None] - safe) + VELOCITY_GAIN * (v_pred - v_ego)
+    exact = np.clip(law, -decel, accel)
+    accelerations = exact.astype(np.float32)
+    
+    # Interpolation error of phi over each (v_ego, v_pred) cell
+    curvature = velocity_step ** 2 / (8 * decel)
+    q = (np.float_power(v_ego, 2) - np.float_power(v_pred, 2)) / (2 * decel)
+    phi_over = _min_bound(_cell_corners(np.maximum(q, 0.0)), [c + curvature for c in _cell_corners(np.maximum(-q, 0.0))])
+    phi_error = np.maximum(phi_over, curvature)
+    
+    worst = 0.0
+    for start in range(0, len(gaps) - 1, 16):  # Slabs of gap cells keep the corner arrays small
+        corners = _cell_corners(law[start:start + 17])
+        above = _min_bound([np.maximum(c - accel, 0.0) for c in corners], [np.maximum(accel - c, 0.0) for c in corners])
+        below = _min_bound([np.maximum(-decel - c, 0.0) for c in corners], [np.maximum(c + decel, 0.0) for c in corners])
+        bound = np.maximum(above, below) + GAP_GAIN * phi_error[None]
+        clipped = (np.min(corners, axis=0) >= accel) | (np.max(corners, axis=0) <= -decel)
+        worst = max(worst, float(np.max(bound, where=~clipped, initial=0.0)))
+    storage = float(np.max(np.abs(accelerations - exact)))
+    max_error = worst + storage + _QUERY_SLACK
+    
+    margin = curvature + _QUERY_SLACK
+    thresholds = _to_float32_up(safe + margin)
+    emergency_band = float(phi_over.max()) + margin + float(np.max(thresholds - (safe + margin)))
+    return PolicyTable(accelerations, thresholds, params, gap_step, velocity_step, max_error, emergency_band)
+
+class LookupTableController(FormalPlatooningController):
+    """FormalPlatooningController whose follower branch reads a compiled PolicyTable
+    
+    Assumption checks, the leader law and the missing-predecessor fallback are
+    the inherited ones. Velocities outside the table fall back to the analytic
+    law (counted in table_misses).
+    """
+    
+    def __init__(self, vehicle_id: str, table: PolicyTable, role: VehicleRole = VehicleRole.FOLLOWER,
+                 topology: Optional[PlatoonTopology] = None):
+        super().__init__(vehicle_id, role, topology)
+        self.table = table
+        self.safety_params = table.params
+        self.table_misses = 0
+    
+    def _compute_follower_action(self, platoon_states: dict) -> ControlAction:
+        predecessor = self._find_predecessor(platoon_states)
+        if not predecessor:
+            return self._emergency_safe_action("No predecessor")
+        
+        decision = self.table.lookup(predecessor['position'] - self.state.position, self.state.velocity,
+                                     predecessor['velocity'])
+        if decision is None:
+            self.table_misses += 1
+            return super()._compute_follower_action(platoon_states)
+        acceleration, emergency = decision
+        if emergency:
+            self.emergency_events += 1
+            return ControlAction(acceleration, True, True, "Emergency: gap below tabulated safe distance")
+        return ControlAction(acceleration, True, False, "Normal: tabulated control law")
\ No newline at end of file
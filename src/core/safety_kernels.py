@@ -0,0 +1,92 @@
+"""
+Safe-distance kernels shared by controllers, monitors and simulations
+"""
+
+from typing import TYPE_CHECKING, Tuple, Union
+import numpy as np
+
+if TYPE_CHECKING:
+    from .verified_controller import SafetyParameters
+
+ArrayLike = Union[float, np.ndarray]
+
+# Gains of the verified follower control law
+GAP_GAIN = 0.3
+VELOCITY_GAIN = 0.5
+
+def safe_distance(v_ego: ArrayLike, v_pred: ArrayLike, params: 'SafetyParameters') -> ArrayLike:
+    """Verified safe gap: reaction distance, excess stopping distance and margin
+    
+    Scalars give a float; arrays (and array-valued params fields, one value per
+    vehicle) broadcast. Arrays are squared with float_power, which rounds like
+    the scalar ** 2; array ** 2 becomes v * v and can differ in the last bit, so
+    this keeps scalar and vectorized callers in exact agreement.
+    """
+    two_decel = 2 * params.max_deceleration
+    if np.ndim(v_ego) == 0 and np.ndim(v_pred) == 0 and np.ndim(two_decel) == 0:
+        d_reaction = v_ego * params.reaction_time
+        d_stopping = max(0, (v_ego ** 2) / two_decel - (v_pred ** 2) / two_decel)
+        return d_reaction + d_stopping + params.min_safe_distance
+    
+    d_reaction = v_ego * params.reaction_time
+    d_stopping = np.maximum(0, np.float_power(v_ego, 2) / two_decel - np.float_power(v_pred, 2) / two_decel)
+    return d_reaction + d_stopping + params.min_safe_distance
+
+def safe_margin_horizon(margin: float, v_ego: float, params: 'SafetyParameters') -> float:
+    """Seconds for which a pair whose margin (gap - safe_distance) is now margin provably stays >= 0
+    
+    Soundness: with every acceleration in [-D, A] (D = max_deceleration,
+    A = max_acceleration) and velocities >= 0, the margin is continuous and,
+    wherever differentiable,
+    
+        dm/dt = v_pred - v_ego - tau * a_ego - [stopping term > 0] * (v_ego * a_ego - v_pred * a_pred) / D
+              >= -(v_ego * (1 + A / D) + tau * A)
+    
+    since v_pred * a_pred / D >= -v_pred cancels the v_pred closing term and
+    a_ego <= A. Over h seconds v_ego <= v0 + A * h, so
+    
+        m(h) >= m0 - ((v0 + A * h) * (1 + A / D) + tau * A) * h,
+    
+    which stays >= 0 up to the positive root of that quadratic. The margin is
+    first reduced by a rounding slack, so a pair is never skipped on a tie.
+    """
+    margin -= 1e-9 * (1.0 + abs(margin))
+    if margin <= 0 or v_ego < 0:
+        return 0.0
+    accel, decel = params.max_acceleration, params.max_deceleration
+    k = 1.0 + accel / decel
+    a, b = k * accel, k * v_ego + params.reaction_time * accel
+    if a == 0 and b == 0:
+        return float('inf')
+    # Positive root of a h^2 + b h - margin, in the cancellation-free form
+    return 2.0 * margin / (b + (b * b + 4.0 * a * margin) ** 0.5)
+
+def stopping_horizon(velocity: float, params: 'SafetyParameters') -> float:
+    """Seconds for which a non-negative velocity provably stays >= 0: v0 / max_deceleration, less a rounding slack"""
+    velocity -= 1e-9 * (1.0 + abs(velocity))
+    return velocity / params.max_deceleration if velocity > 0 else 0.0
+
+def time_gap_distance(velocity: ArrayLike, min_distance: ArrayLike, time_gap: ArrayLike) -> ArrayLike:
+    """Constant time-gap law of the enhanced controllers: standstill margin plus time_gap seconds of travel"""
+    if np.ndim(velocity) == 0:
+        return min_distance + max(0, velocity) * time_gap
+    return min_distance + np.maximum(velocity, 0) * time_gap
+
+def follower_acceleration(current_gap: ArrayLike, safe_gap: ArrayLike, v_ego: ArrayLike,
+                          v_pred: ArrayLike) -> ArrayLike:
+    """Unbounded follower command of the verified control law"""
+    return GAP_GAIN * (current_gap - safe_gap) + VELOCITY_GAIN * (v_pred - v_ego)
+
+def follower_command(current_gap: ArrayLike, safe_gap: ArrayLike, v_ego: ArrayLike, v_pred: ArrayLike,
+                     params: 'SafetyParameters') -> Tuple[ArrayLike, ArrayLike]:
+    """(acceleration, emergency) arrays of the verified follower with a predecessor, for batched callers
+    
+    The follower branch of FormalPlatooningController.compute_verified_action:
+    below the safe gap it brakes at max_deceleration, otherwise it applies the
+    control law clipped to [-max_deceleration, max_acceleration], in the same
+    floating-point operations as the per-controller path.
+    """
+    decel, accel = params.max_deceleration, params.max_acceleration
+    emergency = np.asarray(current_gap) < safe_gap
+    bounded = np.clip(follower_acceleration(current_gap, safe_gap, v_ego, v_pred), -decel, accel)
+    return np.where(emergency, -decel, bounded), emergency
\ No newline at end of file
@@ -2,73 +2,236 @@
 Runtime Safety Monitor for Formal Verification
 """
 
-from typing import Dict, List
-import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import heapq
+import numpy as np
+
+from .violation_log import ViolationLog, ViolationView, VIOLATION_DTYPE, VIOLATION_TYPES
+from .topology import PlatoonTopology
+from .verified_controller import SafetyParameters
+from .safety_kernels import safe_distance, safe_margin_horizon, stopping_horizon
+
+# Violations a SafetyMonitor retains unless told otherwise (about 400 kB of rows),
+# so that long-running monitors stay bounded; None retains every violation
+DEFAULT_MAX_VIOLATIONS = 10000
+
+class CheckSchedule:
+    """When each pair and vehicle check of one platoon layout is next due
+    
+    Items are numbered pairs first (front to back), then vehicles (in state
+    order), so checking due items in number order reports violations in the
+    same order as a full pass. A heap of (deadline, item) hands out the items
+    due at a given time.
+    """
+    
+    def __init__(self, key: Tuple, pairs: List[Tuple[str, str]], vehicles: List[str]):
+        self.key = key
+        self.pairs = pairs
+        self.vehicles = vehicles
+        self.time = -np.inf
+        self._heap = [(-np.inf, item) for item in range(len(pairs) + len(vehicles))]
+    
+    def pop_due(self, now: float) -> List[int]:
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] < now:
+            due.append(heapq.heappop(heap)[1])
+        due.sort()
+        return due
+    
+    def push(self, deadline: float, item: int):
+        heapq.heappush(self._heap, (deadline, item))
 
 class SafetyMonitor:
     """Runtime safety verification monitor"""
     
-    def __init__(self):
-        self.violation_history = []
+    def __init__(self, max_violations: Optional[int] = DEFAULT_MAX_VIOLATIONS, spill_path: Optional[str] = None,
+                 topology: Optional[PlatoonTopology] = None, safety_params: Optional[SafetyParameters] = None,
+                 prefilter: bool = False):
+        # Safe distance model, the same kernel and parameters as the controller's
+        self.safety_params = safety_params or SafetyParameters()
+        # Counters cover every violation; entries are a ring buffer, see ViolationLog
+        self.violation_history = ViolationLog(max_violations, spill_path)
+        self.topology = topology  # Shared platoon order; sorted ids are used without one
         self.assumption_checks = []
+        self.checks = 0  # verify_safety calls so far, the 'step' of their violation rows
+        self._rows = np.zeros(0, dtype=VIOLATION_DTYPE)  # Scratch rows of one check, reused
+        # Skip checks that provably still pass; see _verify_due for the assumptions
+        self.prefilter = prefilter
+        self.evaluations = 0  # Pair and vehicle checks actually evaluated
+        self._schedule: Optional[CheckSchedule] = None
     
-    def verify_safety(self, platoon_states: Dict) -> List[Dict]:
-        """Verify all safety conditions"""
-        violations = []
+    def verify_safety(self, platoon_states: Dict, current_time: Optional[float] = None) -> ViolationView:
+        """Verify all safety conditions
+        
+        Violations are written as VIOLATION_DTYPE rows, stamped with the simulation
+        time current_time (NaN when not given) and the number of earlier checks as
+        'step', and logged in violation_history. Returns them as a lazy list of the
+        usual violation dicts. With prefilter=True and a current_time, only the
+        checks that may have started failing are evaluated.
+        """
+        log = self.violation_history
+        if len(self._rows) < 2 * len(platoon_states):
+            self._rows = np.zeros(2 * len(platoon_states), dtype=VIOLATION_DTYPE)
+        rows = self._rows  # At most one violation per pair and one per vehicle
+        count = 0
+        step = self.checks
+        stamp = np.nan if current_time is None else current_time
+        self.checks += 1
+        
+        if self.prefilter and current_time is not None:
+            count = self._verify_due(platoon_states, current_time, rows, step)
+            violations = rows[:count].copy()
+            if count:
+                log.record(violations)
+            return ViolationView(violations, log.vehicle_ids)
         
         # Check safe distances
-        vehicle_ids = sorted(platoon_states.keys())
-        for i in range(len(vehicle_ids) - 1):
-            front = platoon_states[vehicle_ids[i]]
-            rear = platoon_states[vehicle_ids[i + 1]]
+        vehicle_ids = self._ordered_ids(platoon_states)
+        self.evaluations += max(len(vehicle_ids) - 1, 0) + len(platoon_states)
+        for front_id, rear_id in zip(vehicle_ids, vehicle_ids[1:]):
+            front = platoon_states[front_id]
+            rear = platoon_states[rear_id]
             
             actual_gap = front['position'] - rear['position']
             safe_gap = self._calculate_safe_distance(rear['velocity'], front['velocity'])
             
             if actual_gap < safe_gap:
-                violations.append({
-                    'type': 'SAFE_DISTANCE_VIOLATION',
-                    'vehicles': (vehicle_ids[i], vehicle_ids[i + 1]),
-                    'actual_gap': actual_gap,
-                    'safe_gap': safe_gap,
-                    'timestamp': time.time()
-                })
+                rows[count] = (step, stamp, 0, log.vehicle_index(front_id), log.vehicle_index(rear_id),
+                               actual_gap, safe_gap)
+                count += 1
         
         # Check velocity bounds
         for vid, state in platoon_states.items():
             if state['velocity'] < 0:
-                violations.append({
-                    'type': 'NEGATIVE_VELOCITY',
-                    'vehicle': vid,
-                    'velocity': state['velocity'],
-                    'timestamp': time.time()
-                })
+                rows[count] = (step, stamp, 1, log.vehicle_index(vid), -1, state['velocity'], 0.0)
+                count += 1
         
         # Log violations
-        self.violation_history.extend(violations)
-        return violations
+        violations = rows[:count].copy()
+        if count:
+            log.record(violations)
+        return ViolationView(violations, log.vehicle_ids)
     
-    def _calculate_safe_distance(self, v_ego: float, v_pred: float) -> float:
-        """Calculate safe distance (same as controller)"""
-        reaction_time = 0.2
-        max_decel = 4.0
-        min_distance = 3.0
+    def _verify_due(self, platoon_states: Dict, now: float, rows: np.ndarray, step: int) -> int:
+        """Evaluate only the checks whose pass is not yet guaranteed; returns the rows written
         
-        d_reaction = v_ego * reaction_time
-        d_stop_ego = (v_ego ** 2) / (2 * max_decel)
-        d_stop_pred = (v_pred ** 2) / (2 * max_decel)
-        d_stopping = max(0, d_stop_ego - d_stop_pred)
+        A check that passes at time t0 is not due again until the horizon from
+        safe_margin_horizon (pairs) or stopping_horizon (velocities) has elapsed,
+        and failing checks are due at every call. This is sound, i.e. it reports
+        exactly what a full pass would, as long as between calls the vehicles
+        move continuously with accelerations in [-max_deceleration,
+        max_acceleration] and velocities >= 0. Anything else (placing vehicles,
+        a different vehicle set or order, time going backwards) must start a new
+        schedule: the latter two do so automatically, otherwise call
+        reset_prefilter().
+        """
+        schedule = self._schedule
+        key = (self.topology.version if self.topology is not None else None, tuple(platoon_states))
+        if schedule is None or schedule.key != key or now < schedule.time:
+            vehicle_ids = self._ordered_ids(platoon_states)
+            schedule = self._schedule = CheckSchedule(key, list(zip(vehicle_ids, vehicle_ids[1:])),
+                                                      list(platoon_states))
+        schedule.time = now
         
-        return d_reaction + d_stopping + min_distance
+        log = self.violation_history
+        params = self.safety_params
+        pair_count = len(schedule.pairs)
+        count = 0
+        due = schedule.pop_due(now)
+        self.evaluations += len(due)
+        for item in due:
+            if item < pair_count:
+                front_id, rear_id = schedule.pairs[item]
+                front = platoon_states[front_id]
+                rear = platoon_states[rear_id]
+                
+                actual_gap = front['position'] - rear['position']
+                safe_gap = self._calculate_safe_distance(rear['velocity'], front['velocity'])
+                
+                if actual_gap < safe_gap:
+                    rows[count] = (step, now, 0, log.vehicle_index(front_id), log.vehicle_index(rear_id),
+                                   actual_gap, safe_gap)
+                    count += 1
+                    schedule.push(-np.inf, item)
+                else:
+                    schedule.push(now + safe_margin_horizon(actual_gap - safe_gap, rear['velocity'], params), item)
+            else:
+                vid = schedule.vehicles[item - pair_count]
+                velocity = platoon_states[vid]['velocity']
+                if velocity < 0:
+                    rows[count] = (step, now, 1, log.vehicle_index(vid), -1, velocity, 0.0)
+                    count += 1
+                    schedule.push(-np.inf, item)
+                else:
+                    schedule.push(now + stopping_horizon(velocity, params), item)
+        return count
+    
+    def reset_prefilter(self):
+        """Make every check due again, e.g. after vehicles were placed by hand"""
+        self._schedule = None
+    
+    def verify_trajectory(self, positions: np.ndarray, velocities: np.ndarray,
+                          vehicle_ids: Optional[Sequence[str]] = None,
+                          times: Optional[np.ndarray] = None) -> np.ndarray:
+        """Check a whole recorded run at once
+        
+        positions and velocities are (T x N) arrays, one column per vehicle. Pairs
+        are formed as in verify_safety: consecutive vehicles in topology or sorted
+        vehicle_ids order (column order when no ids are given). Returns a VIOLATION_DTYPE
+        array ordered by step, with 'front'/'rear' as column indices and the same
+        violations and values verify_safety reports for each snapshot; the run is
+        not added to violation_history.
+        """
+        positions = np.atleast_2d(np.asarray(positions, dtype=float))
+        velocities = np.atleast_2d(np.asarray(velocities, dtype=float))
+        steps, count = positions.shape
+        if vehicle_ids is None:
+            order = np.arange(count)
+        else:
+            column = {vid: k for k, vid in enumerate(vehicle_ids)}
+            order = np.array([column[vid] for vid in self._ordered_ids(column)], dtype=np.intp)
+        
+        # Safe-distance violations between consecutive vehicles in pairing order
+        front, rear = order[:-1], order[1:]
+        actual_gap = positions[:, front] - positions[:, rear]
+        safe_gap = safe_distance(velocities[:, rear], velocities[:, front], self.safety_params)
+        gap_step, gap_pair = np.nonzero(actual_gap < safe_gap)
+        
+        speed_step, speed_vehicle = np.nonzero(velocities < 0)
+        
+        table = np.empty(len(gap_step) + len(speed_step), dtype=VIOLATION_DTYPE)
+        gaps, speeds = table[:len(gap_step)], table[len(gap_step):]
+        gaps['step'], gaps['type'] = gap_step, 0
+        gaps['front'], gaps['rear'] = front[gap_pair], rear[gap_pair]
+        gaps['actual'], gaps['limit'] = actual_gap[gap_step, gap_pair], safe_gap[gap_step, gap_pair]
+        speeds['step'], speeds['type'] = speed_step, 1
+        speeds['front'], speeds['rear'] = speed_vehicle, -1
+        speeds['actual'], speeds['limit'] = velocities[speed_step, speed_vehicle], 0.0
+        
+        # Within a step, distance violations come first, as in verify_safety
+        table = table[np.argsort(table['step'], kind='stable')]
+        table['time'] = np.nan if times is None else np.asarray(times, dtype=float)[table['step']]
+        return table
+    
+    def _ordered_ids(self, vehicle_ids) -> List[str]:
+        """Front-to-back order of the given vehicles"""
+        if self.topology is None:
+            return sorted(vehicle_ids)
+        missing = [vid for vid in vehicle_ids if vid not in self.topology]
+        if missing:
+            raise KeyError(f"Vehicles not in the platoon topology: {missing}")
+        return [vid for vid in self.topology if vid in vehicle_ids]
+    
+    def _calculate_safe_distance(self, v_ego: float, v_pred: float) -> float:
+        """Calculate safe distance (same as controller)"""
+        return safe_distance(v_ego, v_pred, self.safety_params)
     
     def get_safety_stats(self) -> Dict:
         """Get safety statistics"""
-        total_violations = len(self.violation_history)
-        distance_violations = len([v for v in self.violation_history 
-                                 if v['type'] == 'SAFE_DISTANCE_VIOLATION'])
-        
+        log = self.violation_history
         return {
-            'total_violations': total_violations,
-            'distance_violations': distance_violations,
-            'last_violation': self.violation_history[-1] if self.violation_history else None
+            'total_violations': log.total,
+            'distance_violations': log.counts['SAFE_DISTANCE_VIOLATION'],
+            'last_violation': log.last
         }
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+Online signal temporal logic monitor with quantitative robustness
+"""
+
+from collections import deque
+from typing import Dict, Optional
+
+# Signals both simulations feed to an attached STLMonitor every step
+PLATOON_SIGNALS = ('gap_margin', 'min_velocity', 'emergency')
+
+class SlidingExtremum:
+    """Maximum (or minimum) of the last `size` values pushed
+    
+    Monotonic deque (Lemire): each value is appended once and dropped at most
+    once, either when it expires or when a larger value arrives behind it, so
+    a push costs O(1) amortized whatever the window size.
+    """
+    
+    def __init__(self, size: int, maximum: bool = True):
+        if size < 1:
+            raise ValueError("window must hold at least one sample")
+        self.size = size
+        self.sign = 1.0 if maximum else -1.0
+        self._window = deque()  # (sample index, sign * value), values strictly decreasing
+        self._count = 0
+    
+    def push(self, value: float) -> float:
+        key = self.sign * value
+        window = self._window
+        while window and window[-1][1] <= key:
+            window.pop()
+        window.append((self._count, key))
+        self._count += 1
+        while window[0][0] <= self._count - 1 - self.size:
+            window.popleft()
+        return self.sign * window[0][1]
+    
+    def reset(self):
+        self._window.clear()
+        self._count = 0
+
+class Formula:
+    """STL formula evaluated one sample at a time
+    
+    update() takes the signals of sample k and returns the robustness at sample
+    k - horizon, or None while that sample does not exist yet. Future operators
+    raise the horizon by their window; past operators and predicates do not.
+    Windows are given in seconds and turned into sample counts by bind(dt),
+    with sample-and-hold semantics: a window of w seconds spans round(w / dt) + 1
+    samples.
+    """
+    horizon = 0
+    
+    def bind(self, dt: float) -> 'Formula':
+        return self
+    
+    def update(self, signals: Dict[str, float]) -> Optional[float]:
+        raise NotImplementedError
+    
+    def reset(self):
+        pass
+
+class Predicate(Formula):
+    """signal >= threshold (or <= with above=False); robustness is the signed distance"""
+    
+    def __init__(self, signal: str, threshold: float = 0.0, above: bool = True):
+        self.signal = signal
+        self.threshold = threshold
+        self.above = above
+    
+    def update(self, signals: Dict[str, float]) -> Optional[float]:
+        value = signals[self.signal]
+        return value - self.threshold if self.above else self.threshold - value
+
+class _Delay:
+    """Hold back a formula's outputs by a fixed number of samples"""
+    
+    def __init__(self, formula: Formula, samples: int):
+        self.formula = formula
+        self.samples = samples
+        self._queue = deque()
+    
+    def update(self, signals: Dict[str, float]) -> Optional[float]:
+        value = self.formula.update(signals)
+        if not self.samples:
+            return value
+        self._queue.append(value)
+        return self._queue.popleft() if len(self._queue) > self.samples else None
+    
+    def reset(self):
+        self.formula.reset()
+        self._queue.clear()
+
+class Not(Formula):
+    def __init__(self, formula: Formula):
+        self.formula = formula
+    
+    def bind(self, dt: float) -> Formula:
+        self.formula.bind(dt)
+        self.horizon = self.formula.horizon
+        return self
+    
+    def update(self, signals: Dict[str, float]) -> Optional[float]:
+        value = self.formula.update(signals)
+        return None if value is None else -value
+    
+    def reset(self):
+        self.formula.reset()
+
+class And(Formula):
+    """Minimum of the operands' robustness, with their horizons aligned"""
+    combine = staticmethod(min)
+    
+    def __init__(self, *formulas: Formula):
+        self.formulas = formulas
+        self._operands = ()
+    
+    def bind(self, dt: float) -> Formula:
+        for formula in self.formulas:
+            formula.bind(dt)
+        self.horizon = max(formula.horizon for formula in self.formulas)
+        self._operands = tuple(_Delay(formula, self.horizon - formula.horizon) for formula in self.formulas)
+        return self
+    
+    def update(self, signals: Dict[str, float]) -> Optional[float]:
+        values = [operand.update(signals) for operand in self._operands]
+        return None if values[0] is None else self.combine(values)
+    
+    def reset(self):
+        for operand in self._operands:
+            operand.reset()
+
+class Or(And):
+    """Maximum of the operands' robustness, with their horizons aligned"""
+    combine = staticmethod(max)
+
+class Implies(Or):
+    def __init__(self, antecedent: Formula, consequent: Formula):
+        super().__init__(Not(antecedent), consequent)
+
+class _Window(Formula):
+    maximum = True
+    future = False
+    
+    def __init__(self, formula: Formula, window: float):
+        self.formula = formula
+        self.window = window
+        self.samples = 0
+        self._extremum = None
+        self._seen = 0
+    
+    def bind(self, dt: float) -> Formula:
+        self.formula.bind(dt)
+        self.samples = int(round(self.window / dt))
+        self.horizon = self.formula.horizon + (self.samples if self.future else 0)
+        self._extremum = SlidingExtremum(self.samples + 1, self.maximum)
+        return self
+    
+    def update(self, signals: Dict[str, float]) -> Optional[float]:
+        value = self.formula.update(signals)
+        if value is None:
+            return None
+        self._seen += 1
+        result = self._extremum.push(value)
+        # A future window is complete once its last sample has been seen
+        if self.future and self._seen <= self.samples:
+            return None
+        return result
+    
+    def reset(self):
+        self.formula.reset()
+        self._extremum.reset()
+        self._seen = 0
+
+class Eventually(_Window):
+    """F[0, window]: the formula holds at some sample in the next `window` seconds"""
+    future = True
+
+class Always(_Window):
+    """G[0, window]: the formula holds at every sample in the next `window` seconds"""
+    maximum = False
+    future = True
+
+class Once(_Window):
+    """O[0, window]: the formula held at some sample in the last `window` seconds (or since the start)"""
+
+class Historically(_Window):
+    """H[0, window]: the formula held at every sample in the last `window` seconds (or since the start)"""
+    maximum = False
+
+def gap_duration_spec(max_duration: float = 0.5, signal: str = 'gap_margin') -> Formula:
+    """The gap is below the safe distance for no more than max_duration at a time"""
+    return Eventually(Predicate(signal), max_duration)
+
+def velocity_recovery_spec(threshold: float, window: float = 3.0, trigger: str = 'emergency',
+                           signal: str = 'min_velocity') -> Formula:
+    """Every emergency sample is followed by velocity >= threshold within window seconds"""
+    return Implies(Predicate(trigger, 0.5), Eventually(Predicate(signal, threshold), window))
+
+class STLMonitor:
+    """Streaming robustness of named requirements, each meant to hold at every sample
+    
+    update() folds one sample in and returns each requirement's robustness at
+    the sample its horizon allows judging (None before that). The monitor keeps
+    the latest and the worst robustness and the time of the first violation; a
+    requirement holds over the run while its worst robustness is >= 0. The
+    last `horizon` samples of a run are never judged.
+    """
+    
+    def __init__(self, specs: Dict[str, Formula], dt: float):
+        self.dt = dt
+        self.specs = {name: formula.bind(dt) for name, formula in specs.items()}
+        self.reset()
+    
+    def reset(self):
+        for formula in self.specs.values():
+            formula.reset()
+        self.samples = 0
+        self.robustness: Dict[str, Optional[float]] = {name: None for name in self.specs}
+        self.worst = {name: float('inf') for name in self.specs}
+        self.first_violation: Dict[str, Optional[float]] = {name: None for name in self.specs}
+    
+    def update(self, time: float, signals: Dict[str, float]) -> Dict[str, Optional[float]]:
+        self.samples += 1
+        verdicts = {}
+        for name, formula in self.specs.items():
+            value = formula.update(signals)
+            if value is None:
+                verdicts[name] = None
+                continue
+            value = verdicts[name] = float(value)
+            self.robustness[name] = value
+            if value < self.worst[name]:
+                self.worst[name] = value
+            if value < 0 and self.first_violation[name] is None:
+                self.first_violation[name] = time - formula.horizon * self.dt
+        return verdicts
+    
+    def satisfied(self) -> Dict[str, bool]:
+        return {name: worst >= 0 for name, worst in self.worst.items()}
+    
+    def summary(self) -> Dict[str, Dict]:
+        return {name: {'robustness': self.worst[name], 'satisfied': self.worst[name] >= 0,
+                       'first_violation': self.first_violation[name]}
+                for name in self.specs}
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Platoon topology: who follows whom
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+class PlatoonTopology:
+    """Front-to-back vehicle order with O(1) predecessor/successor lookup
+    
+    The order is given explicitly (leader first) or derived once from positions,
+    and only changes on membership events: join, leave, merge and split. The
+    lookup maps are updated from the first affected slot onwards; version is
+    bumped on every change so callers can cache derived data.
+    """
+    
+    def __init__(self, vehicle_ids: Sequence[str] = ()):
+        self._order: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.version = 0
+        for vehicle_id in vehicle_ids:
+            self.join(vehicle_id)
+    
+    @classmethod
+    def from_positions(cls, platoon_states: Dict) -> 'PlatoonTopology':
+        """Order vehicles front to back by 'position' (ties by id)"""
+        ordered = sorted(platoon_states, key=lambda vid: (-platoon_states[vid]['position'], vid))
+        return cls(ordered)
+    
+    def _reindex(self, start: int = 0):
+        for index in range(start, len(self._order)):
+            self._index[self._order[index]] = index
+        self.version += 1
+    
+    def join(self, vehicle_id: str, index: Optional[int] = None):
+        """Insert a vehicle at the given slot (0 = new leader), or at the tail"""
+        if vehicle_id in self._index:
+            raise ValueError(f"{vehicle_id} is already in the platoon")
+        if index is None or index >= len(self._order):
+            index = len(self._order)
+        self._order.insert(index, vehicle_id)
+        self._reindex(index)
+    
+    def leave(self, vehicle_id: str):
+        index = self._index.pop(vehicle_id)
+        del self._order[index]
+        self._reindex(index)
+    
+    def merge(self, other: 'PlatoonTopology'):
+        """Append another platoon behind this one; other is left empty"""
+        start = len(self._order)
+        for vehicle_id in other._order:
+            if vehicle_id in self._index:
+                raise ValueError(f"{vehicle_id} is already in the platoon")
+        self._order.extend(other._order)
+        self._reindex(start)
+        other._order, other._index = [], {}
+        other.version += 1
+    
+    def split(self, vehicle_id: str) -> 'PlatoonTopology':
+        """Detach vehicle_id and everyone behind it as a new platoon"""
+        index = self._index[vehicle_id]
+        tail = PlatoonTopology(self._order[index:])
+        for detached in self._order[index:]:
+            del self._index[detached]
+        del self._order[index:]
+        self.version += 1
+        return tail
+    
+    def predecessor(self, vehicle_id: str) -> Optional[str]:
+        index = self._index[vehicle_id]
+        return self._order[index - 1] if index > 0 else None
+    
+    def successor(self, vehicle_id: str) -> Optional[str]:
+        index = self._index[vehicle_id]
+        if index + 1 >= len(self._order):
+            return None
+        return self._order[index + 1]
+    
+    def index(self, vehicle_id: str) -> int:
+        return self._index[vehicle_id]
+    
+    @property
+    def leader(self) -> Optional[str]:
+        return self._order[0] if self._order else None
+    
+    def pairs(self) -> List[Tuple[str, str]]:
+        """(front, rear) for every consecutive pair, front to back"""
+        return list(zip(self._order, self._order[1:]))
+    
+    def __contains__(self, vehicle_id) -> bool:
+        return vehicle_id in self._index
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._order)
+    
+    def __len__(self) -> int:
+        return len(self._order)
\ No newline at end of file
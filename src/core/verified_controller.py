@@ -5,10 +5,13 @@ Mathematically proven safety guarantees
 """
 
 import numpy as np
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence, Tuple
 from enum import Enum
 from dataclasses import dataclass
 
+from .topology import PlatoonTopology
+from .safety_kernels import safe_distance, follower_acceleration, follower_command
+
 class VehicleRole(Enum):
     LEADER = "leader"
     FOLLOWER = "follower"
@@ -41,9 +44,11 @@ class ControlAction:
 class FormalPlatooningController:
     """Formally verified platooning controller"""
     
-    def __init__(self, vehicle_id: str, role: VehicleRole = VehicleRole.FOLLOWER):
+    def __init__(self, vehicle_id: str, role: VehicleRole = VehicleRole.FOLLOWER,
+                 topology: Optional[PlatoonTopology] = None):
         self.vehicle_id = vehicle_id
         self.role = role
+        self.topology = topology  # Shared platoon order; sorted ids are used without one
         self.safety_params = SafetyParameters()
         self.state = VehicleState(0.0, 0.0, 0.0, 0.0, role)
         self.safety_violations = 0
@@ -94,18 +99,11 @@ class FormalPlatooningController:
     
     def _calculate_safe_distance(self, v_ego: float, v_pred: float) -> float:
         """Calculate mathematically proven safe distance"""
-        d_reaction = v_ego * self.safety_params.reaction_time
-        d_stop_ego = (v_ego ** 2) / (2 * self.safety_params.max_deceleration)
-        d_stop_pred = (v_pred ** 2) / (2 * self.safety_params.max_deceleration)
-        d_stopping = max(0, d_stop_ego - d_stop_pred)
-        
-        return d_reaction + d_stopping + self.safety_params.min_safe_distance
+        return safe_distance(v_ego, v_pred, self.safety_params)
     
     def _control_law(self, current_gap: float, safe_gap: float, v_ego: float, v_pred: float) -> float:
         """Formally verified control law"""
-        gap_error = current_gap - safe_gap
-        vel_error = v_pred - v_ego
-        return 0.3 * gap_error + 0.5 * vel_error
+        return follower_acceleration(current_gap, safe_gap, v_ego, v_pred)
     
     def _compute_leader_action(self) -> ControlAction:
         """Leader vehicle control"""
@@ -138,6 +136,12 @@ class FormalPlatooningController:
         """Find immediate predecessor"""
         if self.role == VehicleRole.LEADER:
             return None
+        
+        if self.topology is not None:
+            if self.vehicle_id not in self.topology:
+                return None  # Left, split off or not yet joined: no predecessor to follow
+            predecessor_id = self.topology.predecessor(self.vehicle_id)
+            return platoon_states.get(predecessor_id) if predecessor_id is not None else None
             
         vehicle_ids = sorted(platoon_states.keys())
         try:
@@ -169,4 +173,77 @@ class FormalPlatooningController:
         return {
             'safety_violations': self.safety_violations,
             'emergency_events': self.emergency_events
-        }
\ No newline at end of file
+        }
+
+def compute_verified_actions(controllers: Sequence[FormalPlatooningController], positions: np.ndarray,
+                             velocities: np.ndarray, timestamps: np.ndarray,
+                             current_time: float) -> Tuple[np.ndarray, np.ndarray]:
+    """compute_verified_action for a whole platoon in one vectorized pass
+    
+    Entry i of each array describes controllers[i]'s vehicle; the ego state is
+    read from the arrays, as if update_state had been called with them. Returns
+    (accelerations, emergency flags) equal to the per-controller results, and
+    updates timestamps and the safety_violations / emergency_events counters the
+    same way the scalar path does.
+    """
+    positions = np.asarray(positions, dtype=float)
+    velocities = np.asarray(velocities, dtype=float)
+    count = len(controllers)
+    if count == 0:
+        return np.zeros(0), np.zeros(0, dtype=bool)
+    
+    params = [controller.safety_params for controller in controllers]
+    max_decel = np.array([p.max_deceleration for p in params])
+    max_accel = np.array([p.max_acceleration for p in params])
+    # Per-vehicle parameters broadcast through the shared kernel
+    limits = SafetyParameters(max_deceleration=max_decel, max_acceleration=max_accel,
+                              min_safe_distance=np.array([p.min_safe_distance for p in params]),
+                              reaction_time=np.array([p.reaction_time for p in params]))
+    delay = np.array([p.communication_delay for p in params])
+    leader = np.array([controller.role == VehicleRole.LEADER for controller in controllers])
+    
+    # Assumption check: every controller compares all timestamps against its own delay
+    # bound; the stalest timestamp decides (fmax skips NaN like the scalar comparison)
+    staleness = np.fmax.reduce(current_time - np.asarray(timestamps, dtype=float))
+    stale = staleness > delay
+    
+    # Predecessor column of every follower, -1 where there is none
+    column = {controller.vehicle_id: k for k, controller in enumerate(controllers)}
+    sorted_ids = sorted(column)
+    sorted_rank = {vid: rank for rank, vid in enumerate(sorted_ids)}
+    predecessor = np.full(count, -1)
+    for k, controller in enumerate(controllers):
+        if controller.topology is not None:
+            topology = controller.topology
+            predecessor_id = topology.predecessor(controller.vehicle_id) if controller.vehicle_id in topology else None
+        else:
+            rank = sorted_rank[controller.vehicle_id]
+            predecessor_id = sorted_ids[rank - 1] if rank > 0 else None
+        predecessor[k] = column.get(predecessor_id, -1)
+    
+    # Leader and follower laws, evaluated for everyone and selected below
+    leader_accel = np.clip((20.0 - velocities) * 0.5, -max_decel, max_accel)
+    
+    has_predecessor = predecessor >= 0
+    v_ego = velocities
+    v_pred = velocities[np.maximum(predecessor, 0)]
+    current_gap = positions[np.maximum(predecessor, 0)] - positions
+    
+    safe_gap = safe_distance(v_ego, v_pred, limits)
+    follower_accel, below_safe = follower_command(current_gap, safe_gap, v_ego, v_pred, limits)
+    
+    # Branch order of compute_verified_action: assumptions, then leader / follower
+    safe_action = stale | (~leader & ~has_predecessor)
+    too_close = ~safe_action & ~leader & has_predecessor & below_safe
+    accelerations = np.where(leader, leader_accel, follower_accel)
+    accelerations = np.where(safe_action, -max_decel * 0.5, accelerations)
+    emergency = safe_action | too_close
+    
+    for controller in controllers:
+        controller.state.timestamp = current_time
+    for k in np.flatnonzero(safe_action):
+        controllers[k].safety_violations += 1
+    for k in np.flatnonzero(too_close):
+        controllers[k].emergency_events += 1
+    
+    return accelerations, emergency
\ No newline at end of file
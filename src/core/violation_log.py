@@ -0,0 +1,234 @@
+"""
+Bounded, indexed log of safety violations
+"""
+
+import json
+from collections import Counter, deque
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+VIOLATION_TYPES = ('SAFE_DISTANCE_VIOLATION', 'NEGATIVE_VELOCITY')
+
+# One row per violation: 'front'/'rear' are vehicle indices ('rear' is -1 for
+# NEGATIVE_VELOCITY), 'actual' is the gap or velocity, 'limit' the safe gap or
+# 0.0 and 'time' the simulation time of the check (NaN when unknown)
+VIOLATION_DTYPE = np.dtype([
+    ('step', np.int64),
+    ('time', np.float64),
+    ('type', np.int8),
+    ('front', np.int32),
+    ('rear', np.int32),
+    ('actual', np.float64),
+    ('limit', np.float64),
+])
+
+def violation_dict(row: np.void, vehicle_ids: Sequence) -> Dict:
+    """The dict form of one VIOLATION_DTYPE row, as verify_safety used to build it"""
+    step, time, code, front, rear, actual, limit = row.item()
+    timestamp = None if time != time else time
+    if rear < 0:
+        return {'type': VIOLATION_TYPES[code], 'vehicle': vehicle_ids[front], 'velocity': actual,
+                'timestamp': timestamp}
+    return {'type': VIOLATION_TYPES[code], 'vehicles': (vehicle_ids[front], vehicle_ids[rear]),
+            'actual_gap': actual, 'safe_gap': limit, 'timestamp': timestamp}
+
+def _json_default(value):
+    # numpy scalars and tuples of ids
+    if hasattr(value, 'item'):
+        return value.item()
+    return list(value)
+
+class ViolationView(Sequence):
+    """Read-only list of violation dicts over VIOLATION_DTYPE rows
+    
+    Dicts are only built for the entries actually read, once each.
+    """
+    
+    def __init__(self, rows: np.ndarray, vehicle_ids: Sequence):
+        self.rows = rows
+        self.vehicle_ids = vehicle_ids
+        self._dicts: Dict[int, Dict] = {}
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[k] for k in range(*index.indices(len(self.rows)))]
+        if index < 0:
+            index += len(self.rows)
+        if not 0 <= index < len(self.rows):
+            raise IndexError("violation index out of range")
+        violation = self._dicts.get(index)
+        if violation is None:
+            violation = self._dicts[index] = violation_dict(self.rows[index], self.vehicle_ids)
+        return violation
+    
+    def __repr__(self) -> str:
+        return f"ViolationView({list(self)!r})"
+
+class ViolationLog:
+    """Violation records with running counters and a per-vehicle-pair index
+    
+    Entries are VIOLATION_DTYPE rows in a preallocated array, with vehicles
+    stored as indices into vehicle_ids; dict views are built on every access
+    and not kept, so retained entries cost one row each.
+    Counters cover every violation ever logged and are O(1) to query. Entries
+    themselves are retained according to the policy: all of them (max_entries
+    None, the array doubles when full), the most recent max_entries (ring
+    buffer), or the most recent max_entries with older ones appended to
+    spill_path as JSON lines. Indexing and iteration go over the retained
+    entries, oldest first.
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None, spill_path: Optional[str] = None):
+        if spill_path is not None and max_entries is None:
+            raise ValueError("spill_path requires max_entries")
+        self.max_entries = max_entries
+        self.spill_path = spill_path
+        self.vehicle_ids: List[str] = []
+        self._vehicle_index: Dict[str, int] = {}
+        
+        self.total = 0
+        self.counts = Counter()  # Violation type -> count
+        self.spilled = 0
+        
+        self._rows = np.zeros(max(max_entries, 1) if max_entries is not None else 64, dtype=VIOLATION_DTYPE)
+        self._first = 0  # Sequence number of the oldest retained entry
+        self._next = 0   # Sequence number of the next entry
+        self._pair_counts = Counter()  # Vehicle index key -> count
+        self._by_pair: Dict[Tuple[int, ...], deque] = {}  # Vehicle index key -> retained sequence numbers
+        self._spill_file = None
+    
+    def vehicle_index(self, vehicle_id: str) -> int:
+        """Index of a vehicle in the rows, registering it on first sight"""
+        index = self._vehicle_index.get(vehicle_id)
+        if index is None:
+            index = self._vehicle_index[vehicle_id] = len(self.vehicle_ids)
+            self.vehicle_ids.append(vehicle_id)
+        return index
+    
+    def append(self, violation: Dict):
+        """Log one violation given in dict form"""
+        code = VIOLATION_TYPES.index(violation['type'])
+        if 'vehicles' in violation:
+            front, rear = (self.vehicle_index(vid) for vid in violation['vehicles'])
+            actual, limit = violation['actual_gap'], violation['safe_gap']
+        else:
+            front, rear = self.vehicle_index(violation['vehicle']), -1
+            actual, limit = violation['velocity'], 0.0
+        time = violation.get('timestamp')
+        row = np.array([(-1, np.nan if time is None else time, code, front, rear, actual, limit)],
+                       dtype=VIOLATION_DTYPE)
+        self.record(row)
+    
+    def extend(self, violations: Iterable[Dict]):
+        for violation in violations:
+            self.append(violation)
+    
+    def record(self, rows: np.ndarray):
+        """Log VIOLATION_DTYPE rows whose vehicles are indices into vehicle_ids"""
+        bounded = self.max_entries is not None
+        capacity = len(self._rows)
+        if bounded and len(rows) > capacity:
+            for start in range(0, len(rows), capacity):
+                self.record(rows[start:start + capacity])
+            return
+        if bounded:
+            # Make room first, so that no retained row is overwritten before it is evicted
+            self._evict(min(len(self), len(self) + len(rows) - self.max_entries))
+        elif self._next + len(rows) > capacity:
+            grown = np.zeros(max(2 * capacity, self._next + len(rows)), dtype=VIOLATION_DTYPE)
+            grown[:self._next] = self._rows[:self._next]
+            self._rows = grown
+            capacity = len(grown)
+        
+        start = self._next
+        self._next += len(rows)
+        self._rows[np.arange(start, self._next) % capacity] = rows
+        self.total += len(rows)
+        for sequence, code, front, rear in zip(range(start, self._next), rows['type'].tolist(),
+                                              rows['front'].tolist(), rows['rear'].tolist()):
+            key = (front,) if rear < 0 else (front, rear)
+            self.counts[VIOLATION_TYPES[code]] += 1
+            self._pair_counts[key] += 1
+            self._by_pair.setdefault(key, deque()).append(sequence)
+        
+        if bounded:
+            self._evict(len(self) - self.max_entries)
+    
+    def _view(self, sequence: int) -> Dict:
+        return violation_dict(self._rows[sequence % len(self._rows)], self.vehicle_ids)
+    
+    def _evict(self, count: int):
+        """Drop the count oldest entries, spilling them when configured"""
+        if count <= 0:
+            return
+        evicted = self._rows[np.arange(self._first, self._first + count) % len(self._rows)]
+        for sequence, front, rear in zip(range(self._first, self._first + count), evicted['front'].tolist(),
+                                         evicted['rear'].tolist()):
+            key = (front,) if rear < 0 else (front, rear)
+            retained = self._by_pair[key]
+            retained.popleft()  # Entries are evicted in logging order, so it is the oldest of its pair
+            if not retained:
+                del self._by_pair[key]
+            
+            if self.spill_path is not None:
+                if self._spill_file is None:
+                    self._spill_file = open(self.spill_path, 'a', buffering=1)
+                self._spill_file.write(json.dumps(self._view(sequence), default=_json_default) + '\n')
+                self.spilled += 1
+        self._first += count
+    
+    @property
+    def pair_counts(self) -> Counter:
+        """violation_key -> count over every violation logged"""
+        names = self.vehicle_ids
+        return Counter({tuple(names[index] for index in key): count for key, count in self._pair_counts.items()})
+    
+    @property
+    def last(self) -> Optional[Dict]:
+        return self._view(self._next - 1) if self._next > self._first else None
+    
+    def rows(self) -> np.ndarray:
+        """Retained entries as a VIOLATION_DTYPE array, oldest first"""
+        return self._rows[np.arange(self._first, self._next) % len(self._rows)]
+    
+    def for_pair(self, *vehicles: str) -> List[Dict]:
+        """Retained violations of one vehicle pair (front, rear) or one vehicle"""
+        if not all(vid in self._vehicle_index for vid in vehicles):
+            return []
+        key = tuple(self._vehicle_index[vid] for vid in vehicles)
+        return [self._view(sequence) for sequence in self._by_pair.get(key, ())]
+    
+    def close(self):
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+    
+    def clear(self):
+        """Drop retained entries and reset the counters; the spill file is closed, later spills append to it"""
+        self.close()
+        self.total = 0
+        self.counts.clear()
+        self._pair_counts.clear()
+        self.spilled = 0
+        self._first = self._next = 0
+        self._by_pair.clear()
+    
+    def __len__(self) -> int:
+        return self._next - self._first
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(self._first + k) for k in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("violation index out of range")
+        return self._view(self._first + index)
+    
+    def __iter__(self) -> Iterator[Dict]:
+        return (self._view(sequence) for sequence in range(self._first, self._next))
\ No newline at end of file
@@ -3,5 +3,10 @@ Formal verification components
 """
 
 from .proof_checker import FormalProofChecker
+from .reachability import ReachabilityEngine, ReachabilityResult, Paving
+from .proof_cache import ProofCache, proof_key
+from .parameter_search import ParameterSpaceCertifier, ParameterRegion
+from .falsification import Counterexample, Falsifier, simulate_scenarios
 
-__all__ = ['FormalProofChecker']
\ No newline at end of file
+__all__ = ['FormalProofChecker', 'ReachabilityEngine', 'ReachabilityResult', 'Paving', 'ProofCache', 'proof_key',
+           'ParameterSpaceCertifier', 'ParameterRegion', 'Counterexample', 'Falsifier', 'simulate_scenarios']
\ No newline at end of file
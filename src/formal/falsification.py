@@ -0,0 +1,231 @@
+"""
+Vectorized search for concrete collisions of the verified follower, with shrinking
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.verified_controller import SafetyParameters
+from ..core.safety_kernels import safe_distance, follower_command
+from ..simulation.environment import PlatooningSimulation
+
+@dataclass
+class Counterexample:
+    """A two-vehicle run of PlatooningSimulation.from_scenario that ends in a collision
+    
+    The follower starts at or beyond its own safe distance (gap = safe
+    distance + margin) and the predecessor's accelerations stay within
+    [-max_deceleration, max_acceleration]. After step collision_step the
+    predecessor's position is at or behind the follower's.
+    """
+    params: SafetyParameters
+    v_ego: float
+    v_pred: float
+    margin: float
+    leader_accelerations: np.ndarray
+    collision_step: int
+    dt: float = 0.1
+    
+    @property
+    def gap(self) -> float:
+        return float(safe_distance(self.v_ego, self.v_pred, self.params) + self.margin)
+    
+    @property
+    def collision_time(self) -> float:
+        return (self.collision_step + 1) * self.dt
+    
+    def simulation(self) -> PlatooningSimulation:
+        return PlatooningSimulation.from_scenario(self.gap, self.v_ego, self.v_pred, self.leader_accelerations,
+                                                  self.params, self.dt)
+    
+    def replay(self) -> PlatooningSimulation:
+        """The scenario's simulation, run up to and including the colliding step"""
+        sim = self.simulation()
+        for _ in range(self.collision_step + 1):
+            sim.step()
+        return sim
+    
+    def to_dict(self) -> Dict:
+        return {'params': asdict(self.params), 'gap': self.gap, 'v_ego': self.v_ego, 'v_pred': self.v_pred,
+                'margin': self.margin, 'leader_accelerations': self.leader_accelerations.tolist(),
+                'collision_step': self.collision_step, 'collision_time': self.collision_time, 'dt': self.dt}
+
+def simulate_scenarios(params: SafetyParameters, v_ego: np.ndarray, v_pred: np.ndarray, margin: np.ndarray,
+                       leader: np.ndarray, dt: float = 0.1) -> Tuple[np.ndarray, np.ndarray]:
+    """Run many PlatooningSimulation.from_scenario scenarios in lockstep
+    
+    Row i of leader holds scenario i's predecessor accelerations per step.
+    Each step evaluates the follower through follower_command, the follower
+    branch compute_verified_actions uses, and the simulation's integrator in
+    the same floating-point operations as the scalar run. Returns each
+    scenario's first colliding step (-1 for none) and its smallest gap.
+    """
+    v_ego = np.asarray(v_ego, dtype=float)
+    v_pred = np.asarray(v_pred, dtype=float)
+    lead_position = safe_distance(v_ego, v_pred, params) + margin
+    ego_position = np.zeros_like(lead_position)
+    collision = np.full(len(lead_position), -1)
+    min_gap = lead_position - ego_position
+    for step in range(leader.shape[1]):
+        gap = lead_position - ego_position
+        command, _ = follower_command(gap, safe_distance(v_ego, v_pred, params), v_ego, v_pred, params)
+        
+        v_pred = np.maximum(v_pred + leader[:, step] * dt, 0)
+        lead_position = lead_position + v_pred * dt
+        v_ego = np.maximum(v_ego + command * dt, 0)
+        ego_position = ego_position + v_ego * dt
+        
+        gap = lead_position - ego_position
+        collision[(gap <= 0) & (collision < 0)] = step
+        min_gap = np.minimum(min_gap, gap)
+    return collision, min_gap
+
+def _runs(profile: np.ndarray) -> List[Tuple[int, int]]:
+    """(start, end) of the runs of equal values in a profile"""
+    edges = np.flatnonzero(np.diff(profile)) + 1
+    bounds = np.concatenate([[0], edges, [len(profile)]])
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+class Falsifier:
+    """Find and shrink collisions of the verified follower behind an adversarial predecessor
+    
+    Scenarios are the exact-state runs PlatooningSimulation replays: the
+    follower starts at or beyond its safe distance, the predecessor brakes or
+    accelerates piecewise-constantly within its limits. Rounds of `candidates`
+    random scenarios (plus, in the first round, immediate full braking from a
+    grid of speeds) are simulated in one batch; the earliest collision found
+    is then shrunk, again in batches: the braking profile towards cruise-then-
+    full-braking with few changes and limit values, the speeds and the margin
+    towards round numbers, keeping each simplification only if it still
+    collides. Sensor error and message delay are not modelled, as the
+    simulation has neither; find_collision in parameter_search covers them.
+    """
+    
+    def __init__(self, params: SafetyParameters, max_velocity: float = 30.0, dt: float = 0.1,
+                 horizon: Optional[float] = None, candidates: int = 4096, segments: int = 4, rounds: int = 8,
+                 seed: int = 0):
+        self.params = params
+        self.max_velocity = max_velocity
+        self.dt = dt
+        self.horizon = horizon or 2 * max_velocity / params.max_deceleration + 2.0
+        self.steps = int(np.ceil(self.horizon / dt))
+        self.candidates = candidates
+        self.segments = segments
+        self.rounds = rounds
+        self.rng = np.random.default_rng(seed)
+        self.simulated = 0  # Scenarios simulated so far, search and shrinking
+    
+    def _collisions(self, v_ego, v_pred, margin, leader) -> np.ndarray:
+        count = len(leader)
+        collision, _ = simulate_scenarios(self.params, np.broadcast_to(v_ego, count), np.broadcast_to(v_pred, count),
+                                          np.broadcast_to(margin, count), leader, self.dt)
+        self.simulated += count
+        return collision
+    
+    def _random_scenarios(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        count, steps = self.candidates, self.steps
+        decel, accel = self.params.max_deceleration, self.params.max_acceleration
+        v_ego = self.rng.uniform(0.0, self.max_velocity, count)
+        v_pred = self.rng.uniform(0.0, self.max_velocity, count)
+        margin = np.where(self.rng.random(count) < 0.5, 0.0, self.rng.exponential(2.0, count))
+        
+        # Piecewise-constant predecessor: limit values or anything in between, per segment
+        starts = np.sort(self.rng.integers(0, steps, (count, self.segments)), axis=1)
+        starts[:, 0] = 0
+        values = np.where(self.rng.random((count, self.segments)) < 0.7,
+                          self.rng.choice([-decel, 0.0, accel], (count, self.segments)),
+                          self.rng.uniform(-decel, accel, (count, self.segments)))
+        segment = (np.arange(steps)[None, :, None] >= starts[:, None, :]).sum(axis=2) - 1
+        leader = np.take_along_axis(values, segment, axis=1)
+        return v_ego, v_pred, margin, leader
+    
+    def _braking_grid(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        speeds = np.linspace(0.0, self.max_velocity, 16)
+        v_ego, v_pred = (grid.ravel() for grid in np.meshgrid(speeds, speeds, indexing='ij'))
+        leader = np.full((len(v_ego), self.steps), -self.params.max_deceleration)
+        return v_ego, v_pred, np.zeros(len(v_ego)), leader
+    
+    def search(self) -> Optional[Counterexample]:
+        """First collision found, unshrunk, or None after every round came up empty"""
+        for round_index in range(self.rounds):
+            batches = [self._random_scenarios()]
+            if round_index == 0:
+                batches.insert(0, self._braking_grid())
+            for v_ego, v_pred, margin, leader in batches:
+                collision = self._collisions(v_ego, v_pred, margin, leader)
+                hits = np.flatnonzero(collision >= 0)
+                if len(hits):
+                    best = hits[np.argmin(collision[hits])]
+                    return Counterexample(self.params, float(v_ego[best]), float(v_pred[best]), float(margin[best]),
+                                          leader[best, :collision[best] + 1].copy(), int(collision[best]), self.dt)
+        return None
+    
+    def _first_colliding(self, example: Counterexample, variants: List[Tuple]) -> Optional[Counterexample]:
+        """The first of (v_ego, v_pred, margin, profile) variants of example that still collides"""
+        if not variants:
+            return None
+        steps = max(len(variant[3]) for variant in variants)
+        leader = np.zeros((len(variants), steps))
+        for row, variant in enumerate(variants):
+            leader[row, :len(variant[3])] = variant[3]
+        v_ego, v_pred, margin = (np.array([variant[k] for variant in variants], dtype=float) for k in range(3))
+        collision = self._collisions(v_ego, v_pred, margin, leader)
+        for row in np.flatnonzero(collision >= 0):
+            step = int(collision[row])
+            return Counterexample(example.params, float(v_ego[row]), float(v_pred[row]), float(margin[row]),
+                                  leader[row, :step + 1].copy(), step, example.dt)
+        return None
+    
+    def _profile_variants(self, example: Counterexample) -> List[np.ndarray]:
+        decel, accel = self.params.max_deceleration, self.params.max_acceleration
+        profile = example.leader_accelerations
+        steps = len(profile)
+        variants = []
+        # Cruise, then brake fully from some step on: the simplest shape first
+        for start in range(steps):
+            variants.append(np.concatenate([np.zeros(start), np.full(steps - start, -decel)]))
+        # Every value snapped to the nearest of -D, 0, A
+        limits = np.array([-decel, 0.0, accel])
+        variants.append(limits[np.argmin(np.abs(profile[:, None] - limits[None, :]), axis=1)])
+        # One run of the profile turned into cruising, or into its predecessor's value
+        runs = _runs(profile)
+        for index, (start, end) in enumerate(runs):
+            if profile[start] != 0.0:
+                variants.append(np.concatenate([profile[:start], np.zeros(end - start), profile[end:]]))
+            if index:
+                variants.append(np.concatenate([profile[:start], np.full(end - start, profile[start - 1]),
+                                                profile[end:]]))
+        return [variant for variant in variants if not np.array_equal(variant, profile)]
+    
+    @staticmethod
+    def _round_variants(value: float, floor: float = 0.0) -> List[float]:
+        candidates = [floor] + [np.round(value / unit) * unit for unit in (10.0, 5.0, 1.0, 0.5, 0.1)]
+        return [float(candidate) for candidate in candidates if candidate >= floor and candidate != value]
+    
+    def shrink(self, example: Counterexample, max_passes: int = 20) -> Counterexample:
+        """Simplify a counterexample while it still collides"""
+        for _ in range(max_passes):
+            simpler = None
+            for variants in (
+                lambda: [(example.v_ego, example.v_pred, example.margin, profile)
+                         for profile in self._profile_variants(example)],
+                lambda: [(v_ego, v_pred, example.margin, example.leader_accelerations)
+                         for v_ego in self._round_variants(example.v_ego) + [example.v_ego]
+                         for v_pred in self._round_variants(example.v_pred) + [example.v_pred]
+                         if (v_ego, v_pred) != (example.v_ego, example.v_pred)],
+                lambda: [(example.v_ego, example.v_pred, margin, example.leader_accelerations)
+                         for margin in self._round_variants(example.margin)],
+            ):
+                simpler = self._first_colliding(example, variants())
+                if simpler is not None:
+                    break
+            if simpler is None:
+                return example
+            example = simpler
+        return example
+    
+    def run(self) -> Optional[Counterexample]:
+        example = self.search()
+        return self.shrink(example) if example is not None else None
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+Branch-and-bound certification of the SafetyParameters space
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.verified_controller import FormalPlatooningController, SafetyParameters
+from .reachability import ReachabilityEngine, _travel
+
+# Parameters spanned by the search, with default ranges
+SEARCH_FIELDS = ('max_deceleration', 'reaction_time', 'min_safe_distance', 'communication_delay')
+DEFAULT_RANGES = {
+    'max_deceleration': (2.0, 8.0),
+    'reaction_time': (0.0, 0.5),
+    'min_safe_distance': (0.5, 5.0),
+    'communication_delay': (0.0, 0.3),
+}
+
+# Statuses of a region: proven for the whole box, collision witnessed, or undecided at the depth limit
+SAFE, UNSAFE, UNKNOWN = 'safe', 'unsafe', 'unknown'
+
+@dataclass
+class ParameterRegion:
+    """A box of the parameter space and what is known about it"""
+    low: Dict[str, float]
+    high: Dict[str, float]
+    status: str
+    depth: int
+    witness: Optional[Dict] = None
+    
+    def volume(self) -> float:
+        return float(np.prod([self.high[name] - self.low[name] for name in self.low]))
+
+def find_collision(params: SafetyParameters, control_period: float = 0.1,
+                   max_velocity: float = 30.0) -> Optional[Dict]:
+    """Search for a concrete collision of the real follower controller
+    
+    Adversarial runs: the pair starts exactly at the safe distance and the
+    predecessor brakes at max_deceleration, while the follower reads its state
+    communication_delay old and sensor_error_bound optimistic. Returns the
+    first collision found as a dict, or None.
+    """
+    dt = control_period
+    delay, error, decel = params.communication_delay, params.sensor_error_bound, params.max_deceleration
+    steps = int(np.ceil(max_velocity / decel / dt)) + 50
+    for v_pred in np.linspace(max_velocity / 6, max_velocity, 6):
+        def lead(t: float) -> Tuple[float, float]:
+            # Cruising before t = 0, braking at max_deceleration from then on
+            if t < 0:
+                return v_pred * t, v_pred
+            return float(_travel(v_pred, -decel, t)), max(v_pred - decel * t, 0.0)
+        
+        for closing_speed in (0.0, 2.0, 5.0):
+            v_ego = min(v_pred + closing_speed, max_velocity)
+            controller = FormalPlatooningController("vehicle_1")
+            controller.safety_params = params
+            start_gap = controller._calculate_safe_distance(v_ego, v_pred)
+            ego_position = -start_gap
+            
+            for step in range(steps):
+                now = step * dt
+                seen_position, seen_velocity = lead(now - delay)
+                states = {
+                    'vehicle_0': {'position': seen_position + error, 'velocity': seen_velocity + error,
+                                  'timestamp': now},
+                    'vehicle_1': {'position': ego_position, 'velocity': v_ego, 'timestamp': now}
+                }
+                controller.update_state(ego_position, v_ego, 0.0)
+                accel = controller.compute_verified_action(states, now).acceleration
+                
+                ego_position += float(_travel(v_ego, accel, dt))
+                v_ego = min(max(v_ego + accel * dt, 0.0), max_velocity)
+                lead_position, lead_velocity = lead(now + dt)
+                if lead_position - ego_position <= 0:
+                    return {'v_pred': float(v_pred), 'v_ego': float(min(v_pred + closing_speed, max_velocity)),
+                            'time': now + dt, 'gap': float(lead_position - ego_position)}
+                if v_ego == 0.0 and lead_velocity == 0.0:
+                    break
+    return None
+
+def classify_box(low: Dict[str, float], high: Dict[str, float], base: SafetyParameters,
+                 engine: ReachabilityEngine) -> Tuple[str, Optional[Dict]]:
+    """SAFE when the whole box is proven, UNSAFE with a witness, or UNKNOWN
+    
+    A box is refuted when both max_deceleration ends of its most cautious corner
+    (longest reaction time and margin, shortest delay) collide; such boxes are
+    not refined further, so refuted boxes are only known to contain unsafe
+    parameter sets. SAFE is a proof for every parameter set in the box.
+    """
+    cautious = dict(low, reaction_time=high['reaction_time'], min_safe_distance=high['min_safe_distance'])
+    witnesses = [find_collision(replace(base, **dict(cautious, max_deceleration=decel)),
+                                engine.control_period, engine.max_velocity)
+                 for decel in (low['max_deceleration'], high['max_deceleration'])]
+    if all(witnesses):
+        return UNSAFE, witnesses[0]
+    
+    if engine.verify_box(replace(base, **low), replace(base, **high)).verified:
+        return SAFE, None
+    return UNKNOWN, None
+
+def _classify(task) -> Tuple[str, Optional[Dict]]:
+    return classify_box(*task)
+
+class ParameterSpaceCertifier:
+    """Map the provably safe part of a SafetyParameters box
+    
+    Boxes are classified in a process pool, one round per subdivision level.
+    Proven and refuted boxes are final; only undecided boxes are bisected
+    (across their widest side relative to the starting box), so the work
+    concentrates along the safety boundary. Boxes still undecided after
+    max_depth bisections are reported as UNKNOWN.
+    """
+    
+    def __init__(self, ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+                 base: Optional[SafetyParameters] = None, engine: Optional[ReachabilityEngine] = None,
+                 workers: int = 1, max_depth: int = 8):
+        self.ranges = dict(DEFAULT_RANGES, **(ranges or {}))
+        unknown = set(self.ranges) - set(SEARCH_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown search parameters: {sorted(unknown)}")
+        self.base = base or SafetyParameters()
+        self.engine = engine or ReachabilityEngine(max_cells=100_000)
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+    
+    def _bisect(self, low: Dict[str, float], high: Dict[str, float]):
+        name = max(SEARCH_FIELDS, key=lambda field: (high[field] - low[field]) /
+                   ((self.ranges[field][1] - self.ranges[field][0]) or 1.0))
+        middle = (low[name] + high[name]) / 2
+        return [(low, dict(high, **{name: middle})), (dict(low, **{name: middle}), high)]
+    
+    def iter_regions(self) -> Iterator[ParameterRegion]:
+        """Final regions, streamed level by level"""
+        pending = [({name: self.ranges[name][0] for name in SEARCH_FIELDS},
+                    {name: self.ranges[name][1] for name in SEARCH_FIELDS})]
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            for depth in range(self.max_depth + 1):
+                tasks = [(low, high, self.base, self.engine) for low, high in pending]
+                outcomes = executor.map(_classify, tasks) if executor else map(_classify, tasks)
+                
+                undecided = []
+                for (low, high), (status, witness) in zip(pending, outcomes):
+                    if status == UNKNOWN and depth < self.max_depth:
+                        undecided.extend(self._bisect(low, high))
+                    else:
+                        yield ParameterRegion(low, high, status, depth, witness)
+                pending = undecided
+                if not pending:
+                    break
+        finally:
+            if executor:
+                executor.shutdown()
+    
+    def run(self) -> List[ParameterRegion]:
+        return list(self.iter_regions())
+    
+    @staticmethod
+    def summarize(regions: List[ParameterRegion]) -> Dict:
+        """Volume fraction of each status and the number of boxes classified"""
+        total = sum(region.volume() for region in regions) or 1.0
+        return {
+            'regions': len(regions),
+            **{f'{status}_fraction': sum(region.volume() for region in regions if region.status == status) / total
+               for status in (SAFE, UNSAFE, UNKNOWN)}
+        }
\ No newline at end of file
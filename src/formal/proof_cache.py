@@ -0,0 +1,156 @@
+"""
+Content-addressed on-disk cache of collision-freedom proofs
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Dict, Optional
+
+import numpy as np
+
+from ..core.verified_controller import SafetyParameters
+from ..core.safety_kernels import GAP_GAIN, VELOCITY_GAIN
+from .reachability import ReachabilityEngine, ReachabilityResult, ENGINE_VERSION
+
+def _canonical(payload: Dict) -> bytes:
+    return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+
+def proof_key(params: SafetyParameters, engine: ReachabilityEngine) -> str:
+    """Hash of everything a proof depends on: parameters, control gains, engine settings and version"""
+    return hashlib.sha256(_canonical({
+        'params': {name: float(value) for name, value in asdict(params).items()},
+        'gains': [float(GAP_GAIN), float(VELOCITY_GAIN)],
+        'engine': engine.settings(),
+        'version': ENGINE_VERSION,
+    })).hexdigest()
+
+def _encode(result: ReachabilityResult) -> Dict:
+    encoded = asdict(result)
+    if result.counterexample is not None:
+        encoded['counterexample'] = [corner.tolist() for corner in result.counterexample]
+    return encoded
+
+def _decode(encoded: Dict) -> ReachabilityResult:
+    counterexample = encoded.pop('counterexample')
+    if counterexample is not None:
+        counterexample = tuple(np.array(corner) for corner in counterexample)
+    return ReachabilityResult(counterexample=counterexample, **encoded)
+
+class ProofCache:
+    """Proof results on disk, one JSON file per key, with an in-process front
+    
+    Every file records its key and a checksum of its result; files that fail
+    either check (truncated writes, edits, collisions) are deleted and count
+    as misses. Writes go through a temporary file and an atomic rename, so
+    concurrent processes sharing a directory never see partial entries. At most
+    max_entries proofs are kept, evicting the least recently used by file
+    modification time, which hits refresh.
+    """
+    
+    def __init__(self, directory: str, max_entries: int = 256):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: 'OrderedDict[str, ReachabilityResult]' = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.json')
+    
+    def get(self, key: str) -> Optional[ReachabilityResult]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self._touch(self._path(key))  # Keep the file recent for other processes' pruning too
+            self.hits += 1
+            return self._memory[key]
+        
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as handle:
+                entry = json.loads(handle.read())
+            intact = (entry['key'] == key and
+                      entry['checksum'] == hashlib.sha256(_canonical(entry['result'])).hexdigest())
+            result = _decode(entry['result']) if intact else None
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (ValueError, KeyError, TypeError):
+            result = None
+        
+        if result is None:
+            self._discard(path)
+            self.misses += 1
+            return None
+        
+        self._touch(path)
+        self._remember(key, result)
+        self.hits += 1
+        return result
+    
+    @staticmethod
+    def _touch(path: str):
+        """Mark an entry as recently used, for pruning by modification time"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+    
+    def put(self, key: str, result: ReachabilityResult):
+        encoded = _encode(result)
+        entry = {'key': key, 'checksum': hashlib.sha256(_canonical(encoded)).hexdigest(), 'result': encoded}
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as handle:
+                handle.write(_canonical(entry))
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            self._discard(temporary)
+            raise
+        self._remember(key, result)
+        self._evict()
+    
+    def _remember(self, key: str, result: ReachabilityResult):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def _entries(self):
+        """(modification time, path) of every stored proof, oldest first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.stat(path).st_mtime_ns, path))
+                except FileNotFoundError:
+                    pass
+        return sorted(entries)
+    
+    def _evict(self):
+        entries = self._entries()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            self._discard(path)
+    
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    def clear(self):
+        for _, path in self._entries():
+            self._discard(path)
+        self._memory.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries())
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or os.path.exists(self._path(key))
\ No newline at end of file
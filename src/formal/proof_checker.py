@@ -2,23 +2,159 @@
 Formal Proof Checker for Safety Verification
 """
 
-from typing import Dict  # ADDED MISSING IMPORT
+from dataclasses import dataclass, fields, replace
+from typing import Dict, Optional, Set, Union
+
+from ..core.verified_controller import SafetyParameters
+from .reachability import ReachabilityEngine, ReachabilityResult, Paving, FLOOR_FRACTIONS
+from .proof_cache import ProofCache, proof_key
+from .falsification import Counterexample, Falsifier
+
+# What the collision-freedom obligation at each floor reads from SafetyParameters.
+# These fields fix the invariant and the bisection tree paving its range:
+PAVING_FIELDS = ('min_safe_distance', 'max_deceleration', 'max_acceleration')
+# These only enter the one-step image of the boxes the invariant touches, each
+# monotonically: +1 when a larger value can only make every box easier to prove
+# (a longer reaction time makes the follower brake earlier), -1 when it can
+# only make boxes harder (older or noisier predecessor readings)
+LOOP_FIELDS = {'reaction_time': 1, 'communication_delay': -1, 'sensor_error_bound': -1}
+
+@dataclass
+class _Obligation:
+    """The last discharge of the collision-freedom obligation at one floor fraction"""
+    params: SafetyParameters
+    result: ReachabilityResult
+    paving: Paving
+    scratch_cells: int  # Boxes checked by the last proof of this floor from the initial grid
+
+def changed_fields(old: SafetyParameters, new: SafetyParameters) -> Set[str]:
+    return {field.name for field in fields(SafetyParameters) if getattr(old, field.name) != getattr(new, field.name)}
+
+def _as_parameters(controller_params: Union[Dict, SafetyParameters]) -> Optional[SafetyParameters]:
+    """SafetyParameters from a dict of its fields, None when it lacks the braking model parameters"""
+    if not isinstance(controller_params, dict):
+        return controller_params
+    required_params = ['max_deceleration', 'reaction_time', 'min_safe_distance']
+    if not all(param in controller_params for param in required_params):
+        return None
+    names = {field.name for field in fields(SafetyParameters)}
+    return SafetyParameters(**{name: value for name, value in controller_params.items() if name in names})
 
 class FormalProofChecker:
-    """Check formal proofs of safety properties"""
+    """Check formal proofs of safety properties
     
-    def __init__(self):
+    Incremental checkers keep, per invariant floor, the parameters, outcome and
+    final paving of the last proof, and re-discharge after a change only what
+    the changed fields reach:
+    
+    - paving fields changed: the floor is proven from scratch;
+    - loop fields only, all in their safe direction after a proof (or all in
+      their unsafe direction after a failure): the outcome carries over
+      unchanged, as every box check is monotone in these fields;
+    - otherwise, after a proof, the boxes that touch the invariant are
+      re-checked from the old paving, bisecting only those that now fail;
+      boxes outside the invariant depend on paving fields alone and are kept.
+      If that fails, or the old paving has grown finer than a fresh start, the
+      floor is proven from scratch, so a re-discharge is never weaker than a
+      fresh proof.
+    """
+    
+    def __init__(self, engine: Optional[ReachabilityEngine] = None, cache: Optional[ProofCache] = None,
+                 incremental: bool = True):
         self.verified_properties = []
+        self.engine = engine or ReachabilityEngine()
+        self.cache = cache  # Proofs are recomputed on every call without one
+        self.incremental = incremental
+        self.last_result: Optional[ReachabilityResult] = None
+        self.last_counterexample: Optional[Counterexample] = None
+        self._obligations: Dict[int, _Obligation] = {}  # Floor fraction -> last discharge
+        self.reused = 0      # Floor obligations carried over without checking a box
+        self.rechecked = 0   # Floor obligations re-discharged from an earlier paving
+        self.from_scratch = 0
     
-    def verify_collision_freedom(self, controller_params: Dict) -> bool:
-        """Verify collision freedom property"""
-        # Simplified formal verification
-        required_params = ['max_deceleration', 'reaction_time', 'min_safe_distance']
+    def verify_collision_freedom(self, controller_params: Union[Dict, SafetyParameters]) -> bool:
+        """Verify collision freedom property
         
-        if all(param in controller_params for param in required_params):
+        Accepts SafetyParameters or a dict of its fields (unspecified fields take
+        their defaults); a dict must name at least the braking model parameters.
+        The proof itself is ReachabilityEngine.verify, kept in last_result and
+        looked up in / stored to the proof cache when there is one.
+        """
+        controller_params = _as_parameters(controller_params)
+        if controller_params is None:
+            return False
+        
+        key = proof_key(controller_params, self.engine) if self.cache is not None else None
+        self.last_result = self.cache.get(key) if key is not None else None
+        if self.last_result is None:
+            self.last_result = (self._verify_incremental(controller_params) if self.incremental
+                                else self.engine.verify(controller_params))
+            if key is not None and not self.last_result.reused:
+                self.cache.put(key, self.last_result)  # Reused verdicts carry another proof's details
+        if self.last_result.verified:
             self.verified_properties.append('collision_freedom')
-            return True
-        return False
+        return self.last_result.verified
+    
+    def find_counterexample(self, controller_params: Union[Dict, SafetyParameters],
+                            **options) -> Optional[Counterexample]:
+        """Search for a concrete collision of the follower and shrink it
+        
+        Runs a Falsifier over the engine's control period and speed range; other
+        Falsifier options (candidates, rounds, seed, ...) pass through. The
+        result, also kept in last_counterexample, replays in
+        PlatooningSimulation. None only means the search came up empty.
+        
+        communication_delay and sensor_error_bound are ignored: the scenarios
+        feed the follower exact, current predecessor states, as the simulation
+        does. A search that comes up empty says nothing about delayed or noisy
+        measurements; parameter_search.find_collision models both.
+        """
+        params = _as_parameters(controller_params)
+        if params is None:
+            raise ValueError("controller_params must name at least max_deceleration, reaction_time "
+                             "and min_safe_distance")
+        falsifier = Falsifier(params, max_velocity=self.engine.max_velocity, dt=self.engine.control_period,
+                              **options)
+        self.last_counterexample = falsifier.run()
+        return self.last_counterexample
+    
+    def _verify_incremental(self, params: SafetyParameters) -> ReachabilityResult:
+        """engine.verify, re-discharging each floor from its last proof"""
+        result = None
+        for fraction in FLOOR_FRACTIONS:
+            result = self._discharge(params, fraction)
+            if result.verified:
+                break
+        return result
+    
+    def _discharge(self, params: SafetyParameters, fraction: int) -> ReachabilityResult:
+        floor = params.min_safe_distance / fraction
+        previous = self._obligations.get(fraction)
+        changed = changed_fields(previous.params, params) if previous is not None else None
+        
+        if changed is not None and not changed & set(PAVING_FIELDS):
+            if not changed:
+                return previous.result
+            safer = {(getattr(params, name) > getattr(previous.params, name)) == (LOOP_FIELDS[name] > 0)
+                     for name in changed}
+            if safer == {previous.result.verified}:
+                self.reused += 1
+                previous.params = params
+                return replace(previous.result, reused=True)
+            
+            relevant = previous.paving.relevant
+            if previous.result.verified and relevant.sum() < previous.scratch_cells:
+                result, paving = self.engine.discharge(previous.paving.select(relevant), params, params, floor)
+                if result.verified:
+                    self.rechecked += 1
+                    self._obligations[fraction] = _Obligation(
+                        params, result, Paving.join(previous.paving.select(~relevant), paving), previous.scratch_cells)
+                    return result
+        
+        self.from_scratch += 1
+        result, paving = self.engine.discharge(self.engine.initial_paving(floor, params, params), params, params, floor)
+        self._obligations[fraction] = _Obligation(params, result, paving, result.cells)
+        return result
     
     def verify_velocity_bounds(self, max_velocity: float) -> bool:
         """Verify velocity bounds property"""
@@ -0,0 +1,306 @@
+"""
+Interval-arithmetic reachability for the verified follower control loop
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from ..core.verified_controller import SafetyParameters
+from ..core.safety_kernels import GAP_GAIN, VELOCITY_GAIN
+
+# Bump whenever a change to the engine can change a proof's outcome; cached proofs key on it
+ENGINE_VERSION = 1
+
+# Relative widening of computed bounds that absorbs floating-point rounding
+ROUNDING = 1e-12
+
+@dataclass
+class ReachabilityResult:
+    """Outcome of one collision-freedom proof attempt
+    
+    When verified, every state with phi >= invariant_floor and gap >= gap_floor
+    (which includes every state at or above the controller's safe distance) only
+    reaches such states, so the gap never drops below gap_floor. Otherwise
+    counterexample is the (lo, hi) corners of a cell that could not be proven.
+    reused marks a verdict carried over from a proof for other parameters
+    (FormalProofChecker's monotone reuse); depth, cells and counterexample then
+    describe that proof.
+    """
+    verified: bool
+    invariant_floor: float
+    gap_floor: float
+    depth: int
+    cells: int
+    counterexample: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    reused: bool = False
+
+# Invariant floors tried by verify_box, as fractions of min_safe_distance, largest floor first
+FLOOR_FRACTIONS = (2, 4, 8)
+
+@dataclass
+class Paving:
+    """Boxes of the (gap, v_ego, v_pred) state space, all from one bisection tree
+    
+    depth is each box's number of bisections from the initial grid. After a
+    proof, relevant marks the boxes that intersect the invariant; the others
+    impose nothing whatever the control loop does.
+    """
+    lo: np.ndarray
+    hi: np.ndarray
+    depth: np.ndarray
+    relevant: Optional[np.ndarray] = None
+    
+    def __len__(self) -> int:
+        return len(self.lo)
+    
+    def select(self, mask: np.ndarray) -> 'Paving':
+        return Paving(self.lo[mask], self.hi[mask], self.depth[mask],
+                      None if self.relevant is None else self.relevant[mask])
+    
+    @staticmethod
+    def join(*pavings: 'Paving') -> 'Paving':
+        return Paving(np.concatenate([paving.lo for paving in pavings]),
+                      np.concatenate([paving.hi for paving in pavings]),
+                      np.concatenate([paving.depth for paving in pavings]),
+                      np.concatenate([paving.relevant for paving in pavings]))
+
+def _travel(v: np.ndarray, a: np.ndarray, dt: float) -> np.ndarray:
+    """Distance covered in dt from velocity v at constant acceleration a, stopping at zero velocity"""
+    stops = v + a * dt < 0
+    braking = np.where(stops, -2 * a, 1.0)
+    return np.where(stops, v * v / braking, v * dt + a * dt * dt / 2)
+
+def _braking_energy(v: np.ndarray, a: np.ndarray, dt: float, max_decel: float) -> np.ndarray:
+    """Decrease of the full-braking final gap caused by one vehicle over dt
+    
+    travel + (v'^2 - v^2) / 2D, factored so that a == -D gives exactly zero:
+    a vehicle braking at the maximum rate never eats into its stopping margin.
+    Non-negative and non-decreasing in v and a for a in [-D, inf).
+    """
+    factor = 1 + a / max_decel
+    stops = v + a * dt < 0
+    braking = np.where(stops, -2 * a, 1.0)
+    return np.where(stops, factor * v * v / braking, factor * dt * (v + a * dt / 2))
+
+def _over_decel(x: np.ndarray, low: float, high: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Range of x / 2D for D in [low, high]"""
+    smallest = np.where(x >= 0, x / (2 * high), x / (2 * low))
+    largest = np.where(x >= 0, x / (2 * low), x / (2 * high))
+    return smallest, largest
+
+def _down(x: np.ndarray) -> np.ndarray:
+    return x - np.abs(x) * ROUNDING
+
+def _up(x: np.ndarray) -> np.ndarray:
+    return x + np.abs(x) * ROUNDING
+
+class ReachabilityEngine:
+    """Decide collision freedom of the follower loop by interval reachability
+    
+    The closed loop is the follower's compute_verified_action (control law,
+    bounds and safe-distance emergency branch) held for one control period,
+    against a predecessor with any acceleration in [-max_deceleration,
+    max_acceleration]. The follower reads the predecessor's state up to
+    communication_delay old and off by up to sensor_error_bound (in position and
+    velocity); stale messages beyond that trip the controller's own assumption
+    check and are outside the proof.
+    
+    The candidate invariant is {phi >= c, gap >= c / 2}, phi being the gap left
+    if both vehicles braked at max_deceleration from now on. The state space
+    (gap, v_ego, v_pred), velocities within [0, max_velocity], is paved with
+    boxes; one step of the loop is evaluated with interval arithmetic on all
+    boxes at once, and boxes whose image cannot be shown to stay inside the
+    invariant are bisected, up to max_depth rounds or max_cells boxes per round.
+    
+    verify_box proves the invariant for every parameter set between two corners
+    at once, taking the conservative end of each parameter in each bound; the
+    predecessor's and the follower's max_deceleration stay one and the same.
+    """
+    
+    def __init__(self, control_period: float = 0.1, max_velocity: float = 30.0, max_depth: int = 24,
+                 max_cells: int = 200_000, initial_splits: int = 8):
+        self.control_period = control_period
+        self.max_velocity = max_velocity
+        self.max_depth = max_depth
+        self.max_cells = max_cells
+        self.initial_splits = initial_splits
+    
+    def settings(self) -> Dict:
+        """Configuration a proof outcome depends on"""
+        return {'control_period': float(self.control_period), 'max_velocity': float(self.max_velocity),
+                'max_depth': self.max_depth, 'max_cells': self.max_cells, 'initial_splits': self.initial_splits}
+    
+    def successors(self, lo: np.ndarray, hi: np.ndarray, params: SafetyParameters,
+                   upper: Optional[SafetyParameters] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Boxes containing every state reachable in one control period from the boxes lo..hi
+        
+        Rows of lo and hi are (gap, v_ego, v_pred) corners. With upper given, the
+        parameters range over params..upper.
+        """
+        step = self._step(np.atleast_2d(lo), np.atleast_2d(hi), params, upper or params)
+        return step['next_lo'], step['next_hi']
+    
+    def _step(self, lo: np.ndarray, hi: np.ndarray, low: SafetyParameters,
+              high: SafetyParameters) -> Dict[str, np.ndarray]:
+        dt = self.control_period
+        v_max = self.max_velocity
+        decel_lo, decel_hi = low.max_deceleration, high.max_deceleration
+        accel_lo, accel_hi = low.max_acceleration, high.max_acceleration
+        delay, error = high.communication_delay, high.sensor_error_bound
+        gap_lo, ve_lo, vp_lo = lo.T
+        gap_hi, ve_hi, vp_hi = hi.T
+        
+        # What the follower sees: a predecessor position up to one delay old, and a
+        # velocity from up to one delay ago, both with sensor error
+        lag = np.minimum(vp_hi + decel_hi * delay, v_max) * delay
+        seen_gap_lo = gap_lo - lag - error
+        seen_gap_hi = gap_hi + error
+        seen_vp_lo = np.maximum(vp_lo - accel_hi * delay, 0) - error
+        seen_vp_hi = np.minimum(vp_hi + decel_hi * delay, v_max) + error
+        seen_vp_sq_lo = np.where(seen_vp_lo > 0, seen_vp_lo * seen_vp_lo, 0.0)
+        seen_vp_sq_hi = np.maximum(seen_vp_lo * seen_vp_lo, seen_vp_hi * seen_vp_hi)
+        
+        # Safe distance as computed by the controller, monotone in each argument
+        safe_lo = (ve_lo * low.reaction_time + _over_decel(np.maximum(0, ve_lo * ve_lo - seen_vp_sq_hi),
+                                                           decel_lo, decel_hi)[0] + low.min_safe_distance)
+        safe_hi = (ve_hi * high.reaction_time + _over_decel(np.maximum(0, ve_hi * ve_hi - seen_vp_sq_lo),
+                                                            decel_lo, decel_hi)[1] + high.min_safe_distance)
+        margin_lo = seen_gap_lo - safe_hi
+        margin_hi = seen_gap_hi - safe_lo
+        
+        # Emergency branch brakes at -D; the normal branch only applies where margin >= 0
+        emergency = margin_lo < 0
+        normal = margin_hi >= 0
+        with np.errstate(invalid='ignore'):
+            law_lo = GAP_GAIN * np.maximum(margin_lo, 0) + VELOCITY_GAIN * (seen_vp_lo - ve_hi)
+            law_hi = GAP_GAIN * margin_hi + VELOCITY_GAIN * (seen_vp_hi - ve_lo)
+        law_lo = np.clip(law_lo, -decel_hi, accel_lo)
+        law_hi = np.clip(law_hi, -decel_lo, accel_hi)
+        a_lo = np.where(emergency, -decel_hi, law_lo)
+        a_hi = np.where(normal, law_hi, -decel_lo)
+        
+        # Worst case for the gap: predecessor braking fully, follower at its highest command.
+        # When both brake at the same D the closing distance changes with D at a rate of at
+        # most dt^2 / 2, which bounds it over the whole range from its value at decel_lo
+        lead_lo = _down(_travel(vp_lo, np.full_like(vp_lo, -decel_hi), dt))
+        braking = (_up(_travel(ve_hi, np.full_like(ve_hi, -decel_lo), dt))
+                   - _down(_travel(vp_lo, np.full_like(vp_lo, -decel_lo), dt)) + (decel_hi - decel_lo) * dt * dt / 2)
+        following = _up(_travel(ve_hi, a_hi, dt)) - lead_lo
+        closing = np.where(normal, np.maximum(following, braking), braking)
+        next_lo = np.stack([gap_lo - closing,
+                            np.clip(ve_lo + a_lo * dt, 0, v_max),
+                            np.maximum(vp_lo - decel_hi * dt, 0)], axis=1)
+        opening = (np.minimum(_travel(vp_hi, np.full_like(vp_hi, accel_hi), dt), v_max * dt)
+                   - _travel(ve_lo, a_lo, dt))
+        next_hi = np.stack([gap_hi + opening,
+                            np.clip(ve_hi + a_hi * dt, 0, v_max),
+                            np.minimum(vp_hi + accel_hi * dt, v_max)], axis=1)
+        
+        # Loss of phi: the predecessor's term is >= 0 for any a >= -D, the follower's is
+        # exactly zero when it brakes at -D and otherwise largest at an end of the D range
+        loss = np.maximum(_braking_energy(ve_hi, a_hi, dt, decel_lo), _braking_energy(ve_hi, a_hi, dt, decel_hi))
+        return {
+            'next_lo': next_lo,
+            'next_hi': next_hi,
+            'closing': closing,
+            'phi_loss': np.where(normal, loss, 0.0),
+        }
+    
+    def _initial_cells(self, floor: float, low: SafetyParameters,
+                       high: SafetyParameters) -> Tuple[np.ndarray, np.ndarray]:
+        """Grid over the invariant's range, plus an unbounded slab of gaps beyond any one-step effect"""
+        dt, v_max = self.control_period, self.max_velocity
+        decel, accel = low.max_deceleration, high.max_acceleration
+        far = floor + v_max * v_max / (2 * decel) + (1 + accel / decel) * dt * (v_max + accel * dt) + v_max * dt + 1.0
+        
+        splits = self.initial_splits
+        gaps = np.append(np.linspace(floor / 2, far, splits + 1), np.inf)
+        velocities = np.linspace(0.0, v_max, splits + 1)
+        g, e, p = np.meshgrid(np.arange(splits + 1), np.arange(splits), np.arange(splits), indexing='ij')
+        g, e, p = g.ravel(), e.ravel(), p.ravel()
+        lo = np.stack([gaps[g], velocities[e], velocities[p]], axis=1)
+        hi = np.stack([gaps[g + 1], velocities[e + 1], velocities[p + 1]], axis=1)
+        return lo, hi
+    
+    def verify(self, params: SafetyParameters, floor: Optional[float] = None) -> ReachabilityResult:
+        """Prove the invariant for floor c (default: the largest min_safe_distance / FLOOR_FRACTIONS that holds)"""
+        return self.verify_box(params, params, floor)
+    
+    def verify_box(self, low: SafetyParameters, high: SafetyParameters,
+                   floor: Optional[float] = None) -> ReachabilityResult:
+        """verify for every parameter set with fields between those of low and high"""
+        if floor is None:
+            result = None
+            for fraction in FLOOR_FRACTIONS:
+                result = self.verify_box(low, high, low.min_safe_distance / fraction)
+                if result.verified:
+                    break
+            return result
+        
+        return self.discharge(self.initial_paving(floor, low, high), low, high, floor)[0]
+    
+    def initial_paving(self, floor: float, low: SafetyParameters, high: SafetyParameters) -> Paving:
+        lo, hi = self._initial_cells(floor, low, high)
+        return Paving(lo, hi, np.zeros(len(lo), dtype=int))
+    
+    def discharge(self, paving: Paving, low: SafetyParameters, high: SafetyParameters,
+                  floor: float) -> Tuple[ReachabilityResult, Paving]:
+        """Prove the invariant for floor on the boxes of paving, bisecting those that fail
+        
+        verify_box starts from the initial grid. Any paving that covers the
+        invariant's range with boxes of the same bisection tree (the tree only
+        depends on floor, max_deceleration and max_acceleration), such as the
+        paving an earlier proof ended on, is an equally valid start. Also returns
+        the paving this proof ended on: every box proven or found irrelevant,
+        plus the boxes left unproven when it failed.
+        """
+        decel_lo, decel_hi = low.max_deceleration, high.max_deceleration
+        first_lo, first_hi = self._initial_cells(floor, low, high)
+        scale = first_hi[0] - first_lo[0]
+        lo, hi, depth = paving.lo, paving.hi, paving.depth
+        settled = []
+        cells = 0
+        while True:
+            cells += len(lo)
+            step = self._step(lo, hi, low, high)
+            gap_lo, ve_lo, vp_lo = lo.T
+            gap_hi, ve_hi, vp_hi = hi.T
+            
+            # Boxes that miss the invariant impose nothing; for the rest only their
+            # states inside the invariant need to map back into it
+            stop_lo = _over_decel(ve_lo * ve_lo - vp_hi * vp_hi, decel_lo, decel_hi)[0]
+            stop_hi = _over_decel(ve_hi * ve_hi - vp_lo * vp_lo, decel_lo, decel_hi)[1]
+            relevant = (gap_hi >= floor / 2) & (gap_hi - stop_lo >= floor)
+            phi_lo = np.maximum(_down(gap_lo - stop_hi), floor)
+            start_gap = np.maximum(np.maximum(gap_lo, floor / 2), _down(floor + stop_lo))
+            
+            loss = step['phi_loss']
+            next_phi = phi_lo - loss - np.where(loss > 0, ROUNDING * (np.abs(phi_lo) + loss), 0.0)
+            next_gap = _down(start_gap - step['closing'])
+            unproven = relevant & ~((next_gap >= floor / 2) & (next_phi >= floor))
+            settled.append(Paving(lo[~unproven], hi[~unproven], depth[~unproven], relevant[~unproven]))
+            
+            if not unproven.any():
+                return ReachabilityResult(True, floor, floor / 2, int(depth.max()), cells), Paving.join(*settled)
+            lo, hi, depth = lo[unproven], hi[unproven], depth[unproven]
+            if depth.max() >= self.max_depth or 2 * len(lo) > self.max_cells:
+                settled.append(Paving(lo, hi, depth, np.ones(len(lo), dtype=bool)))
+                return (ReachabilityResult(False, floor, floor / 2, int(depth.max()), cells,
+                                           (lo[0].copy(), hi[0].copy())), Paving.join(*settled))
+            lo, hi = self._bisect(lo, hi, scale)
+            depth = np.concatenate([depth, depth]) + 1
+    
+    @staticmethod
+    def _bisect(lo: np.ndarray, hi: np.ndarray, scale: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Split every box across its widest finite dimension, relative to the initial grid"""
+        width = (hi - lo) / scale
+        width[~np.isfinite(width)] = -1.0
+        rows = np.arange(len(lo))
+        axis = np.argmax(width, axis=1)
+        middle = (lo[rows, axis] + hi[rows, axis]) / 2
+        upper_lo = lo.copy()
+        upper_lo[rows, axis] = middle
+        lower_hi = hi.copy()
+        lower_hi[rows, axis] = middle
+        return np.concatenate([lo, upper_lo]), np.concatenate([lower_hi, hi])
\ No newline at end of file
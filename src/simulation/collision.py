@@ -0,0 +1,56 @@
+"""
+Sweep-and-prune collision detection for vehicle bounding boxes
+"""
+
+import numpy as np
+
+COLLISION_MARGIN = 0.3
+
+def find_overlapping_pairs(x: np.ndarray, y: np.ndarray, length: np.ndarray, width: np.ndarray,
+                           margin: float = COLLISION_MARGIN) -> np.ndarray:
+    """Index pairs (i < j) whose margin-expanded boxes overlap, sorted lexicographically
+    
+    Broad phase: sort boxes by their expanded x extent and sweep; narrow phase:
+    the exact per-pair overlap test, vectorized over the surviving candidates.
+    """
+    x_min, x_max = x - length / 2, x + length / 2
+    y_min, y_max = y - width / 2, y + width / 2
+    lower, upper = x_min - margin, x_max + margin
+    
+    # Broad phase: after sorting on the lower x edge, box p can only overlap the
+    # boxes that follow it up to the first one starting at or beyond its upper edge
+    order = np.argsort(lower, kind='stable')
+    sorted_lower = lower[order]
+    ends = np.searchsorted(sorted_lower, upper[order], side='left')
+    starts = np.arange(1, len(order) + 1)
+    counts = np.maximum(ends - starts, 0)
+    
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty((0, 2), dtype=np.intp)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    first = order[np.repeat(np.arange(len(order)), counts)]
+    second = order[np.repeat(starts, counts) + np.arange(total) - offsets]
+    i, j = np.minimum(first, second), np.maximum(first, second)
+    
+    # Narrow phase: the same comparisons as the pairwise bounding-box test
+    x_overlap = ((x_min[i] - margin) < (x_max[j] + margin)) & ((x_max[i] + margin) > (x_min[j] - margin))
+    y_overlap = ((y_min[i] - margin) < (y_max[j] + margin)) & ((y_max[i] + margin) > (y_min[j] - margin))
+    hit = x_overlap & y_overlap
+    i, j = i[hit], j[hit]
+    
+    ranked = np.lexsort((j, i))
+    return np.column_stack((i[ranked], j[ranked]))
+
+def overlap_counts(x: np.ndarray, y: np.ndarray, length: np.ndarray, width: np.ndarray,
+                   margin: float = COLLISION_MARGIN) -> np.ndarray:
+    """Number of overlapping pairs in each row of (K x N) box arrays (all-pairs, for small N)"""
+    length, width = np.broadcast_to(length, x.shape), np.broadcast_to(width, x.shape)
+    x_min, x_max = x - length / 2, x + length / 2
+    y_min, y_max = y - width / 2, y + width / 2
+    x_overlap = ((x_min[:, :, None] - margin) < (x_max[:, None, :] + margin)) & \
+                ((x_max[:, :, None] + margin) > (x_min[:, None, :] - margin))
+    y_overlap = ((y_min[:, :, None] - margin) < (y_max[:, None, :] + margin)) & \
+                ((y_max[:, :, None] + margin) > (y_min[:, None, :] - margin))
+    upper = np.triu(np.ones((x.shape[1], x.shape[1]), dtype=bool), k=1)
+    return (x_overlap & y_overlap & upper).sum(axis=(1, 2))
\ No newline at end of file
@@ -8,6 +8,13 @@ from typing import Dict, List, Tuple, Optional
 import math
 from dataclasses import dataclass
 
+from .vehicle_state import VehicleStateArrays, StateField, MAX_VELOCITY
+from .spatial_index import LaneIndex, closest_ahead
+from .collision import find_overlapping_pairs, overlap_counts, COLLISION_MARGIN
+from .history import HistoryStore, StateFrame
+from ..core.safety_kernels import time_gap_distance
+from ..core.stl_monitor import STLMonitor
+
 class VehicleRole(Enum):
     LEADER = "leader"
     FOLLOWER = "follower"
@@ -40,7 +47,30 @@ class EnhancedVehicleAction:
             'priority_override': self.priority_override
         }
 
+def _decode_lane(value) -> Lane:
+    return Lane(int(value))
+
+def _encode_lane(lane: Lane) -> int:
+    return lane.value
+
 class EnhancedVehicle:
+    # Dynamic state; lives in a VehicleStateArrays row once bound
+    x = StateField()
+    y = StateField()
+    velocity = StateField()
+    acceleration = StateField()
+    lane = StateField(_decode_lane, _encode_lane)
+    previous_lane = StateField(_decode_lane, _encode_lane)
+    lane_target_y = StateField()
+    is_changing_lane = StateField(bool)
+    lane_change_progress = StateField()
+    lane_change_speed = StateField()
+    length = StateField()
+    width = StateField()
+    
+    _state = None
+    _row = -1
+    
     def __init__(self, vehicle_id: str, role: VehicleRole, vehicle_type: VehicleType = VehicleType.NORMAL, initial_lane: Lane = Lane.MIDDLE):
         self.id = vehicle_id
         self.role = role
@@ -84,6 +114,15 @@ class EnhancedVehicle:
         lane_centers = {Lane.RIGHT: -4.0, Lane.MIDDLE: 0.0, Lane.LEFT: 4.0}
         return lane_centers[lane]
     
+    def bind_state(self, store: VehicleStateArrays, row: int):
+        """Move dynamic state into a row of the shared arrays; the vehicle becomes a view"""
+        values = {name: getattr(self, name) for name in VehicleStateArrays.FIELDS}
+        self._state = store
+        self._row = row
+        for name, value in values.items():
+            self.__dict__.pop(name, None)
+            setattr(self, name, value)
+    
     def update_position(self, dt: float):
         # Update velocity with limits
         self.velocity += self.acceleration * dt
@@ -133,6 +172,10 @@ class EnhancedPlatooningController:
         self.max_acceleration = 2.0
         self.max_braking = -6.0
         
+        # Shared per-lane index, set by the simulation; only used for the
+        # vehicle_states mapping it was built from
+        self.lane_index = None
+        
     def compute_action(self, vehicle_states: Dict, current_time: float) -> EnhancedVehicleAction:
         # Check for emergency vehicles ahead first
         emergency_action = self._check_emergency_ahead(vehicle_states, current_time)
@@ -204,8 +247,8 @@ class EnhancedPlatooningController:
         """Check if lane is clear for emergency lane change (stricter criteria)"""
         target_y = self._get_lane_center_y(target_lane)
         
-        for vid, state in vehicle_states.items():
-            vehicle_obj = state['object']
+        for vehicle_obj in self._nearby(vehicle_states, self.vehicle.x - 20.0, self.vehicle.x + 20.0,
+                                        target_y - 2.5, target_y + 2.5):
             if vehicle_obj.id == self.vehicle.id:
                 continue
                 
@@ -254,8 +297,8 @@ class EnhancedPlatooningController:
     
     def _check_priority_yield(self, vehicle_states: Dict) -> Optional[EnhancedVehicleAction]:
         """Check if we need to yield to a priority vehicle behind us"""
-        for vid, state in vehicle_states.items():
-            vehicle_obj = state['object']
+        for vehicle_obj in self._nearby(vehicle_states, self.vehicle.x - 50.0, self.vehicle.x,
+                                        self.vehicle.y - 3.5, self.vehicle.y + 3.5):
             
             # Skip if it's not a priority vehicle or it's ourselves
             if (vehicle_obj.id == self.vehicle.id or 
@@ -320,8 +363,8 @@ class EnhancedPlatooningController:
         """Check if target lane is clear for yielding maneuver"""
         target_y = self._get_lane_center_y(target_lane)
         
-        for vid, state in vehicle_states.items():
-            vehicle_obj = state['object']
+        for vehicle_obj in self._nearby(vehicle_states, self.vehicle.x - 15.0, self.vehicle.x + 25.0,
+                                        target_y - 2.8, target_y + 2.8):
             if vehicle_obj.id == self.vehicle.id:
                 continue
                 
@@ -379,6 +422,9 @@ class EnhancedPlatooningController:
         return EnhancedVehicleAction(acceleration=acceleration, reason=reason)
     
     def _find_closest_vehicle(self, vehicle_states: Dict):
+        if self._indexed(vehicle_states):
+            return self._find_closest_vehicle_indexed()
+        
         closest_vehicle = None
         min_distance = float('inf')
         relative_velocity = 0.0
@@ -398,8 +444,45 @@ class EnhancedPlatooningController:
         
         return closest_vehicle, min_distance, relative_velocity
     
+    def _find_closest_vehicle_indexed(self):
+        """Same result as the linear scan, walking the lane index from our front bumper"""
+        closest_vehicle = None
+        closest_order = -1
+        min_distance = float('inf')
+        relative_velocity = 0.0
+        
+        candidates = self.lane_index.ahead(self.vehicle.x + self.vehicle.length,
+                                           self.vehicle.y - 4.0, self.vehicle.y + 4.0)
+        for order, vehicle_obj in candidates:
+            if vehicle_obj.id == self.vehicle.id:
+                continue
+            
+            distance = vehicle_obj.x - self.vehicle.x - self.vehicle.length
+            if distance > min_distance:
+                break  # Distances only grow from here on
+            lateral_distance = abs(vehicle_obj.y - self.vehicle.y)
+            
+            # Ties keep the vehicle that comes first in vehicle_states, as the scan does
+            if lateral_distance < 4.0 and distance > 0 and (
+                    distance < min_distance or (distance == min_distance and order < closest_order)):
+                min_distance = distance
+                closest_vehicle = vehicle_obj
+                closest_order = order
+                relative_velocity = vehicle_obj.velocity - self.vehicle.velocity
+        
+        return closest_vehicle, min_distance, relative_velocity
+    
+    def _indexed(self, vehicle_states: Dict) -> bool:
+        return self.lane_index is not None and self.lane_index.source is vehicle_states
+    
+    def _nearby(self, vehicle_states: Dict, x_lo: float, x_hi: float, y_lo: float, y_hi: float) -> List:
+        """Vehicles that may lie in the given window, in vehicle_states order"""
+        if self._indexed(vehicle_states):
+            return self.lane_index.window(x_lo, x_hi, y_lo, y_hi)
+        return [state['object'] for state in vehicle_states.values()]
+    
     def _calculate_safe_distance(self, relative_velocity: float) -> float:
-        return self.min_distance + max(0, self.vehicle.velocity) * self.safe_time_gap
+        return time_gap_distance(self.vehicle.velocity, self.min_distance, self.safe_time_gap)
     
     def _evaluate_lane_change(self, vehicle_states: Dict, current_distance: float, safe_distance: float) -> Optional[Lane]:
         if self.vehicle.is_changing_lane or current_distance > safe_distance * 0.8:
@@ -415,9 +498,11 @@ class EnhancedPlatooningController:
     
     def _is_lane_clear(self, target_lane: Lane, vehicle_states: Dict) -> bool:
         target_y = self._get_lane_center_y(target_lane)
+        # The safe distance depends only on our own velocity, so the search radius is fixed
+        reach = self._calculate_safe_distance(0.0) * 1.8
         
-        for vid, state in vehicle_states.items():
-            vehicle_obj = state['object']
+        for vehicle_obj in self._nearby(vehicle_states, self.vehicle.x - reach, self.vehicle.x + reach,
+                                        target_y - 2.2, target_y + 2.2):
             if vehicle_obj.id == self.vehicle.id:
                 continue
                 
@@ -443,13 +528,29 @@ class EnhancedPlatooningController:
         return lane_centers[lane]
 
 class EnhancedPlatooningSimulation:
-    def __init__(self, num_vehicles: int = 4, dt: float = 0.1, scenario: str = "basic"):
+    BACKENDS = ("objects", "arrays")
+    QUIESCENT_BLOCK = 1 << 18  # (steps x vehicles x vehicles) entries checked per quiescence block
+    
+    def __init__(self, num_vehicles: int = 4, dt: float = 0.1, scenario: str = "basic", backend: str = "objects",
+                 history_limit: Optional[int] = None, stl_monitor: Optional[STLMonitor] = None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {self.BACKENDS}")
+        if stl_monitor is not None and not np.isclose(stl_monitor.dt, dt):
+            raise ValueError(f"STL monitor sampled every {stl_monitor.dt} s, simulation every {dt} s")
+        
         self.dt = dt
         self.time = 0.0
         self.vehicles = {}
         self.controllers = {}
-        self.history = []
+        self.history = None
+        self._frame = None  # Post-integration frame of the last step, reused by the next one
+        self.history_limit = history_limit  # Keep only the most recent steps when set
+        self.record_history = True  # Headless runs keep only the streaming safety accumulators
         self.scenario = scenario
+        self.backend = backend
+        self.state_arrays = None
+        self.lane_index = LaneIndex()
+        self.stl_monitor = stl_monitor  # Fed the platoon signals after every step
         
         # User-controlled states
         self.emergency_vehicle = None
@@ -457,11 +558,15 @@ class EnhancedPlatooningSimulation:
         self.emergency_triggered = False
         self.priority_added = False
         
+        self._reset_stats()
         self._initialize_vehicles(num_vehicles)
         
     def _initialize_vehicles(self, num_vehicles: int):
         lanes = [Lane.RIGHT, Lane.MIDDLE, Lane.LEFT]
         
+        # Struct-of-arrays backend: vehicles are thin views onto rows of self.state_arrays
+        self.state_arrays = VehicleStateArrays(num_vehicles) if self.backend == "arrays" else None
+        
         for i in range(num_vehicles):
             vid = f"vehicle_{i}"
             
@@ -473,8 +578,15 @@ class EnhancedPlatooningSimulation:
                 role = VehicleRole.FOLLOWER
             
             vehicle = EnhancedVehicle(vid, role, VehicleType.NORMAL, lane)
+            if self.state_arrays is not None:
+                vehicle.bind_state(self.state_arrays, self.state_arrays.allocate())
             self.vehicles[vid] = vehicle
             self.controllers[vid] = EnhancedPlatooningController(vehicle)
+            self.controllers[vid].lane_index = self.lane_index
+        
+        self.history = HistoryStore(list(self.vehicles.values()), EnhancedVehicleAction,
+                                    capacity=256, max_steps=self.history_limit)
+        self._frame = None
     
     def set_emergency_vehicle(self, vehicle_id: str):
         """Set which vehicle will perform emergency braking"""
@@ -491,6 +603,7 @@ class EnhancedPlatooningSimulation:
             vehicle.symbol = "🚑"
             self.priority_vehicle = vehicle_id
             self.priority_added = True
+            self.invalidate_frame()
     
     def trigger_emergency(self):
         """Trigger emergency braking on the selected vehicle"""
@@ -498,17 +611,34 @@ class EnhancedPlatooningSimulation:
             vehicle = self.vehicles[self.emergency_vehicle]
             vehicle.trigger_emergency_braking(self.time)
             self.emergency_triggered = True
+            self.invalidate_frame()
             print(f"🚨 EMERGENCY: {self.emergency_vehicle} triggered hard braking at time {self.time:.1f}s!")
             return True
         return False
     
+    def invalidate_frame(self):
+        """Make the next step read the vehicles afresh
+        
+        step() reuses the frame recorded at the end of the previous step. Call
+        this after changing a vehicle between steps other than through the
+        scenario methods, which do it themselves.
+        """
+        self._frame = None
+    
     def step(self):
-        vehicle_states = self._get_vehicle_states()
+        # One immutable frame per step: the state recorded at the end of the previous
+        # step, unless a vehicle was changed since then (invalidate_frame)
+        vehicle_states = self._frame if self._frame is not None else self._get_vehicle_states()
+        if self.lane_index.source is not vehicle_states:
+            self._rebuild_lane_index(vehicle_states)
         
         actions = {}
+        emergency = False
         for vid, controller in self.controllers.items():
             action = controller.compute_action(vehicle_states, self.time)
-            actions[vid] = {'object': action, 'dict': action.to_dict()}
+            emergency = emergency or action.emergency
+            if self.record_history:
+                actions[vid] = action
             
             vehicle = self.vehicles[vid]
             vehicle.acceleration = action.acceleration
@@ -517,23 +647,173 @@ class EnhancedPlatooningSimulation:
                 vehicle.initiate_lane_change(action.target_lane)
         
         # Update positions
-        for vehicle in self.vehicles.values():
-            vehicle.update_position(self.dt)
+        if self.state_arrays is not None:
+            self.state_arrays.integrate(self.dt)
+        else:
+            for vehicle in self.vehicles.values():
+                vehicle.update_position(self.dt)
         
         collisions = self._check_collisions()
         
-        self.history.append({
-            'time': self.time,
-            'vehicles': {vid: self._get_vehicle_state(vid) for vid in self.vehicles.keys()},
-            'actions': actions,
-            'collisions': collisions
-        })
+        if self.record_history:
+            self._frame = self.history.append(self.time, actions, collisions, self.state_arrays)
+        else:
+            self._frame = self._get_vehicle_states()
+        self._update_stats(self._frame, collisions, emergency)
         
         self.time += self.dt
     
-    def _get_vehicle_states(self) -> Dict:
-        return {vid: {'object': vehicle, **self._get_vehicle_state(vid)} 
-                for vid, vehicle in self.vehicles.items()}
+    def _skip_quiescent(self, limit: int) -> int:
+        """Advance up to limit steps in one jump while the platoon is provably quiescent
+        
+        Quiescent means: default controllers only, no STL monitor (it needs every
+        sample), no priority vehicle, no emergency braking, no lane change in
+        progress, every velocity unchanged by its own acceleration, every follower
+        in its dead band (or with nobody ahead) and no collision. Positions then
+        grow by v * dt each step, which a sequential np.add.accumulate reproduces
+        exactly; each future step is checked against the controllers' own predicates. Returns the number of steps advanced.
+        """
+        vehicles = list(self.vehicles.values())
+        controllers = [self.controllers[vid] for vid in self.vehicles]
+        if limit <= 0 or any(type(controller) is not EnhancedPlatooningController for controller in controllers):
+            return 0
+        if self.stl_monitor is not None:
+            return 0  # The monitor needs every sample
+        if any(v.role == VehicleRole.PRIORITY or v.emergency_braking or v.is_changing_lane for v in vehicles):
+            return 0
+        
+        count = len(vehicles)
+        x, y, velocity, length, width = (np.array([getattr(v, name) for v in vehicles], dtype=float)
+                                         for name in ('x', 'y', 'velocity', 'length', 'width'))
+        leader = np.array([v.role == VehicleRole.LEADER for v in vehicles])
+        acceleration = np.where(leader, np.clip((20.0 - velocity) * 0.2, -1.0, 1.0), 0.0)
+        
+        # Velocities must be fixed points of the integrator's clamp
+        updated = velocity + acceleration * self.dt
+        np.minimum(updated, MAX_VELOCITY, out=updated)
+        updated[~(updated > 0)] = 0.0
+        if not np.array_equal(updated, velocity):
+            return 0
+        
+        min_distance = np.array([controller.min_distance for controller in controllers])
+        time_gap = np.array([controller.safe_time_gap for controller in controllers])
+        safe_distance = time_gap_distance(velocity, min_distance, time_gap)
+        step_dx = velocity * self.dt
+        
+        # Blocks grow geometrically so short quiet stretches stay cheap to detect
+        max_block = max(1, self.QUIESCENT_BLOCK // (count * count))
+        block_size = min(16, max_block)
+        positions, decisions, gaps = [], [], []
+        advanced = 0
+        while advanced < limit:
+            size = min(block_size, limit - advanced)
+            block_size = min(2 * block_size, max_block)
+            block = np.empty((size + 1, count))
+            block[0] = x
+            block[1:] = step_dx
+            np.add.accumulate(block, axis=0, out=block)
+            
+            # Row j is the state the controllers see at step j, row j + 1 the state after it
+            closest, gap = closest_ahead(block, np.broadcast_to(y, block.shape), length)
+            cruising = leader | ~np.isfinite(gap) | ~((gap < safe_distance * 0.9) | (gap > safe_distance * 1.3))
+            quiet = cruising[:size].all(axis=1)
+            quiet &= overlap_counts(block[1:], np.broadcast_to(y, (size, count)), length, width) == 0
+            steps = size if quiet.all() else int(np.argmin(quiet))
+            
+            positions.append(block[1:steps + 1])
+            decisions.append(np.where(leader, 0, np.where(np.isfinite(gap[:steps]), 2 + closest[:steps], 1)))
+            gaps.append(gap[1:steps + 1])
+            advanced += steps
+            x = block[steps]
+            if steps < size:
+                break
+        
+        if advanced == 0:
+            return 0
+        
+        times = np.full(advanced + 1, self.dt)
+        times[0] = self.time
+        np.add.accumulate(times, out=times)
+        
+        if self.state_arrays is not None:
+            self.state_arrays.x[:count] = x
+        else:
+            for vehicle, position in zip(vehicles, x.tolist()):
+                vehicle.x = position
+        for vehicle, value in zip(vehicles, acceleration):
+            vehicle.acceleration = value if vehicle.role == VehicleRole.LEADER else 0.0
+        
+        if self.record_history:
+            reasons = ["Leader maintaining speed", "No vehicle ahead"] + [
+                f"Maintaining distance to {vid}" for vid in self.vehicles]
+            states = {'x': np.concatenate(positions), 'y': y, 'velocity': velocity, 'acceleration': acceleration,
+                      'is_changing_lane': False, 'emergency_braking': False}
+            self._frame = self.history.extend(times[:advanced], states, acceleration, reasons,
+                                              np.concatenate(decisions))
+        else:
+            self._frame = self.history.snapshot(float(times[advanced - 1]), self.state_arrays)
+        
+        self.min_gap = min(self.min_gap, float(np.concatenate(gaps).min()))
+        self.skipped_steps += advanced
+        self.time = float(times[advanced])
+        return advanced
+    
+    def _steps_until_event(self, step: int, total_steps: int) -> int:
+        """Steps that may be taken in one jump without passing a scheduled scenario trigger"""
+        limit = total_steps - step
+        for pending, event_step in ((self.scenario == "emergency" and self.emergency_vehicle
+                                     and not self.emergency_triggered, 30),
+                                    (self.scenario == "priority" and self.priority_vehicle
+                                     and not self.priority_added, 20)):
+            if pending and event_step >= step:
+                limit = min(limit, event_step - step + 1)
+        return limit
+    
+    def _reset_stats(self):
+        self.skipped_steps = 0  # Steps advanced by quiescence jumps rather than by step()
+        self.total_collisions = 0
+        self.emergency_events = 0  # Steps in which any controller took an emergency action
+        self.min_gap = float('inf')  # Smallest gap any controller saw to its vehicle ahead
+        self.first_collision_time = None
+    
+    def _update_stats(self, frame: StateFrame, collisions: List[Tuple[str, str]], emergency: bool):
+        """Fold one step into the streaming safety accumulators"""
+        if collisions:
+            self.total_collisions += len(collisions)
+            if self.first_collision_time is None:
+                self.first_collision_time = self.time
+        if emergency:
+            self.emergency_events += 1
+        
+        # The index built here is the one the next step's controllers query
+        self._rebuild_lane_index(frame)
+        monitored = self.stl_monitor is not None
+        margin = float('inf')
+        for controller in self.controllers.values():
+            closest, distance, relative_velocity = controller._find_closest_vehicle(frame)
+            if distance < self.min_gap:
+                self.min_gap = float(distance)
+            if monitored and closest is not None:
+                margin = min(margin, distance - controller._calculate_safe_distance(relative_velocity))
+        
+        if monitored:
+            self.stl_monitor.update(self.time, {
+                'gap_margin': float(margin),
+                'min_velocity': min(vehicle.velocity for vehicle in self.vehicles.values()),
+                'emergency': float(emergency)
+            })
+    
+    def _rebuild_lane_index(self, vehicle_states: Dict):
+        """Re-sort the per-lane index once per step for the controllers' neighbour queries"""
+        vehicles = list(self.vehicles.values())
+        if self.state_arrays is not None:
+            self.lane_index.rebuild(vehicles, self.state_arrays.column('x'), self.state_arrays.column('y'),
+                                    source=vehicle_states)
+        else:
+            self.lane_index.rebuild(vehicles, source=vehicle_states)
+    
+    def _get_vehicle_states(self) -> StateFrame:
+        return self.history.snapshot(self.time, self.state_arrays)
     
     def _get_vehicle_state(self, vehicle_id: str) -> Dict:
         vehicle = self.vehicles[vehicle_id]
@@ -555,63 +835,69 @@ class EnhancedPlatooningSimulation:
         }
     
     def _check_collisions(self) -> List[Tuple[str, str]]:
-        collisions = []
         vehicles = list(self.vehicles.values())
+        columns = {}
+        for name in ('x', 'y', 'length', 'width'):
+            if self.state_arrays is not None:
+                columns[name] = self.state_arrays.column(name)
+            else:
+                columns[name] = np.fromiter((getattr(v, name) for v in vehicles), dtype=float, count=len(vehicles))
         
-        for i in range(len(vehicles)):
-            for j in range(i + 1, len(vehicles)):
-                v1, v2 = vehicles[i], vehicles[j]
-                
-                x1_min, x1_max, y1_min, y1_max = v1.get_bounding_box()
-                x2_min, x2_max, y2_min, y2_max = v2.get_bounding_box()
-                
-                # Safety margin
-                margin = 0.3
-                x_overlap = (x1_min - margin) < (x2_max + margin) and (x1_max + margin) > (x2_min - margin)
-                y_overlap = (y1_min - margin) < (y2_max + margin) and (y1_max + margin) > (y2_min - margin)
-                
-                if x_overlap and y_overlap:
-                    collisions.append((v1.id, v2.id))
-        
-        return collisions
+        # Sweep-and-prune over bounding boxes with a 0.3 m safety margin
+        pairs = find_overlapping_pairs(columns['x'], columns['y'], columns['length'], columns['width'],
+                                       COLLISION_MARGIN)
+        return [(vehicles[i].id, vehicles[j].id) for i, j in pairs.tolist()]
     
     def get_safety_stats(self) -> Dict:
-        if not self.history:
-            return {'safety_percentage': 100.0, 'total_collisions': 0, 'emergency_events': 0}
-        
-        total_collisions = sum(len(step['collisions']) for step in self.history)
-        emergency_events = sum(1 for step in self.history 
-                             if any(action_data['object'].emergency 
-                                  for action_data in step['actions'].values()))
-        
-        safety_percentage = max(0, 100 - (total_collisions * 20))
-        
+        """Summary from the streaming accumulators; covers every step, recorded or not"""
         return {
-            'safety_percentage': safety_percentage,
-            'total_collisions': total_collisions,
-            'emergency_events': emergency_events
+            'safety_percentage': max(0, 100 - (self.total_collisions * 20)),
+            'total_collisions': self.total_collisions,
+            'emergency_events': self.emergency_events,
+            'min_gap': self.min_gap,
+            'first_collision_time': self.first_collision_time
         }
 
-    def run(self, duration: float = 60.0):
+    def run(self, duration: float = 60.0, record_history: bool = True, skip_quiescent: bool = False) -> Dict:
+        """Run the scenario and return the safety summary
+        
+        With record_history=False no per-step history is kept; only the O(N)
+        streaming accumulators behind get_safety_stats() are updated. With
+        skip_quiescent=True steady-state stretches are advanced in single jumps
+        with identical results.
+        """
         total_steps = int(duration / self.dt)
-        
-        for step in range(total_steps):
-            self.step()
+        self.record_history = record_history
+        if record_history:
+            self.history.reserve(total_steps)
+        
+        taken = 0
+        while taken < total_steps:
+            advanced = self._skip_quiescent(self._steps_until_event(taken, total_steps)) if skip_quiescent else 0
+            if not advanced:
+                self.step()
+                advanced = 1
+            taken += advanced
+            step = taken - 1
             
             # Auto-trigger if set
             if self.scenario == "emergency" and step == 30 and self.emergency_vehicle and not self.emergency_triggered:
                 self.trigger_emergency()
             elif self.scenario == "priority" and step == 20 and self.priority_vehicle and not self.priority_added:
                 self.set_priority_vehicle(self.priority_vehicle)
+        
+        return self.get_safety_stats()
     
     def reset(self):
         """Reset simulation to clean state"""
         self.time = 0.0
         self.vehicles = {}
         self.controllers = {}
-        self.history = []
         self.emergency_triggered = False
         self.priority_added = False
         self.emergency_vehicle = None
         self.priority_vehicle = None
+        self._reset_stats()
+        if self.stl_monitor is not None:
+            self.stl_monitor.reset()
         self._initialize_vehicles(4)  # Default to 4 vehicles
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Ensemble of independent enhanced platoons advanced in lockstep
+"""
+
+import numpy as np
+from typing import Dict
+
+from .vehicle_state import VehicleStateArrays, LANE_CENTER_Y
+from .collision import overlap_counts
+from .spatial_index import closest_ahead
+from ..core.safety_kernels import time_gap_distance
+
+# Lane codes as in Lane.value
+RIGHT, MIDDLE, LEFT = 0, 1, 2
+
+class EnsemblePlatooningSimulation:
+    """K replicas of the enhanced simulation held as (K x N) arrays
+    
+    Every replica runs the EnhancedPlatooningController logic for the basic and
+    emergency scenarios (car following, emergency reaction and emergency lane
+    changes), vectorized across replicas and vehicles. Each replica reproduces
+    a serial EnhancedPlatooningSimulation started from the same state exactly.
+    Priority vehicles are not modelled.
+    """
+    
+    SCENARIOS = ("basic", "emergency")
+    
+    def __init__(self, num_replicas: int, num_vehicles: int = 4, dt: float = 0.1, scenario: str = "basic"):
+        if scenario not in self.SCENARIOS:
+            raise ValueError(f"Unsupported ensemble scenario '{scenario}', expected one of {self.SCENARIOS}")
+        
+        self.num_replicas = num_replicas
+        self.num_vehicles = num_vehicles
+        self.dt = dt
+        self.time = 0.0
+        self.scenario = scenario
+        
+        # Controller parameters, as in EnhancedPlatooningController
+        self.safe_time_gap = 2.5
+        self.min_distance = 10.0
+        self.max_acceleration = 2.0
+        self.max_braking = -6.0
+        
+        # All replicas share one flat store; the (K x N) attributes below are views
+        self.state_arrays = VehicleStateArrays(num_replicas * num_vehicles)
+        self.state_arrays.size = num_replicas * num_vehicles
+        shape = (num_replicas, num_vehicles)
+        for name in VehicleStateArrays.FIELDS:
+            setattr(self, name, getattr(self.state_arrays, name).reshape(shape))
+        self.emergency_braking = np.zeros(shape, dtype=bool)
+        self.emergency_start_time = np.zeros(shape)
+        
+        # Emergency vehicle index and the step after which each replica triggers it
+        self.emergency_vehicle = None
+        self.trigger_steps = np.full(num_replicas, 30 if scenario == "emergency" else -1)
+        self.step_count = 0
+        
+        self.total_collisions = np.zeros(num_replicas, dtype=int)
+        self.emergency_events = np.zeros(num_replicas, dtype=int)
+        self.min_gap = np.full(num_replicas, np.inf)
+        
+        self._initialize_vehicles()
+        self._ahead = None  # Closest vehicle ahead in the current state, reused by the next step
+    
+    def _initialize_vehicles(self):
+        """Same layout as EnhancedPlatooningSimulation._initialize_vehicles"""
+        index = np.arange(self.num_vehicles)
+        lanes = np.where(index == 0, MIDDLE, index % 3)
+        
+        self.x[:] = np.where(index == 0, 50.0, 50.0 - index * 25.0)
+        self.lane[:] = lanes
+        self.previous_lane[:] = lanes
+        self.lane_target_y[:] = LANE_CENTER_Y[lanes]
+        self.y[:] = self.lane_target_y
+        self.velocity[:] = 20.0
+        self.acceleration[:] = 0.0
+        self.length[:] = 4.5
+        self.width[:] = 1.8
+        self.is_changing_lane[:] = False
+        self.lane_change_progress[:] = 0.0
+        self.lane_change_speed[:] = 2.0
+    
+    def perturb(self, rng: np.random.Generator, gap_std: float = 2.0, speed_std: float = 1.0,
+                trigger_jitter: int = 10, rows: slice = slice(None)) -> 'EnsemblePlatooningSimulation':
+        """Randomize initial gaps, speeds and emergency trigger steps of the selected replicas"""
+        count = len(range(*rows.indices(self.num_replicas)))
+        gaps = 25.0 + rng.normal(0.0, gap_std, size=(count, self.num_vehicles - 1))
+        self.x[rows, 1:] = self.x[rows, :1] - np.cumsum(gaps, axis=1)
+        self.velocity[rows] = np.clip(20.0 + rng.normal(0.0, speed_std, size=(count, self.num_vehicles)), 0.0, 30.0)
+        if self.scenario == "emergency" and trigger_jitter:
+            self.trigger_steps[rows] += rng.integers(-trigger_jitter, trigger_jitter + 1, size=count)
+        self._ahead = None
+        return self
+    
+    def set_emergency_vehicle(self, vehicle_id: str):
+        """Set which vehicle performs emergency braking in every replica"""
+        index = int(vehicle_id.split('_')[1])
+        if 0 <= index < self.num_vehicles:
+            self.emergency_vehicle = index
+    
+    def _closest_ahead(self):
+        """Nearest vehicle ahead per (replica, vehicle), as each controller would pick it"""
+        closest, gap = closest_ahead(self.x, self.y, self.length)
+        return closest, gap, np.isfinite(gap)
+    
+    def _lane_clear_for_emergency(self, target: np.ndarray) -> np.ndarray:
+        """No other vehicle within 2.5 m of the target lane centre and 20 m longitudinally"""
+        target_y = LANE_CENTER_Y[np.maximum(target, 0)]
+        lateral = np.abs(self.y[:, None, :] - target_y[:, :, None])
+        longitudinal = np.abs(self.x[:, None, :] - self.x[:, :, None])
+        blocking = (lateral < 2.5) & (longitudinal < 20.0)
+        blocking[:, np.arange(self.num_vehicles), np.arange(self.num_vehicles)] = False
+        return (target >= 0) & ~blocking.any(axis=2)
+    
+    def _compute_actions(self):
+        """Accelerations, emergency flags and lane-change targets (-1 for none) of every controller"""
+        if self._ahead is None:
+            self._ahead = self._closest_ahead()
+        closest, distance, found = self._ahead
+        
+        velocity = self.velocity
+        safe_distance = time_gap_distance(velocity, self.min_distance, self.safe_time_gap)
+        
+        # Normal driving: leader holds 20 m/s, followers keep a dead band around the safe distance
+        gap_error = distance - safe_distance
+        follow = np.where(distance < safe_distance * 0.9, np.clip(gap_error * 0.3, self.max_braking, 0),
+                          np.where(distance > safe_distance * 1.3,
+                                   np.clip(gap_error * 0.05, 0, self.max_acceleration), 0.0))
+        acceleration = np.where(found, follow, 0.0)
+        acceleration[:, 0] = np.clip((20.0 - velocity[:, 0]) * 0.2, -1.0, 1.0)
+        
+        # Emergency braking ahead
+        braking_ahead = found & np.take_along_axis(self.emergency_braking, closest, axis=1)
+        emergency = braking_ahead & (distance < safe_distance * 1.5)
+        target = np.full(velocity.shape, -1)
+        if emergency.any():
+            since = self.time - np.take_along_axis(self.emergency_start_time, closest, axis=1)
+            multiplier = np.where(since < 1.0, 2.0, 1.0)
+            braking = np.minimum(self.max_braking, -6.0 * multiplier)
+            
+            # Adjacent lanes in the controller's preference order: left first, then right
+            lane = self.lane.astype(int)
+            first = np.where(lane == MIDDLE, LEFT, MIDDLE)
+            second = np.where(lane == MIDDLE, RIGHT, -1)
+            movable = emergency & ~self.is_changing_lane
+            first_clear = movable & self._lane_clear_for_emergency(first)
+            second_clear = movable & ~first_clear & self._lane_clear_for_emergency(second)
+            target = np.where(first_clear, first, np.where(second_clear, second, -1))
+            
+            acceleration = np.where(emergency, np.where(target >= 0, -4.0, braking), acceleration)
+        
+        return acceleration, emergency, target
+    
+    def step(self):
+        acceleration, emergency, target = self._compute_actions()
+        self.acceleration[:] = acceleration
+        
+        changing = target >= 0
+        if changing.any():
+            self.previous_lane[changing] = self.lane[changing]
+            self.lane[changing] = target[changing]
+            self.lane_target_y[changing] = LANE_CENTER_Y[target[changing]]
+            self.is_changing_lane[changing] = True
+            self.lane_change_progress[changing] = 0.0
+        
+        self.state_arrays.integrate(self.dt)
+        
+        self.total_collisions += overlap_counts(self.x, self.y, self.length, self.width)
+        self.emergency_events += emergency.any(axis=1)
+        self._ahead = self._closest_ahead()
+        np.minimum(self.min_gap, self._ahead[1].min(axis=1), out=self.min_gap)
+        
+        self.time += self.dt
+        
+        # Scheduled emergency braking, as EnhancedPlatooningSimulation.run triggers it
+        if self.emergency_vehicle is not None:
+            triggered = self.trigger_steps == self.step_count
+            if triggered.any():
+                self.emergency_braking[triggered, self.emergency_vehicle] = True
+                self.emergency_start_time[triggered, self.emergency_vehicle] = self.time
+                self.acceleration[triggered, self.emergency_vehicle] = -8.0
+        self.step_count += 1
+    
+    def run(self, duration: float = 60.0) -> Dict[str, np.ndarray]:
+        total_steps = int(duration / self.dt)
+        for _ in range(total_steps):
+            self.step()
+        return self.get_safety_stats()
+    
+    def get_safety_stats(self) -> Dict[str, np.ndarray]:
+        """Per-replica outcome summary, with the same keys as the serial simulation"""
+        return {
+            'safety_percentage': np.maximum(0, 100 - self.total_collisions * 20),
+            'total_collisions': self.total_collisions.copy(),
+            'emergency_events': self.emergency_events.copy(),
+            'min_gap': self.min_gap.copy()
+        }
\ No newline at end of file
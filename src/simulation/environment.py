@@ -4,9 +4,14 @@ Basic Platooning Simulation (Fallback)
 
 import numpy as np
 from enum import Enum
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
+from ..core.safety_kernels import safe_distance
+from ..core.stl_monitor import STLMonitor
+from ..core.topology import PlatoonTopology
+from ..core.verified_controller import FormalPlatooningController, SafetyParameters
+
 class VehicleRole(Enum):
     LEADER = "leader"
     FOLLOWER = "follower"
@@ -21,15 +26,40 @@ class VehicleAction:
 class PlatooningSimulation:
     """Basic 1D platooning simulation (fallback)"""
     
-    def __init__(self, num_vehicles: int = 4, dt: float = 0.1):
+    def __init__(self, num_vehicles: int = 4, dt: float = 0.1, stl_monitor: Optional[STLMonitor] = None):
+        if stl_monitor is not None and not np.isclose(stl_monitor.dt, dt):
+            raise ValueError(f"STL monitor sampled every {stl_monitor.dt} s, simulation every {dt} s")
         self.dt = dt
         self.time = 0.0
         self.vehicles = {}
         self.controllers = {}
         self.history = []
+        self.stl_monitor = stl_monitor  # Fed the platoon signals after every step
+        self.safety_params = SafetyParameters()  # Safe distance model of the gap_margin signal
         
         # Initialize vehicles
         self._initialize_vehicles(num_vehicles)
+    
+    @classmethod
+    def from_scenario(cls, gap: float, v_ego: float, v_pred: float, leader_accelerations: Sequence[float],
+                      params: Optional[SafetyParameters] = None, dt: float = 0.1,
+                      stl_monitor: Optional[STLMonitor] = None) -> 'PlatooningSimulation':
+        """The verified follower behind a scripted predecessor
+        
+        vehicle_0 starts gap metres ahead of vehicle_1 and applies
+        leader_accelerations[k] during step k (0 once the script ends);
+        vehicle_1 runs FormalPlatooningController with params.
+        """
+        sim = cls(num_vehicles=2, dt=dt, stl_monitor=stl_monitor)
+        params = params or SafetyParameters()
+        sim.safety_params = params
+        sim.vehicles['vehicle_0'].update(position=gap, velocity=v_pred)
+        sim.vehicles['vehicle_1'].update(position=0.0, velocity=v_ego)
+        sim.controllers['vehicle_0'] = ScriptedController("vehicle_0", leader_accelerations, dt)
+        follower = FormalPlatooningController("vehicle_1")
+        follower.safety_params = params
+        sim.controllers['vehicle_1'] = follower
+        return sim
         
     def _initialize_vehicles(self, num_vehicles: int):
         """Initialize vehicles in a line"""
@@ -55,6 +85,9 @@ class PlatooningSimulation:
         # Compute actions
         actions = {}
         for vid, controller in self.controllers.items():
+            if isinstance(controller, FormalPlatooningController):
+                vehicle = self.vehicles[vid]
+                controller.update_state(vehicle['position'], vehicle['velocity'], vehicle['acceleration'])
             action = controller.compute_verified_action(platoon_states, self.time)
             actions[vid] = {
                 'acceleration': action.acceleration,
@@ -71,6 +104,9 @@ class PlatooningSimulation:
             vehicle['velocity'] = max(0, vehicle['velocity'])
             vehicle['position'] += vehicle['velocity'] * self.dt
         
+        if self.stl_monitor is not None:
+            self.stl_monitor.update(self.time, self._stl_signals(actions))
+        
         # Store history
         self.history.append({
             'time': self.time,
@@ -80,9 +116,23 @@ class PlatooningSimulation:
         
         self.time += self.dt
     
+    def _stl_signals(self, actions: Dict) -> Dict[str, float]:
+        """Platoon-wide signals for the STL monitor: worst gap margin, slowest vehicle, any emergency"""
+        vehicle_ids = list(PlatoonTopology.from_positions(self.vehicles))  # Front to back by position
+        margin = float('inf')
+        for front_id, rear_id in zip(vehicle_ids, vehicle_ids[1:]):
+            front, rear = self.vehicles[front_id], self.vehicles[rear_id]
+            gap = front['position'] - rear['position']
+            margin = min(margin, gap - safe_distance(rear['velocity'], front['velocity'], self.safety_params))
+        return {
+            'gap_margin': margin,
+            'min_velocity': min(vehicle['velocity'] for vehicle in self.vehicles.values()),
+            'emergency': float(any(action['emergency'] for action in actions.values()))
+        }
+    
     def _get_platoon_states(self):
-        """Get platoon states for controllers"""
-        return self.vehicles
+        """Get platoon states for controllers, as broadcast at the current time"""
+        return {vid: dict(vehicle, timestamp=self.time) for vid, vehicle in self.vehicles.items()}
     
     def trigger_emergency(self, vehicle_id: str = "vehicle_0"):
         """Trigger emergency braking"""
@@ -116,6 +166,20 @@ class PlatooningSimulation:
             if step == 30:  # 3 seconds at 0.1 dt
                 self.trigger_emergency("vehicle_0")
 
+class ScriptedController:
+    """Replays a fixed acceleration per step, then holds speed"""
+    
+    def __init__(self, vehicle_id: str, accelerations: Sequence[float], dt: float = 0.1):
+        self.vehicle_id = vehicle_id
+        self.accelerations = [float(accel) for accel in accelerations]
+        self.dt = dt
+    
+    def compute_verified_action(self, platoon_states: Dict, current_time: float) -> VehicleAction:
+        step = int(round(current_time / self.dt))
+        if step < len(self.accelerations):
+            return VehicleAction(self.accelerations[step], reason="Scripted")
+        return VehicleAction(0.0, reason="Script finished")
+
 class BasicController:
     """Basic controller for fallback simulation"""
     
@@ -0,0 +1,329 @@
+"""
+Columnar history store for the enhanced simulation
+"""
+
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+class _Categories:
+    """Interning table mapping repeated values (enums, colours, reasons) to small codes"""
+    
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+    
+    def encode(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+    
+    def decode(self, code: int):
+        return self.values[code] if code >= 0 else None
+
+class StateFrame(Mapping):
+    """Immutable snapshot of every vehicle at one step
+
+    Controllers receive it as their vehicle_states mapping and the history
+    store keeps the very same columns, so both see identical values. A frame
+    that views a ring-buffer row is valid until that row is recycled.
+    """
+    
+    FIELDS = ('id', 'role', 'vehicle_type', 'x', 'y', 'velocity', 'acceleration', 'lane',
+              'is_changing_lane', 'length', 'width', 'color', 'symbol', 'emergency_braking')
+    
+    def __init__(self, time: float, store: 'HistoryStore', columns: Dict[str, np.ndarray]):
+        self.time = time
+        self.vehicles = store.vehicles
+        self._store = store
+        self._columns = columns
+        for column in columns.values():
+            column.flags.writeable = False
+    
+    def __getitem__(self, vehicle_id: str) -> 'FrameRow':
+        return FrameRow(self, self._store.positions[vehicle_id])
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.vehicle_ids)
+    
+    def __len__(self) -> int:
+        return len(self.vehicles)
+    
+    def column(self, name: str) -> np.ndarray:
+        """Read-only array of one numeric field across all vehicles"""
+        return self._columns[name]
+    
+    def value(self, name: str, position: int):
+        store = self._store
+        if name == 'id':
+            return store.vehicle_ids[position]
+        if name == 'length' or name == 'width':
+            return float(getattr(store, name)[position])
+        code = self._columns[name][position].item()
+        if name in store.CATEGORY_COLUMNS:
+            return store._categories[name].decode(code)
+        return code
+
+class FrameRow(Mapping):
+    """Read-only view of one vehicle in a StateFrame: 'object' plus the recorded fields"""
+    
+    KEYS = ('object',) + StateFrame.FIELDS
+    
+    def __init__(self, frame: StateFrame, position: int):
+        self._frame = frame
+        self._position = position
+    
+    def __getitem__(self, key: str):
+        if key == 'object':
+            return self._frame.vehicles[self._position]
+        if key not in StateFrame.FIELDS:
+            raise KeyError(key)
+        return self._frame.value(key, self._position)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+    
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+class HistoryStore:
+    """Per-step vehicle states and actions kept as preallocated (time x vehicle) columns
+    
+    Static metadata (ids, dimensions) is stored once; categorical fields are
+    interned to integer codes. With max_steps set the store is a ring buffer
+    that keeps only the most recent steps. Indexing yields the legacy
+    {'time', 'vehicles', 'actions', 'collisions'} dict for existing consumers.
+    """
+    
+    STATE_COLUMNS = {
+        'x': np.float64,
+        'y': np.float64,
+        'velocity': np.float64,
+        'acceleration': np.float64,
+        'is_changing_lane': np.bool_,
+        'emergency_braking': np.bool_,
+    }
+    CATEGORY_COLUMNS = ('role', 'vehicle_type', 'lane', 'color', 'symbol')
+    FRAME_COLUMNS = tuple(STATE_COLUMNS) + CATEGORY_COLUMNS
+    ACTION_COLUMNS = {
+        'action_acceleration': np.float64,
+        'target_lane': np.int8,
+        'emergency': np.bool_,
+        'priority_override': np.bool_,
+        'reason': np.int32,
+    }
+    
+    def __init__(self, vehicles: Sequence, action_type, capacity: int = 64, max_steps: Optional[int] = None):
+        self.vehicles = tuple(vehicles)
+        self.vehicle_ids = [vehicle.id for vehicle in vehicles]
+        self.positions = {vid: k for k, vid in enumerate(self.vehicle_ids)}
+        self.length = np.array([vehicle.length for vehicle in vehicles], dtype=float)
+        self.width = np.array([vehicle.width for vehicle in vehicles], dtype=float)
+        self.action_type = action_type
+        self.max_steps = max_steps
+        
+        self._categories = {name: _Categories() for name in self.CATEGORY_COLUMNS + ('reason',)}
+        self._start = 0
+        self._count = 0
+        self._allocate(max_steps if max_steps else max(1, capacity))
+    
+    def _allocate(self, capacity: int):
+        count = len(self.vehicle_ids)
+        self._time = np.zeros(capacity)
+        self._collisions = np.empty(capacity, dtype=object)
+        self._columns = {name: np.zeros((capacity, count), dtype=dtype) for name, dtype in self.STATE_COLUMNS.items()}
+        self._columns.update({name: np.zeros((capacity, count), dtype=np.int8) for name in self.CATEGORY_COLUMNS})
+        self._columns.update({name: np.zeros((capacity, count), dtype=dtype) for name, dtype in self.ACTION_COLUMNS.items()})
+    
+    @property
+    def capacity(self) -> int:
+        return len(self._time)
+    
+    def reserve(self, steps: int):
+        """Preallocate room for the given number of further steps (unbounded stores only)"""
+        if self.max_steps is None and self._count + steps > self.capacity:
+            self._resize(self._count + steps)
+    
+    def _resize(self, capacity: int):
+        time, collisions, columns = self._time, self._collisions, self._columns
+        self._allocate(capacity)
+        self._time[:self._count] = time[:self._count]
+        self._collisions[:self._count] = collisions[:self._count]
+        for name, column in columns.items():
+            self._columns[name][:self._count] = column[:self._count]
+    
+    def _next_row(self) -> int:
+        if self._count < self.capacity:
+            row = (self._start + self._count) % self.capacity
+            self._count += 1
+        elif self.max_steps is not None:
+            # Ring buffer: overwrite the oldest step
+            row = self._start
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._resize(2 * self.capacity)
+            row = self._count
+            self._count += 1
+        return row
+    
+    def _fill_state(self, target: Dict[str, np.ndarray], state_arrays=None):
+        """Copy the vehicles' current state into one array per field"""
+        vehicles = self.vehicles
+        for name in self.STATE_COLUMNS:
+            if state_arrays is not None and name in state_arrays.FIELDS:
+                target[name][:] = state_arrays.column(name)
+            else:
+                target[name][:] = [getattr(vehicle, name) for vehicle in vehicles]
+        for name in self.CATEGORY_COLUMNS:
+            encode = self._categories[name].encode
+            target[name][:] = [encode(getattr(vehicle, name)) for vehicle in vehicles]
+    
+    def snapshot(self, time: float, state_arrays=None) -> StateFrame:
+        """Frame of the vehicles' current state that is not recorded in the history"""
+        columns = {name: np.zeros(len(self.vehicles), dtype=dtype) for name, dtype in self.STATE_COLUMNS.items()}
+        columns.update({name: np.zeros(len(self.vehicles), dtype=np.int8) for name in self.CATEGORY_COLUMNS})
+        self._fill_state(columns, state_arrays)
+        return StateFrame(time, self, columns)
+    
+    def append(self, time: float, actions: Dict, collisions: List[Tuple[str, str]], state_arrays=None) -> StateFrame:
+        """Record one step (states after integration, actions applied, collisions) and return its frame"""
+        row = self._next_row()
+        self._time[row] = time
+        self._collisions[row] = collisions or None
+        
+        columns = self._columns
+        frame_columns = {name: columns[name][row] for name in self.FRAME_COLUMNS}
+        self._fill_state(frame_columns, state_arrays)
+        
+        lanes, reasons = self._categories['lane'], self._categories['reason']
+        ordered = [actions[vid] for vid in self.vehicle_ids]
+        columns['action_acceleration'][row] = [action.acceleration for action in ordered]
+        columns['target_lane'][row] = [lanes.encode(action.target_lane) if action.target_lane is not None else -1
+                                       for action in ordered]
+        columns['emergency'][row] = [action.emergency for action in ordered]
+        columns['priority_override'][row] = [action.priority_override for action in ordered]
+        columns['reason'][row] = [reasons.encode(action.reason) for action in ordered]
+        return StateFrame(time, self, frame_columns)
+    
+    def extend(self, times: np.ndarray, states: Dict[str, np.ndarray], accelerations: np.ndarray,
+               reasons: Sequence[str], reason_index: np.ndarray) -> StateFrame:
+        """Record a block of collision-free steps without lane-change or emergency actions
+        
+        states maps each state column to a (steps x vehicles) array, or a per-vehicle
+        row for values that are constant over the block; categorical fields are taken
+        from the vehicles. reason_index selects each action's reason from reasons.
+        Returns the frame of the last step.
+        """
+        rows = np.array([self._next_row() for _ in range(len(times))], dtype=np.intp)
+        keep = slice(max(0, len(rows) - self.capacity), None)  # Older rows of a wrapped ring are gone
+        rows = rows[keep]
+        
+        columns = self._columns
+        self._time[rows] = times[keep]
+        self._collisions[rows] = None
+        for name in self.STATE_COLUMNS:
+            value = states[name]
+            columns[name][rows] = value[keep] if np.ndim(value) == 2 else value
+        for name in self.CATEGORY_COLUMNS:
+            encode = self._categories[name].encode
+            columns[name][rows] = [encode(getattr(vehicle, name)) for vehicle in self.vehicles]
+        
+        codes = np.array([self._categories['reason'].encode(reason) for reason in reasons], dtype=np.int32)
+        columns['action_acceleration'][rows] = accelerations[keep] if np.ndim(accelerations) == 2 else accelerations
+        columns['target_lane'][rows] = -1
+        columns['emergency'][rows] = False
+        columns['priority_override'][rows] = False
+        columns['reason'][rows] = codes[reason_index[keep]]
+        return self.frame(-1)
+    
+    def clear(self):
+        self._start = 0
+        self._count = 0
+        self._collisions[:] = None
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def _physical(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("history index out of range")
+        return (self._start + index) % self.capacity
+    
+    def _rows(self) -> np.ndarray:
+        return (self._start + np.arange(self._count)) % self.capacity
+    
+    def times(self) -> np.ndarray:
+        """Simulation time of every retained step, oldest first"""
+        return self._time[self._rows()]
+    
+    def column(self, name: str) -> np.ndarray:
+        """(steps x vehicles) array of one recorded field, oldest first"""
+        return self._columns[name][self._rows()]
+    
+    def collision_counts(self) -> np.ndarray:
+        return np.fromiter((len(c) if c else 0 for c in self._collisions[self._rows()]), dtype=int, count=self._count)
+    
+    def frame(self, index: int) -> StateFrame:
+        """Frame of a recorded step, sharing the stored columns"""
+        row = self._physical(index)
+        return StateFrame(float(self._time[row]), self,
+                          {name: self._columns[name][row] for name in self.FRAME_COLUMNS})
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(self._physical(i)) for i in range(*index.indices(self._count))]
+        return self._record(self._physical(index))
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for row in self._rows():
+            yield self._record(row)
+    
+    def _record(self, row: int) -> Dict:
+        """Rebuild the legacy per-step dict for one physical row"""
+        columns = self._columns
+        decoded = {name: [self._categories[name].decode(code) for code in columns[name][row].tolist()]
+                   for name in self.CATEGORY_COLUMNS}
+        state = {name: columns[name][row].tolist() for name in self.STATE_COLUMNS}
+        target_lanes = [self._categories['lane'].decode(code) for code in columns['target_lane'][row].tolist()]
+        reasons = [self._categories['reason'].decode(code) for code in columns['reason'][row].tolist()]
+        accelerations = columns['action_acceleration'][row].tolist()
+        emergencies = columns['emergency'][row].tolist()
+        overrides = columns['priority_override'][row].tolist()
+        
+        vehicles, actions = {}, {}
+        for k, vid in enumerate(self.vehicle_ids):
+            vehicles[vid] = {
+                'id': vid,
+                'role': decoded['role'][k],
+                'vehicle_type': decoded['vehicle_type'][k],
+                'x': state['x'][k],
+                'y': state['y'][k],
+                'velocity': state['velocity'][k],
+                'acceleration': state['acceleration'][k],
+                'lane': decoded['lane'][k],
+                'is_changing_lane': state['is_changing_lane'][k],
+                'length': float(self.length[k]),
+                'width': float(self.width[k]),
+                'color': decoded['color'][k],
+                'symbol': decoded['symbol'][k],
+                'emergency_braking': state['emergency_braking'][k]
+            }
+            action = self.action_type(
+                acceleration=accelerations[k],
+                target_lane=target_lanes[k],
+                emergency=emergencies[k],
+                reason=reasons[k],
+                priority_override=overrides[k]
+            )
+            actions[vid] = {'object': action, 'dict': action.to_dict()}
+        
+        return {
+            'time': float(self._time[row]),
+            'vehicles': vehicles,
+            'actions': actions,
+            'collisions': list(self._collisions[row] or [])
+        }
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Process-pool Monte Carlo runner for ensemble scenario sweeps
+"""
+
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+from .ensemble import EnsemblePlatooningSimulation
+
+@dataclass(frozen=True)
+class UniformDistribution:
+    """Per-replica parameter drawn uniformly from [low, high)"""
+    low: float
+    high: float
+    
+    def sample(self, rng: np.random.Generator) -> float:
+        return float(rng.uniform(self.low, self.high))
+
+@dataclass(frozen=True)
+class NormalDistribution:
+    """Per-replica parameter drawn from a normal distribution, clipped at zero"""
+    mean: float
+    std: float
+    
+    def sample(self, rng: np.random.Generator) -> float:
+        return max(0.0, float(rng.normal(self.mean, self.std)))
+
+Distribution = Union[UniformDistribution, NormalDistribution]
+
+# Parameters fixed for a whole ensemble (grid values only) and per-replica perturbation
+# parameters (grid values or a distribution sampled from the replica's own stream)
+ENSEMBLE_PARAMETERS = {'num_vehicles': 4, 'dt': 0.1}
+PERTURBATION_PARAMETERS = {'gap_std': 2.0, 'speed_std': 1.0, 'trigger_jitter': 10}
+
+def expand_grid(parameters: Dict[str, Union[Sequence, Distribution]]) -> List[Dict]:
+    """Cartesian product of the grid-valued parameters; distributions are carried as is"""
+    unknown = set(parameters) - set(ENSEMBLE_PARAMETERS) - set(PERTURBATION_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown Monte Carlo parameters: {sorted(unknown)}")
+    
+    names, axes = [], []
+    for name in sorted(parameters):
+        value = parameters[name]
+        if hasattr(value, 'sample'):
+            if name in ENSEMBLE_PARAMETERS:
+                raise ValueError(f"'{name}' is fixed per ensemble and cannot be drawn from a distribution")
+            axes.append([value])
+        else:
+            axes.append(list(value))
+        names.append(name)
+    
+    points = []
+    for values in itertools.product(*axes):
+        point = {**ENSEMBLE_PARAMETERS, **PERTURBATION_PARAMETERS}
+        point.update(zip(names, values))
+        points.append(point)
+    return points
+
+def replica_rng(seed: int, point_index: int, replica: int) -> np.random.Generator:
+    """Independent stream of one replica of a point, SeedSequence(seed).spawn(..)[point_index].spawn(..)[replica]"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(point_index, replica)))
+
+def run_shard(scenario: str, point_index: int, point: Dict, replicas: Sequence[int], seed: int,
+              duration: float, emergency_vehicle: str = "vehicle_0") -> List[Dict]:
+    """Run one contiguous block of replicas of a parameter point as a single ensemble
+    
+    Replicas in an ensemble never interact, so each summary depends only on its
+    point and replica indices and the master seed, not on how replicas were
+    sharded.
+    """
+    ensemble = EnsemblePlatooningSimulation(len(replicas), num_vehicles=int(point['num_vehicles']),
+                                            dt=float(point['dt']), scenario=scenario)
+    if scenario == "emergency":
+        ensemble.set_emergency_vehicle(emergency_vehicle)
+    
+    drawn = []
+    for row, replica in enumerate(replicas):
+        rng = replica_rng(seed, point_index, replica)
+        values = {name: point[name].sample(rng) if hasattr(point[name], 'sample') else point[name]
+                  for name in PERTURBATION_PARAMETERS}
+        values['trigger_jitter'] = int(values['trigger_jitter'])
+        ensemble.perturb(rng, rows=slice(row, row + 1), **values)
+        drawn.append(values)
+    
+    stats = ensemble.run(duration)
+    return [{
+        'replica': replica,
+        'point': point_index,
+        'parameters': drawn[row],
+        'safety_percentage': int(stats['safety_percentage'][row]),
+        'total_collisions': int(stats['total_collisions'][row]),
+        'emergency_events': int(stats['emergency_events'][row]),
+        'min_gap': float(stats['min_gap'][row])
+    } for row, replica in enumerate(replicas)]
+
+class MonteCarloRunner:
+    """Shard replicas of every parameter point across a process pool
+    
+    Replica r of point p draws from its own stream, keyed by (p, r) under the
+    master seed, so results are reproducible whatever the worker count or
+    shard size, and a point's first replicas do not change with the number of
+    replicas.
+    """
+    
+    def __init__(self, scenario: str = "emergency", parameters: Optional[Dict] = None, replicas: int = 100,
+                 duration: float = 60.0, seed: int = 0, workers: int = 1, shard_size: int = 64):
+        if scenario not in EnsemblePlatooningSimulation.SCENARIOS:
+            raise ValueError(f"Unsupported scenario '{scenario}', expected one of "
+                             f"{EnsemblePlatooningSimulation.SCENARIOS}")
+        self.scenario = scenario
+        self.points = expand_grid(parameters or {})
+        self.replicas = replicas
+        self.duration = duration
+        self.seed = seed
+        self.workers = max(1, workers)
+        self.shard_size = max(1, shard_size)
+    
+    def shards(self) -> Iterator[tuple]:
+        """(point index, point, replica indices) work units"""
+        for point_index, point in enumerate(self.points):
+            for start in range(0, self.replicas, self.shard_size):
+                stop = min(start + self.shard_size, self.replicas)
+                yield point_index, point, list(range(start, stop))
+    
+    def iter_results(self) -> Iterator[Dict]:
+        """Per-replica summaries, streamed as shards finish (completion order)"""
+        if self.workers == 1:
+            for point_index, point, replicas in self.shards():
+                yield from run_shard(self.scenario, point_index, point, replicas, self.seed, self.duration)
+            return
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(run_shard, self.scenario, point_index, point, replicas, self.seed,
+                                       self.duration)
+                       for point_index, point, replicas in self.shards()]
+            for future in as_completed(futures):
+                yield from future.result()
+    
+    def run(self) -> List[Dict]:
+        """All summaries ordered by point, then replica index"""
+        return sorted(self.iter_results(), key=lambda result: (result['point'], result['replica']))
+    
+    @staticmethod
+    def summarize(results: Sequence[Dict]) -> Dict:
+        """Aggregate statistics over a set of replica summaries"""
+        if not results:
+            return {'runs': 0, 'collision_rate': 0.0, 'mean_collisions': 0.0,
+                    'mean_emergency_events': 0.0, 'min_gap': float('inf')}
+        collisions = np.array([result['total_collisions'] for result in results])
+        return {
+            'runs': len(results),
+            'collision_rate': float(np.mean(collisions > 0)),
+            'mean_collisions': float(collisions.mean()),
+            'mean_emergency_events': float(np.mean([result['emergency_events'] for result in results])),
+            'min_gap': float(min(result['min_gap'] for result in results))
+        }
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Per-lane spatial index for neighbour queries
+"""
+
+import bisect
+import heapq
+import numpy as np
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .vehicle_state import LANE_CENTER_Y
+
+# Band boundaries halfway between lane centres; a vehicle is filed under the
+# band containing its current y, so vehicles mid lane change move between bands
+BAND_EDGES = ((LANE_CENTER_Y[:-1] + LANE_CENTER_Y[1:]) / 2).tolist()
+
+def closest_ahead(x: np.ndarray, y: np.ndarray, length: np.ndarray,
+                  lateral_limit: float = 4.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest vehicle ahead in each row of (K x N) position arrays (all-pairs, for small N)
+    
+    Same predicate as the controllers' linear scan: bumper gap x_j - x_i - length_i
+    > 0 and lateral offset below lateral_limit, lowest index winning ties.
+    Returns the (K x N) index of that vehicle and the gap, inf where there is none.
+    """
+    length = np.broadcast_to(length, x.shape)
+    count = x.shape[1]
+    distance = (x[:, None, :] - x[:, :, None]) - length[:, :, None]
+    lateral = np.abs(y[:, None, :] - y[:, :, None])
+    candidate = (lateral < lateral_limit) & (distance > 0)
+    candidate[:, np.arange(count), np.arange(count)] = False
+    distance = np.where(candidate, distance, np.inf)
+    
+    closest = np.argmin(distance, axis=2)
+    return closest, np.take_along_axis(distance, closest[..., None], axis=2)[..., 0]
+
+def _slack(value: float) -> float:
+    """Widening that keeps range queries a superset of the exact float predicates"""
+    return 1e-9 * (1.0 + abs(value))
+
+class LaneIndex:
+    """Vehicles bucketed by lane band and sorted by longitudinal position
+    
+    Queries return candidates only; callers apply their exact predicates, so
+    results are identical to a linear scan over the same vehicles.
+    """
+    
+    def __init__(self):
+        self.source = None
+        self._keys: List[List[float]] = [[] for _ in range(len(BAND_EDGES) + 1)]
+        self._entries: List[List[Tuple[float, int, object]]] = [[] for _ in range(len(BAND_EDGES) + 1)]
+    
+    def rebuild(self, vehicles: Sequence, x: Optional[np.ndarray] = None,
+                y: Optional[np.ndarray] = None, source=None):
+        """Re-file all vehicles; x/y default to the vehicles' current coordinates"""
+        count = len(vehicles)
+        if x is None:
+            x = np.fromiter((vehicle.x for vehicle in vehicles), dtype=float, count=count)
+        if y is None:
+            y = np.fromiter((vehicle.y for vehicle in vehicles), dtype=float, count=count)
+        
+        bands = np.searchsorted(BAND_EDGES, y, side='right')
+        order = np.lexsort((np.arange(count), x, bands))
+        sorted_bands = bands[order]
+        sorted_x = x[order].tolist()
+        order = order.tolist()
+        
+        start = 0
+        for band in range(len(self._keys)):
+            stop = int(np.searchsorted(sorted_bands, band, side='right'))
+            self._keys[band] = sorted_x[start:stop]
+            self._entries[band] = [(sorted_x[k], order[k], vehicles[order[k]]) for k in range(start, stop)]
+            start = stop
+        self.source = source
+    
+    def _bands(self, y_lo: float, y_hi: float) -> range:
+        first = bisect.bisect_right(BAND_EDGES, y_lo - _slack(y_lo))
+        last = bisect.bisect_right(BAND_EDGES, y_hi + _slack(y_hi))
+        return range(first, last + 1)
+    
+    def window(self, x_lo: float, x_hi: float, y_lo: float, y_hi: float) -> List:
+        """Vehicles that may lie in [x_lo, x_hi] x [y_lo, y_hi], in insertion order"""
+        found = []
+        for band in self._bands(y_lo, y_hi):
+            keys = self._keys[band]
+            start = bisect.bisect_left(keys, x_lo - _slack(x_lo))
+            stop = bisect.bisect_right(keys, x_hi + _slack(x_hi))
+            found.extend(self._entries[band][start:stop])
+        found.sort(key=lambda entry: entry[1])
+        return [entry[2] for entry in found]
+    
+    def ahead(self, x: float, y_lo: float, y_hi: float) -> Iterator[Tuple[int, object]]:
+        """(insertion order, vehicle) from x forwards, nearest first"""
+        streams = []
+        for band in self._bands(y_lo, y_hi):
+            entries = self._entries[band]
+            start = bisect.bisect_left(self._keys[band], x - _slack(x))
+            streams.append(map(entries.__getitem__, range(start, len(entries))))
+        for _, order, vehicle in heapq.merge(*streams):
+            yield order, vehicle
+    
+    def behind(self, x: float, y_lo: float, y_hi: float) -> Iterator[Tuple[int, object]]:
+        """(insertion order, vehicle) from x backwards, nearest first"""
+        streams = []
+        for band in self._bands(y_lo, y_hi):
+            entries = self._entries[band]
+            stop = bisect.bisect_right(self._keys[band], x + _slack(x))
+            streams.append(map(entries.__getitem__, range(stop - 1, -1, -1)))
+        for _, order, vehicle in heapq.merge(*streams, key=lambda entry: (-entry[0], entry[1])):
+            yield order, vehicle
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Struct-of-arrays storage for enhanced vehicle state
+"""
+
+import numpy as np
+from typing import Callable, Optional
+
+# Lane centre y-coordinates indexed by Lane.value (RIGHT, MIDDLE, LEFT)
+LANE_CENTER_Y = np.array([-4.0, 0.0, 4.0])
+MAX_VELOCITY = 30.0
+
+class VehicleStateArrays:
+    """Contiguous per-field arrays holding the dynamic state of every vehicle"""
+    
+    FIELDS = {
+        'x': np.float64,
+        'y': np.float64,
+        'velocity': np.float64,
+        'acceleration': np.float64,
+        'lane': np.int8,
+        'previous_lane': np.int8,
+        'lane_target_y': np.float64,
+        'is_changing_lane': np.bool_,
+        'lane_change_progress': np.float64,
+        'lane_change_speed': np.float64,
+        'length': np.float64,
+        'width': np.float64,
+    }
+    
+    def __init__(self, capacity: int = 0):
+        self.size = 0
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+    
+    @property
+    def capacity(self) -> int:
+        return len(self.x)
+    
+    def allocate(self) -> int:
+        """Reserve the next free row and return its index"""
+        if self.size == self.capacity:
+            self._grow(max(1, 2 * self.capacity))
+        row = self.size
+        self.size += 1
+        return row
+    
+    def column(self, name: str) -> np.ndarray:
+        """Live view of one field over all allocated rows"""
+        return getattr(self, name)[:self.size]
+    
+    def integrate(self, dt: float):
+        """Advance every vehicle by dt; bit-for-bit equal to EnhancedVehicle.update_position"""
+        n = self.size
+        velocity = self.velocity[:n]
+        velocity += self.acceleration[:n] * dt
+        # Same semantics as max(0, min(v, 30.0)), including NaN -> 0
+        np.minimum(velocity, MAX_VELOCITY, out=velocity)
+        velocity[~(velocity > 0)] = 0.0
+        self.x[:n] += velocity * dt
+        
+        changing = np.flatnonzero(self.is_changing_lane[:n])
+        if changing.size == 0:
+            return
+        
+        progress = self.lane_change_progress[changing] + self.lane_change_speed[changing] * dt
+        done = progress >= 1.0
+        
+        finished = changing[done]
+        self.is_changing_lane[finished] = False
+        self.lane_change_progress[finished] = 0.0
+        self.y[finished] = self.lane_target_y[finished]
+        
+        ongoing = changing[~done]
+        start_y = LANE_CENTER_Y[self.previous_lane[ongoing]]
+        self.lane_change_progress[ongoing] = progress[~done]
+        self.y[ongoing] = start_y + (self.lane_target_y[ongoing] - start_y) * progress[~done]
+    
+    def _grow(self, capacity: int):
+        for name, dtype in self.FIELDS.items():
+            grown = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+class StateField:
+    """Vehicle attribute stored on the instance or in a bound VehicleStateArrays row"""
+    
+    def __init__(self, decode: Callable = float, encode: Optional[Callable] = None):
+        self.decode = decode
+        self.encode = encode
+        self.name = None
+    
+    def __set_name__(self, owner, name: str):
+        self.name = name
+    
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        store = obj._state
+        if store is None:
+            return obj.__dict__[self.name]
+        return self.decode(getattr(store, self.name)[obj._row])
+    
+    def __set__(self, obj, value):
+        store = obj._state
+        if store is None:
+            obj.__dict__[self.name] = value
+        else:
+            getattr(store, self.name)[obj._row] = self.encode(value) if self.encode else value
\ No newline at end of file
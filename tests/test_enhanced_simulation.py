@@ -0,0 +1,371 @@
+"""
+Tests for the enhanced multi-lane platooning simulation
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pytest
+from src.simulation.enhanced_environment import EnhancedPlatooningSimulation, EnhancedVehicle, VehicleRole, Lane
+from src.simulation.vehicle_state import VehicleStateArrays
+from src.simulation.spatial_index import LaneIndex
+from src.simulation.collision import find_overlapping_pairs
+from src.simulation.ensemble import EnsemblePlatooningSimulation
+
+def _run_emergency_scenario(backend: str, num_vehicles: int = 6, steps: int = 150):
+    """Run an emergency scenario and return the final simulation"""
+    sim = EnhancedPlatooningSimulation(num_vehicles=num_vehicles, scenario="emergency", backend=backend)
+    sim.set_emergency_vehicle("vehicle_0")
+    for step in range(steps):
+        sim.step()
+        if step == 30:
+            sim.trigger_emergency()
+    return sim
+
+def _run_priority_scenario(indexed: bool, num_vehicles: int = 12, steps: int = 300):
+    """Run a dense priority scenario, optionally bypassing the lane index"""
+    sim = EnhancedPlatooningSimulation(num_vehicles=num_vehicles, scenario="priority")
+    if not indexed:
+        for controller in sim.controllers.values():
+            controller.lane_index = None
+    trace = []
+    for step in range(steps):
+        sim.step()
+        if step == 20:
+            sim.set_priority_vehicle(f"vehicle_{num_vehicles - 2}")
+        trace.append([(v['x'], v['y'], v['velocity']) for v in sim.history[-1]['vehicles'].values()])
+        trace.append([a['dict'] for a in sim.history[-1]['actions'].values()])
+    return trace
+
+def _vehicle_snapshot(sim):
+    return [(v.x, v.y, v.velocity, v.acceleration, v.lane, v.is_changing_lane, v.lane_change_progress)
+            for v in sim.vehicles.values()]
+
+class TestStateArraysBackend:
+    """Struct-of-arrays vehicle state backend"""
+    
+    def test_vehicles_are_views_onto_arrays(self):
+        """Writes through a vehicle land in the shared arrays"""
+        sim = EnhancedPlatooningSimulation(num_vehicles=3, backend="arrays")
+        vehicle = sim.vehicles["vehicle_1"]
+        
+        vehicle.x = 123.0
+        vehicle.lane = Lane.LEFT
+        
+        assert sim.state_arrays.x[1] == 123.0
+        assert sim.state_arrays.lane[1] == Lane.LEFT.value
+        assert vehicle.lane is Lane.LEFT
+        assert np.array_equal(sim.state_arrays.column('velocity'), [20.0, 20.0, 20.0])
+    
+    def test_arrays_backend_matches_objects(self):
+        """Both backends produce identical trajectories"""
+        objects_sim = _run_emergency_scenario("objects")
+        arrays_sim = _run_emergency_scenario("arrays")
+        
+        assert _vehicle_snapshot(objects_sim) == _vehicle_snapshot(arrays_sim)
+        assert objects_sim.get_safety_stats() == arrays_sim.get_safety_stats()
+    
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError):
+            EnhancedPlatooningSimulation(backend="gpu")
+
+class TestBatchedIntegration:
+    """Vectorized physics integration"""
+    
+    def test_integrate_is_bit_identical_to_scalar_path(self):
+        """Clamp, position update and lane-change interpolation match update_position exactly"""
+        rng = np.random.default_rng(7)
+        lanes = list(Lane)
+        store = VehicleStateArrays()
+        bound, scalar = [], []
+        for i in range(200):
+            velocity, lane_change_speed = rng.uniform(-1.0, 31.0), rng.uniform(0.5, 3.0)
+            pair = []
+            for _ in range(2):
+                vehicle = EnhancedVehicle(f"vehicle_{i}", VehicleRole.FOLLOWER, initial_lane=lanes[i % 3])
+                vehicle.velocity = velocity
+                vehicle.lane_change_speed = lane_change_speed
+                if i % 2:
+                    vehicle.initiate_lane_change(lanes[(i + 1) % 3])
+                pair.append(vehicle)
+            pair[0].bind_state(store, store.allocate())
+            bound.append(pair[0])
+            scalar.append(pair[1])
+        
+        for _ in range(40):
+            accelerations = rng.uniform(-8.0, 3.0, size=len(bound))
+            for vehicle, other, a in zip(bound, scalar, accelerations):
+                vehicle.acceleration = other.acceleration = float(a)
+            store.integrate(0.1)
+            for vehicle in scalar:
+                vehicle.update_position(0.1)
+        
+        for name in ('x', 'y', 'velocity', 'is_changing_lane', 'lane_change_progress'):
+            expected = np.array([getattr(vehicle, name) for vehicle in scalar], dtype=float)
+            assert np.array_equal(store.column(name).astype(float), expected), name
+
+class TestLaneIndex:
+    """Per-lane sorted spatial index"""
+    
+    def test_window_and_ahead_queries(self):
+        """Range queries return candidates in insertion order, ahead walks nearest first"""
+        vehicles = [EnhancedVehicle(f"vehicle_{i}", VehicleRole.FOLLOWER, initial_lane=lane)
+                    for i, lane in enumerate([Lane.MIDDLE, Lane.LEFT, Lane.MIDDLE, Lane.RIGHT, Lane.MIDDLE])]
+        for vehicle, x in zip(vehicles, [40.0, 10.0, 10.0, 25.0, 70.0]):
+            vehicle.x = x
+        vehicles[4].y = 1.5  # Drifting towards the left lane
+        
+        index = LaneIndex()
+        index.rebuild(vehicles)
+        
+        assert [v.id for v in index.window(0.0, 50.0, -1.0, 1.0)] == ["vehicle_0", "vehicle_2"]
+        assert [v.id for v in index.window(0.0, 100.0, -4.0, 4.0)] == [f"vehicle_{i}" for i in range(5)]
+        assert [v.id for _, v in index.ahead(20.0, -1.0, 1.0)] == ["vehicle_0", "vehicle_4"]
+        assert [v.id for _, v in index.behind(20.0, 0.0, 4.0)] == ["vehicle_1", "vehicle_2"]
+    
+    def test_indexed_controllers_match_linear_scan(self):
+        """Dense priority scenario gives identical trajectories and decisions with and without the index"""
+        assert _run_priority_scenario(indexed=True) == _run_priority_scenario(indexed=False)
+    
+    def test_indexed_emergency_matches_linear_scan(self):
+        indexed = _run_emergency_scenario("objects", num_vehicles=18)
+        unindexed = EnhancedPlatooningSimulation(num_vehicles=18, scenario="emergency")
+        for controller in unindexed.controllers.values():
+            controller.lane_index = None
+        unindexed.set_emergency_vehicle("vehicle_0")
+        for step in range(150):
+            unindexed.step()
+            if step == 30:
+                unindexed.trigger_emergency()
+        
+        assert _vehicle_snapshot(indexed) == _vehicle_snapshot(unindexed)
+
+class TestCollisionDetection:
+    """Sweep-and-prune collision check"""
+    
+    @staticmethod
+    def _pairwise_collisions(vehicles):
+        """Reference all-pairs bounding-box test"""
+        collisions = []
+        for i in range(len(vehicles)):
+            for j in range(i + 1, len(vehicles)):
+                x1_min, x1_max, y1_min, y1_max = vehicles[i].get_bounding_box()
+                x2_min, x2_max, y2_min, y2_max = vehicles[j].get_bounding_box()
+                margin = 0.3
+                x_overlap = (x1_min - margin) < (x2_max + margin) and (x1_max + margin) > (x2_min - margin)
+                y_overlap = (y1_min - margin) < (y2_max + margin) and (y1_max + margin) > (y2_min - margin)
+                if x_overlap and y_overlap:
+                    collisions.append((vehicles[i].id, vehicles[j].id))
+        return collisions
+    
+    def test_sweep_matches_pairwise_test(self):
+        """Dense random traffic yields exactly the pairwise collision list"""
+        rng = np.random.default_rng(3)
+        for backend in EnhancedPlatooningSimulation.BACKENDS:
+            sim = EnhancedPlatooningSimulation(num_vehicles=300, backend=backend)
+            for vehicle in sim.vehicles.values():
+                vehicle.x = rng.uniform(0.0, 400.0)
+                vehicle.y = rng.choice([-4.0, -2.0, 0.0, 1.0, 4.0])
+            vehicles = list(sim.vehicles.values())
+            vehicles[1].x = vehicles[2].x  # Exact tie on the sweep axis
+            
+            expected = self._pairwise_collisions(vehicles)
+            assert len(expected) > 10
+            assert sim._check_collisions() == expected
+    
+    def test_no_pairs(self):
+        pairs = find_overlapping_pairs(np.array([0.0, 100.0]), np.zeros(2), np.full(2, 4.5), np.full(2, 1.8))
+        assert pairs.shape == (0, 2)
+
+class TestHistoryStore:
+    """Columnar history store"""
+    
+    def test_compatibility_view_matches_live_state(self):
+        """Each recorded step reads back in the legacy dict shape with the same values"""
+        sim = EnhancedPlatooningSimulation(num_vehicles=5, scenario="priority")
+        for step in range(60):
+            sim.step()
+            
+            record = sim.history[-1]
+            assert record['vehicles'] == {vid: sim._get_vehicle_state(vid) for vid in sim.vehicles}
+            assert record['collisions'] == []
+            for action_data in record['actions'].values():
+                assert action_data['dict'] == action_data['object'].to_dict()
+            
+            if step == 20:
+                sim.set_priority_vehicle("vehicle_3")
+        
+        assert len(sim.history) == 60
+        assert [step['time'] for step in sim.history] == pytest.approx([i * 0.1 for i in range(60)])
+        assert sim.history[0]['vehicles']['vehicle_3']['symbol'] == "🚗"
+        assert sim.history[-1]['vehicles']['vehicle_3']['symbol'] == "🚑"
+    
+    def test_ring_buffer_retention(self):
+        """A bounded store keeps only the most recent steps"""
+        sim = EnhancedPlatooningSimulation(num_vehicles=3, history_limit=50)
+        for _ in range(120):
+            sim.step()
+        
+        assert len(sim.history) == 50
+        assert sim.history.times() == pytest.approx([i * 0.1 for i in range(70, 120)])
+        assert sim.history[0]['time'] == pytest.approx(7.0)
+        assert sim.history.column('x').shape == (50, 3)
+        
+        sim.history.clear()
+        assert not sim.history
+
+class TestHeadlessRun:
+    """run() without per-step history"""
+    
+    def test_headless_matches_recorded_run(self):
+        """Same trajectories and summary, with nothing recorded"""
+        recorded = EnhancedPlatooningSimulation(num_vehicles=6, scenario="emergency")
+        recorded.set_emergency_vehicle("vehicle_0")
+        headless = EnhancedPlatooningSimulation(num_vehicles=6, scenario="emergency")
+        headless.set_emergency_vehicle("vehicle_0")
+        
+        recorded_stats = recorded.run(duration=20.0)
+        headless_stats = headless.run(duration=20.0, record_history=False)
+        
+        assert len(headless.history) == 0
+        assert len(recorded.history) == 200
+        assert headless_stats == recorded_stats == recorded.get_safety_stats()
+        assert recorded_stats['emergency_events'] == int(recorded.history.column('emergency').any(axis=1).sum())
+        assert _vehicle_snapshot(headless) == _vehicle_snapshot(recorded)
+        assert 0 < headless_stats['min_gap'] < float('inf')
+    
+    def test_first_collision_time(self):
+        sim = EnhancedPlatooningSimulation(num_vehicles=3)
+        sim.step()
+        sim.vehicles["vehicle_1"].x = sim.vehicles["vehicle_0"].x - 3.0  # Same lane, overlapping the leader
+        sim.invalidate_frame()
+        for _ in range(3):
+            sim.step()
+        
+        stats = sim.get_safety_stats()
+        assert stats['first_collision_time'] == pytest.approx(0.1)
+        assert stats['total_collisions'] >= 1
+        assert stats['safety_percentage'] == max(0, 100 - 20 * stats['total_collisions'])
+
+class TestQuiescenceSkipping:
+    """Steady-state stretches advanced in single jumps"""
+    
+    @staticmethod
+    def _run(skip_quiescent: bool, **kwargs):
+        scenario = kwargs.pop('scenario', "basic")
+        record_history = kwargs.pop('record_history', True)
+        sim = EnhancedPlatooningSimulation(scenario=scenario, **kwargs)
+        if scenario == "emergency":
+            sim.set_emergency_vehicle("vehicle_1")
+        stats = sim.run(duration=120.0, record_history=record_history, skip_quiescent=skip_quiescent)
+        records = [(step['time'], step['vehicles'], {vid: a['dict'] for vid, a in step['actions'].items()},
+                    step['collisions']) for step in sim.history]
+        return sim, stats, records
+    
+    @pytest.mark.parametrize("kwargs", [
+        {'num_vehicles': 5},
+        {'num_vehicles': 6, 'backend': "arrays", 'history_limit': 40},
+        {'num_vehicles': 6, 'record_history': False},
+        {'num_vehicles': 6, 'scenario': "emergency"},
+    ])
+    def test_skipping_matches_stepping(self, kwargs):
+        """History, statistics and final state are identical with and without jumps"""
+        stepped, stepped_stats, stepped_records = self._run(False, **dict(kwargs))
+        skipped, skipped_stats, skipped_records = self._run(True, **dict(kwargs))
+        
+        assert skipped_records == stepped_records
+        assert skipped_stats == stepped_stats
+        assert _vehicle_snapshot(skipped) == _vehicle_snapshot(stepped)
+        assert skipped.time == stepped.time
+        if kwargs.get('scenario') != "emergency":
+            assert skipped.skipped_steps > 600  # Most of the 1200 steps
+    
+    def test_no_jump_while_changing_lane(self):
+        sim = EnhancedPlatooningSimulation(num_vehicles=3)
+        sim.vehicles["vehicle_2"].initiate_lane_change(Lane.MIDDLE)
+        assert sim._skip_quiescent(100) == 0
+
+class TestStateFrame:
+    """Immutable per-step frame shared by controllers and history"""
+    
+    def test_controllers_read_the_recorded_frame(self):
+        """The frame recorded at the end of a step is what controllers see on the next one"""
+        sim = EnhancedPlatooningSimulation(num_vehicles=3)
+        seen = []
+        controller = sim.controllers["vehicle_1"]
+        compute_action = controller.compute_action
+        controller.compute_action = lambda states, now: seen.append(states) or compute_action(states, now)
+        
+        sim.step()
+        recorded = sim.history.frame(-1)
+        sim.step()
+        
+        assert seen[1]['vehicle_0']['x'] == recorded['vehicle_0']['x'] == sim.history[0]['vehicles']['vehicle_0']['x']
+        assert seen[1]['vehicle_2']['object'] is sim.vehicles['vehicle_2']
+        assert dict(seen[1]['vehicle_2']) == {'object': sim.vehicles['vehicle_2'], **sim.history[0]['vehicles']['vehicle_2']}
+    
+    def test_frame_is_immutable(self):
+        sim = EnhancedPlatooningSimulation(num_vehicles=2)
+        sim.step()
+        frame = sim.history.frame(-1)
+        
+        with pytest.raises(ValueError):
+            frame.column('x')[0] = 0.0
+        with pytest.raises(TypeError):
+            frame['vehicle_0']['x'] = 0.0
+    
+    def test_scenario_changes_refresh_the_frame(self):
+        """Triggering an emergency between steps is visible in the next frame"""
+        sim = EnhancedPlatooningSimulation(num_vehicles=3, scenario="emergency")
+        sim.set_emergency_vehicle("vehicle_0")
+        sim.step()
+        sim.trigger_emergency()
+        
+        assert sim._get_vehicle_states()['vehicle_0']['emergency_braking'] is True
+        sim.step()
+        assert sim.history[-1]['vehicles']['vehicle_0']['emergency_braking'] is True
+
+class TestEnsemble:
+    """Lockstep ensemble of independent platoons"""
+    
+    def test_replicas_match_serial_runs(self):
+        """Each replica reproduces a serial run from the same perturbed start"""
+        ensemble = EnsemblePlatooningSimulation(12, num_vehicles=8, scenario="emergency")
+        ensemble.perturb(np.random.default_rng(5), gap_std=6.0, speed_std=3.0)
+        ensemble.set_emergency_vehicle("vehicle_0")
+        initial_x, initial_velocity = ensemble.x.copy(), ensemble.velocity.copy()
+        
+        stats = ensemble.run(duration=20.0)
+        assert stats['total_collisions'].any()
+        
+        for k in range(ensemble.num_replicas):
+            sim = EnhancedPlatooningSimulation(num_vehicles=8, scenario="emergency")
+            for i, vehicle in enumerate(sim.vehicles.values()):
+                vehicle.x = float(initial_x[k, i])
+                vehicle.velocity = float(initial_velocity[k, i])
+            sim.set_emergency_vehicle("vehicle_0")
+            
+            min_gap = float('inf')
+            for step in range(200):
+                sim.step()
+                if step == ensemble.trigger_steps[k]:
+                    sim.trigger_emergency()
+                states = sim._get_vehicle_states()
+                for controller in sim.controllers.values():
+                    min_gap = min(min_gap, controller._find_closest_vehicle(states)[1])
+            
+            assert np.array_equal([v.x for v in sim.vehicles.values()], ensemble.x[k])
+            assert np.array_equal([v.y for v in sim.vehicles.values()], ensemble.y[k])
+            serial = sim.get_safety_stats()
+            assert serial['total_collisions'] == stats['total_collisions'][k]
+            assert serial['emergency_events'] == stats['emergency_events'][k]
+            assert min_gap == stats['min_gap'][k]
+    
+    def test_priority_scenario_rejected(self):
+        with pytest.raises(ValueError):
+            EnsemblePlatooningSimulation(4, scenario="priority")
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+Tests for the formal verification engine
+"""
+
+import sys
+import os
+import time
+from dataclasses import replace
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pytest
+from src.core.verified_controller import FormalPlatooningController, SafetyParameters
+from src.formal.proof_checker import FormalProofChecker
+from src.formal.reachability import ReachabilityEngine, _travel
+from src.formal.proof_cache import ProofCache, proof_key
+from src.formal.parameter_search import ParameterSpaceCertifier, find_collision, SAFE, UNSAFE
+from src.formal.falsification import simulate_scenarios
+from src.core.safety_kernels import safe_distance
+from src.simulation.environment import PlatooningSimulation
+
+def controller_step(params, gap, v_ego, v_pred, rng, dt=0.1):
+    """One control period of the real follower controller against a random predecessor"""
+    # The follower sees the predecessor as it was up to one delay ago, with sensor error
+    delay = rng.uniform(0, params.communication_delay)
+    v_past = min(max(v_pred - rng.uniform(-params.max_deceleration, params.max_acceleration) * delay, 0), 30.0)
+    error = rng.uniform(-params.sensor_error_bound, params.sensor_error_bound, size=2)
+    states = {
+        'vehicle_0': {'position': gap - (v_pred + v_past) / 2 * delay + error[0],
+                      'velocity': v_past + error[1], 'timestamp': 1.0},
+        'vehicle_1': {'position': 0.0, 'velocity': v_ego, 'timestamp': 1.0}
+    }
+    controller = FormalPlatooningController("vehicle_1")
+    controller.safety_params = params
+    controller.update_state(0.0, v_ego, 0.0)
+    accel = controller.compute_verified_action(states, 1.0).acceleration
+    
+    lead_accel = rng.uniform(-params.max_deceleration, params.max_acceleration)
+    return np.array([gap + _travel(v_pred, lead_accel, dt) - _travel(v_ego, accel, dt),
+                     min(max(v_ego + accel * dt, 0), 30.0),
+                     min(max(v_pred + lead_accel * dt, 0), 30.0)])
+
+class TestReachability:
+    """Interval reachability of the follower loop"""
+    
+    def test_standard_parameters_verified(self):
+        """The default parameters are proven collision free at configuration-time speed"""
+        checker = FormalProofChecker()
+        started = time.time()
+        assert checker.verify_collision_freedom(SafetyParameters())
+        assert time.time() - started < 1.0
+        
+        result = checker.last_result
+        assert result.verified and result.counterexample is None
+        assert result.gap_floor > 0 and result.invariant_floor == 2 * result.gap_floor
+        assert checker.verified_properties == ['collision_freedom']
+    
+    def test_unsafe_parameters_rejected(self):
+        """Without reaction-time margin one control period of acceleration is unaccounted for"""
+        checker = FormalProofChecker(ReachabilityEngine(max_cells=50_000))
+        assert not checker.verify_collision_freedom({'max_deceleration': 4.0, 'reaction_time': 0.0,
+                                                     'min_safe_distance': 3.0})
+        lo, hi = checker.last_result.counterexample
+        assert lo.shape == hi.shape == (3,) and np.all(lo <= hi)
+        assert checker.verified_properties == []
+        
+        # Too shallow a subdivision proves nothing either
+        assert not ReachabilityEngine(max_depth=2).verify(SafetyParameters()).verified
+    
+    def test_successors_contain_controller_transitions(self):
+        """Concrete steps of the real controller stay inside the computed successor boxes"""
+        engine, params, dt = ReachabilityEngine(), SafetyParameters(), 0.1
+        lo = np.array([[0.5, 0.0, 0.0], [5.0, 10.0, 10.0], [20.0, 25.0, 5.0]])
+        hi = np.array([[3.0, 5.0, 5.0], [15.0, 20.0, 20.0], [60.0, 30.0, 15.0]])
+        next_lo, next_hi = engine.successors(lo, hi, params)
+        
+        rng = np.random.default_rng(16)
+        for _ in range(2000):
+            box = rng.integers(len(lo))
+            gap, v_ego, v_pred = rng.uniform(lo[box], hi[box])
+            
+            # The follower sees the predecessor as it was up to one delay ago, with sensor error
+            delay = rng.uniform(0, params.communication_delay)
+            v_past = min(max(v_pred - rng.uniform(-params.max_deceleration, params.max_acceleration) * delay, 0), 30.0)
+            error = rng.uniform(-params.sensor_error_bound, params.sensor_error_bound, size=2)
+            states = {
+                'vehicle_0': {'position': gap - (v_pred + v_past) / 2 * delay + error[0],
+                              'velocity': v_past + error[1], 'timestamp': 1.0},
+                'vehicle_1': {'position': 0.0, 'velocity': v_ego, 'timestamp': 1.0}
+            }
+            controller = FormalPlatooningController("vehicle_1")
+            controller.update_state(0.0, v_ego, 0.0)
+            accel = controller.compute_verified_action(states, 1.0).acceleration
+            
+            lead_accel = rng.uniform(-params.max_deceleration, params.max_acceleration)
+            state = np.array([gap + _travel(v_pred, lead_accel, dt) - _travel(v_ego, accel, dt),
+                              min(max(v_ego + accel * dt, 0), 30.0),
+                              min(max(v_pred + lead_accel * dt, 0), 30.0)])
+            assert np.all(state >= next_lo[box]) and np.all(state <= next_hi[box])
+    
+    def test_parameter_box_covers_every_member(self):
+        """Successors over a parameter box contain the transitions of each parameter set in it"""
+        engine = ReachabilityEngine()
+        low = SafetyParameters(max_deceleration=3.0, reaction_time=0.1, min_safe_distance=2.0, communication_delay=0.0)
+        high = SafetyParameters(max_deceleration=6.0, reaction_time=0.4, min_safe_distance=4.0, communication_delay=0.2)
+        lo, hi = np.array([[2.0, 10.0, 8.0]]), np.array([[12.0, 20.0, 18.0]])
+        next_lo, next_hi = engine.successors(lo, hi, low, high)
+        
+        rng = np.random.default_rng(18)
+        for _ in range(2000):
+            params = SafetyParameters(max_deceleration=rng.uniform(3.0, 6.0), reaction_time=rng.uniform(0.1, 0.4),
+                                      min_safe_distance=rng.uniform(2.0, 4.0),
+                                      communication_delay=rng.uniform(0.0, 0.2))
+            state = controller_step(params, *rng.uniform(lo[0], hi[0]), rng)
+            assert np.all(state >= next_lo[0]) and np.all(state <= next_hi[0])
+        
+        assert engine.verify_box(SafetyParameters(max_deceleration=3.95), SafetyParameters(max_deceleration=4.05)).verified
+
+class TestIncrementalChecker:
+    """Re-discharging proofs after a calibration change"""
+    
+    class CountingEngine(ReachabilityEngine):
+        def __init__(self):
+            super().__init__()
+            self.checked = 0
+        
+        def discharge(self, paving, low, high, floor):
+            result, final = super().discharge(paving, low, high, floor)
+            self.checked += result.cells
+            return result, final
+    
+    def test_matches_fresh_proofs(self):
+        engine = self.CountingEngine()
+        incremental, fresh = FormalProofChecker(engine), FormalProofChecker(incremental=False)
+        params = SafetyParameters()
+        for name, value in [('reaction_time', 0.25), ('reaction_time', 0.21), ('reaction_time', 0.15),
+                            ('reaction_time', 0.12), ('reaction_time', 0.2), ('communication_delay', 0.15),
+                            ('sensor_error_bound', 0.05), ('min_safe_distance', 4.0)]:
+            params = replace(params, **{name: value})
+            assert incremental.verify_collision_freedom(params) == fresh.verify_collision_freedom(params)
+            assert incremental.last_result.invariant_floor == fresh.last_result.invariant_floor
+        assert incremental.reused and incremental.rechecked
+    
+    def test_monotone_changes_check_nothing(self, tmp_path):
+        engine = self.CountingEngine()
+        checker = FormalProofChecker(engine, ProofCache(str(tmp_path)))
+        assert checker.verify_collision_freedom(SafetyParameters())
+        checked = engine.checked
+        # A longer reaction time and fresher, cleaner readings only help a proven controller
+        safer = SafetyParameters(reaction_time=0.3, communication_delay=0.05, sensor_error_bound=0.05)
+        assert checker.verify_collision_freedom(safer)
+        assert engine.checked == checked and checker.reused == 1
+        # The verdict is marked as carried over, and not cached as a proof of the new parameters
+        assert checker.last_result.reused and not checker._obligations[2].result.reused
+        assert proof_key(safer, engine) not in checker.cache
+        
+        # A shorter reaction time re-checks only the boxes touching the invariant
+        assert checker.verify_collision_freedom(SafetyParameters(reaction_time=0.21))
+        assert checker.rechecked == 1 and engine.checked - checked < checked
+
+class TestProofCache:
+    """Persistent proof memoization"""
+    
+    def test_proofs_reused_across_checkers(self, tmp_path):
+        """A second process start reads the proof instead of re-running the engine"""
+        first = FormalProofChecker(cache=ProofCache(str(tmp_path)))
+        assert first.verify_collision_freedom(SafetyParameters())
+        
+        class NoEngine(ReachabilityEngine):
+            def verify(self, params, floor=None):
+                raise AssertionError("proof should come from the cache")
+        
+        cache = ProofCache(str(tmp_path))
+        second = FormalProofChecker(NoEngine(), cache)
+        for _ in range(1000):
+            assert second.verify_collision_freedom({'max_deceleration': 4.0, 'reaction_time': 0.2,
+                                                    'min_safe_distance': 3.0})
+        assert second.last_result == first.last_result
+        assert cache.hits == 1000 and cache.misses == 0
+    
+    def test_key_covers_parameters_and_engine(self):
+        engine = ReachabilityEngine()
+        key = proof_key(SafetyParameters(), engine)
+        assert key == proof_key(SafetyParameters(max_deceleration=4), ReachabilityEngine())
+        assert key != proof_key(SafetyParameters(reaction_time=0.25), engine)
+        assert key != proof_key(SafetyParameters(), ReachabilityEngine(max_depth=10))
+    
+    def test_corrupt_entries_discarded(self, tmp_path):
+        cache = ProofCache(str(tmp_path))
+        engine = ReachabilityEngine(max_depth=2)
+        params = SafetyParameters(reaction_time=0.0)
+        key = proof_key(params, engine)
+        cache.put(key, engine.verify(params))
+        
+        path = tmp_path / (key + '.json')
+        path.write_bytes(path.read_bytes().replace(b'"verified":false', b'"verified":true'))
+        assert ProofCache(str(tmp_path)).get(key) is None
+        assert not path.exists()
+        
+        cache.put(key, engine.verify(params))
+        path.write_bytes(path.read_bytes()[:40])
+        assert ProofCache(str(tmp_path)).get(key) is None
+    
+    def test_least_recently_used_evicted(self, tmp_path):
+        cache = ProofCache(str(tmp_path), max_entries=2)
+        engine = ReachabilityEngine(max_depth=0)
+        keys = []
+        for index, reaction_time in enumerate((0.2, 0.3, 0.4)):
+            params = SafetyParameters(reaction_time=reaction_time)
+            keys.append(proof_key(params, engine))
+            cache.put(keys[-1], engine.verify(params))
+            os.utime(tmp_path / (keys[-1] + '.json'), ns=(index * 10**9, index * 10**9))
+            if index == 1:
+                # Touching the oldest entry makes the second one the eviction candidate
+                assert ProofCache(str(tmp_path)).get(keys[0]) is not None
+                os.utime(tmp_path / (keys[0] + '.json'), ns=(5 * 10**9, 5 * 10**9))
+        
+        assert len(cache) == 2
+        assert keys[0] in cache and keys[2] in cache
+        assert not (tmp_path / (keys[1] + '.json')).exists()
+        
+        # Hits served from memory refresh the file as well
+        assert cache.get(keys[0]) is not None and keys[0] in cache._memory
+        os.utime(tmp_path / (keys[0] + '.json'), ns=(0, 0))
+        assert cache.get(keys[0]) is not None
+        assert os.path.getmtime(tmp_path / (keys[0] + '.json')) > 10
+
+class TestParameterSearch:
+    """Branch-and-bound certification of parameter boxes"""
+    
+    RANGES = {'max_deceleration': (3.8, 4.2), 'reaction_time': (0.2, 0.3),
+              'min_safe_distance': (3.0, 3.5), 'communication_delay': (0.05, 0.1)}
+    
+    def test_box_around_defaults_certified(self):
+        regions = ParameterSpaceCertifier(self.RANGES, max_depth=3).run()
+        assert all(region.status == SAFE for region in regions)
+        assert ParameterSpaceCertifier.summarize(regions)['safe_fraction'] == pytest.approx(1.0)
+        
+        parallel = ParameterSpaceCertifier(self.RANGES, max_depth=3, workers=2).run()
+        assert [(r.low, r.high, r.status) for r in parallel] == [(r.low, r.high, r.status) for r in regions]
+    
+    def test_refuted_box_carries_witness(self):
+        """No reaction margin and a half-metre buffer: the follower hits a braking predecessor"""
+        ranges = {'max_deceleration': (4.0, 4.2), 'reaction_time': (0.0, 0.02),
+                  'min_safe_distance': (0.5, 0.6), 'communication_delay': (0.1, 0.12)}
+        regions = ParameterSpaceCertifier(ranges, max_depth=2).run()
+        assert [region.status for region in regions] == [UNSAFE]
+        assert regions[0].witness['gap'] <= 0
+        
+        assert find_collision(SafetyParameters()) is None
+
+class TestFalsification:
+    """Concrete counterexamples for parameters the proof rejects"""
+    
+    def test_batched_runs_match_simulation(self):
+        params = SafetyParameters(reaction_time=0.0, min_safe_distance=0.5)
+        rng = np.random.default_rng(9)
+        v_ego, v_pred, margin = rng.uniform(0, 30, 6), rng.uniform(0, 30, 6), rng.uniform(0, 1, 6)
+        leader = np.where(rng.random((6, 1)) < 0.5, -params.max_deceleration,
+                          rng.uniform(-params.max_deceleration, params.max_acceleration, (6, 60)))
+        collision, _ = simulate_scenarios(params, v_ego, v_pred, margin, leader)
+        assert (collision >= 0).any() and (collision < 0).any()
+        for k in range(6):
+            gap = safe_distance(v_ego[k], v_pred[k], params) + margin[k]
+            sim = PlatooningSimulation.from_scenario(gap, v_ego[k], v_pred[k], leader[k], params)
+            gaps = []
+            for _ in range(60):
+                sim.step()
+                vehicles = sim.vehicles
+                gaps.append(vehicles['vehicle_0']['position'] - vehicles['vehicle_1']['position'])
+            hits = np.flatnonzero(np.array(gaps) <= 0)
+            assert collision[k] == (hits[0] if len(hits) else -1)
+    
+    def test_shrunk_counterexample_replays(self):
+        checker = FormalProofChecker()
+        params = {'max_deceleration': 4.0, 'reaction_time': 0.0, 'min_safe_distance': 0.5}
+        assert not checker.verify_collision_freedom(params)
+        example = checker.find_counterexample(params)
+        assert example is checker.last_counterexample and example.margin >= 0
+        decel = params['max_deceleration']
+        assert np.all((example.leader_accelerations >= -decel) & (example.leader_accelerations <= 2.0))
+        # Shrinking ends at round speeds behind a predecessor that brakes fully from the start
+        assert example.v_ego == round(example.v_ego) and example.v_pred == round(example.v_pred)
+        assert np.all(example.leader_accelerations == -decel)
+        
+        gaps = [step['vehicles']['vehicle_0']['position'] - step['vehicles']['vehicle_1']['position']
+                for step in example.replay().history]
+        assert len(gaps) == example.collision_step + 1
+        assert gaps[-1] <= 0 and min(gaps[:-1]) > 0
+        
+        assert checker.find_counterexample(SafetyParameters(), rounds=2) is None
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Tests for the Monte Carlo runner
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pytest
+from src.simulation.monte_carlo import MonteCarloRunner, UniformDistribution, expand_grid, replica_rng
+
+class TestMonteCarloRunner:
+    """Sharded, seeded scenario sweeps"""
+    
+    def test_results_independent_of_workers_and_shards(self):
+        """The master seed alone determines every replica's summary"""
+        parameters = {'gap_std': [2.0, 6.0], 'speed_std': UniformDistribution(0.0, 3.0)}
+        serial = MonteCarloRunner("emergency", parameters, replicas=24, duration=15.0, seed=11,
+                                  workers=1, shard_size=24).run()
+        pooled = MonteCarloRunner("emergency", parameters, replicas=24, duration=15.0, seed=11,
+                                  workers=3, shard_size=5).run()
+        
+        assert serial == pooled
+        assert [(result['point'], result['replica']) for result in serial] == [
+            (point, replica) for point in range(2) for replica in range(24)]
+        assert all(0.0 <= result['parameters']['speed_std'] < 3.0 for result in serial)
+        assert len({result['parameters']['speed_std'] for result in serial}) == 48
+    
+    def test_different_seeds_differ(self):
+        first = MonteCarloRunner("basic", replicas=4, duration=5.0, seed=1).run()
+        second = MonteCarloRunner("basic", replicas=4, duration=5.0, seed=2).run()
+        assert [r['min_gap'] for r in first] != [r['min_gap'] for r in second]
+    
+    def test_replica_streams_match_spawned_sequences(self):
+        spawned = np.random.SeedSequence(5).spawn(2)[1].spawn(3)
+        for replica, sequence in enumerate(spawned):
+            assert replica_rng(5, 1, replica).random() == np.random.default_rng(sequence).random()
+    
+    def test_replica_count_keeps_streams(self):
+        """Adding replicas leaves every point's existing ones unchanged"""
+        parameters = {'gap_std': [2.0, 6.0], 'speed_std': UniformDistribution(0.0, 3.0)}
+        few = MonteCarloRunner("basic", parameters, replicas=2, duration=5.0, seed=3).run()
+        more = MonteCarloRunner("basic", parameters, replicas=3, duration=5.0, seed=3).run()
+        assert few == [result for result in more if result['replica'] < 2]
+    
+    def test_grid_expansion(self):
+        points = expand_grid({'num_vehicles': [4, 6], 'gap_std': [1.0, 2.0, 3.0]})
+        assert len(points) == 6
+        assert points[0]['dt'] == 0.1 and points[0]['speed_std'] == 1.0
+        
+        with pytest.raises(ValueError):
+            expand_grid({'num_vehicles': UniformDistribution(4, 8)})
+        with pytest.raises(ValueError):
+            expand_grid({'lanes': [3]})
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
\ No newline at end of file
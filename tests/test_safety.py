@@ -4,11 +4,24 @@ Unit tests for formal safety verification
 
 import sys
 import os
+import json
+import threading
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+import numpy as np
 import pytest
-from src.core.verified_controller import FormalPlatooningController, VehicleRole
-from src.core.safety_monitor import SafetyMonitor
+from src.core.verified_controller import (FormalPlatooningController, VehicleRole, SafetyParameters,
+                                         compute_verified_actions)
+from src.core.safety_monitor import SafetyMonitor, VIOLATION_DTYPE, VIOLATION_TYPES, DEFAULT_MAX_VIOLATIONS
+from src.core.violation_log import ViolationLog
+from src.core.topology import PlatoonTopology
+from src.core.async_monitor import AsyncSafetyMonitor
+from src.core.safety_kernels import safe_distance
+from src.core.lookup_controller import PolicyTable, LookupTableController, compile_policy_table
+from src.core.stl_monitor import (STLMonitor, SlidingExtremum, Predicate, And, Eventually, Historically,
+                                  gap_duration_spec, velocity_recovery_spec)
+from src.simulation.environment import PlatooningSimulation
+from src.simulation.enhanced_environment import EnhancedPlatooningSimulation
 
 class TestFormalSafety:
     """Test formal safety guarantees"""
@@ -29,6 +42,24 @@ class TestFormalSafety:
             assert safe_dist > 0
             assert safe_dist >= 3.0  # min_safe_distance
     
+    def test_safe_distance_kernel_is_shared(self):
+        """Scalar and broadcast calls agree, and controller and monitor use the same bound"""
+        rng = np.random.default_rng(15)
+        v_ego = rng.uniform(0.0, 35.0, size=(40, 3))
+        v_pred = rng.uniform(0.0, 35.0, size=3)
+        params = SafetyParameters(max_deceleration=5.0, reaction_time=0.3)
+        
+        batched = safe_distance(v_ego, v_pred, params)
+        assert batched.shape == (40, 3)
+        assert batched.tolist() == [[safe_distance(float(a), float(b), params) for a, b in zip(row, v_pred)]
+                                    for row in v_ego]
+        
+        controller = FormalPlatooningController("vehicle_1")
+        controller.safety_params = params
+        monitor = SafetyMonitor(safety_params=params)
+        assert controller._calculate_safe_distance(30.0, 10.0) == monitor._calculate_safe_distance(30.0, 10.0)
+        assert SafetyMonitor()._calculate_safe_distance(30.0, 10.0) == 3.0 + 30.0 * 0.2 + (900 - 100) / 8.0
+    
     def test_emergency_braking(self):
         """Test emergency braking scenarios"""
         controller = FormalPlatooningController("test_vehicle")
@@ -47,6 +78,40 @@ class TestFormalSafety:
         assert action.acceleration < 0
         assert action.safety_verified == True
     
+    def test_batched_actions_match_scalar_path(self):
+        """One vectorized pass gives the per-controller actions and counters"""
+        rng = np.random.default_rng(4)
+        count = 120
+        vehicle_ids = [f"vehicle_{i}" for i in range(count)]
+        positions = 5000.0 - np.cumsum(rng.uniform(2.0, 60.0, size=count))
+        velocities = rng.uniform(0.0, 30.0, size=count)
+        
+        topology = PlatoonTopology(vehicle_ids)
+        for use_topology in (False, True):
+            for stale in (False, True):
+                timestamps = np.full(count, 1.0)
+                if stale:
+                    timestamps[7] = 0.5
+                
+                scalar = [FormalPlatooningController(vid, VehicleRole.LEADER if i == 0 else VehicleRole.FOLLOWER,
+                                                     topology if use_topology else None)
+                          for i, vid in enumerate(vehicle_ids)]
+                batched = [FormalPlatooningController(c.vehicle_id, c.role, c.topology) for c in scalar]
+                states = {vid: {'position': positions[i], 'velocity': velocities[i], 'timestamp': timestamps[i]}
+                          for i, vid in enumerate(vehicle_ids)}
+                
+                expected = []
+                for i, controller in enumerate(scalar):
+                    controller.update_state(positions[i], velocities[i], 0.0)
+                    action = controller.compute_verified_action(states, 1.0)
+                    expected.append((action.acceleration, action.emergency))
+                
+                accelerations, emergency = compute_verified_actions(batched, positions, velocities, timestamps, 1.0)
+                assert list(zip(accelerations.tolist(), emergency.tolist())) == expected
+                assert [c.get_metrics() for c in batched] == [c.get_metrics() for c in scalar]
+                assert all(c.state.timestamp == 1.0 for c in batched)
+                assert any(e for _, e in expected) and (stale or not all(e for _, e in expected))
+    
     def test_safety_monitor(self):
         """Test safety monitoring"""
         monitor = SafetyMonitor()
@@ -60,6 +125,460 @@ class TestFormalSafety:
         violations = monitor.verify_safety(platoon_states)
         assert len(violations) > 0, f"Expected violations for 5m gap (safe distance: 7m)"
         assert violations[0]['type'] == 'SAFE_DISTANCE_VIOLATION'
+    
+    def test_trajectory_matches_snapshots(self):
+        """Vectorized trajectory check reports exactly what per-snapshot checks report"""
+        rng = np.random.default_rng(0)
+        vehicle_ids = ['v10', 'v2', 'v1', 'v3', 'v0']  # Pairing follows sorted ids, not column order
+        positions = np.cumsum(rng.uniform(0.0, 2.0, size=(300, 5)), axis=0) + rng.uniform(0.0, 60.0, size=5)
+        velocities = rng.uniform(-1.0, 25.0, size=(300, 5))
+        times = np.arange(300) * 0.1
+        
+        monitor = SafetyMonitor()
+        table = monitor.verify_trajectory(positions, velocities, vehicle_ids, times)
+        
+        expected = []
+        for step in range(300):
+            states = {vid: {'position': positions[step, k], 'velocity': velocities[step, k]}
+                      for k, vid in enumerate(vehicle_ids)}
+            for violation in monitor.verify_safety(states):
+                if violation['type'] == 'SAFE_DISTANCE_VIOLATION':
+                    front, rear = violation['vehicles']
+                    expected.append((step, 'SAFE_DISTANCE_VIOLATION', front, rear,
+                                     violation['actual_gap'], violation['safe_gap']))
+                else:
+                    expected.append((step, 'NEGATIVE_VELOCITY', violation['vehicle'], None,
+                                     violation['velocity'], 0.0))
+        
+        actual = [(int(row['step']), VIOLATION_TYPES[row['type']], vehicle_ids[row['front']],
+                   vehicle_ids[row['rear']] if row['rear'] >= 0 else None, row['actual'], row['limit'])
+                  for row in table]
+        assert len(expected) > 100
+        assert actual == expected
+        assert np.array_equal(table['time'], times[table['step']])
+        assert table.dtype == VIOLATION_DTYPE
+
+class TestViolationLog:
+    """Bounded, indexed violation log"""
+    
+    @staticmethod
+    def _unsafe_states(gap: float):
+        return {
+            'v1': {'position': 100.0, 'velocity': 20.0},
+            'v2': {'position': 100.0 - gap, 'velocity': 20.0},
+            'v3': {'position': 100.0 - 2 * gap, 'velocity': -1.0}
+        }
+    
+    def test_ring_buffer_keeps_counters(self):
+        """Stats cover every violation while only the most recent ones are retained"""
+        monitor = SafetyMonitor(max_violations=10)
+        for step in range(50):
+            monitor.verify_safety(self._unsafe_states(1.0 + step * 0.01))
+        
+        stats = monitor.get_safety_stats()
+        assert stats['total_violations'] == 150
+        assert stats['distance_violations'] == 100
+        assert stats['last_violation'] == monitor.violation_history[-1]
+        assert len(monitor.violation_history) == 10
+        assert monitor.violation_history.pair_counts[('v1', 'v2')] == 50
+        assert monitor.violation_history.counts['NEGATIVE_VELOCITY'] == 50
+        
+        retained = monitor.violation_history.for_pair('v1', 'v2')
+        assert [v['actual_gap'] for v in retained] == [v['actual_gap'] for v in monitor.violation_history
+                                                       if v.get('vehicles') == ('v1', 'v2')]
+        assert monitor.violation_history.for_pair('v3')[-1]['velocity'] == -1.0
+    
+    def test_spill_to_file(self, tmp_path):
+        path = tmp_path / "violations.jsonl"
+        log = ViolationLog(max_entries=4, spill_path=str(path))
+        for k in range(10):
+            log.append({'type': 'NEGATIVE_VELOCITY', 'vehicle': f'v{k % 2}', 'velocity': -float(k)})
+        log.close()
+        
+        spilled = [json.loads(line) for line in path.read_text().splitlines()]
+        assert log.spilled == 6
+        assert [v['velocity'] for v in spilled] + [v['velocity'] for v in log] == [-float(k) for k in range(10)]
+        assert len(log.for_pair('v0')) == 2
+        
+        log.append({'type': 'NEGATIVE_VELOCITY', 'vehicle': 'v0', 'velocity': -10.0})
+        assert log._spill_file is not None
+        log.clear()
+        assert log._spill_file is None and len(log) == 0
+    
+    def test_rows_carry_simulation_time(self):
+        """Violations are structured rows stamped with simulation time; dicts are built on access"""
+        monitor = SafetyMonitor(max_violations=7)
+        for step in range(5):
+            violations = monitor.verify_safety(self._unsafe_states(1.0), current_time=0.1 * step)
+        
+        log = monitor.violation_history
+        rows = log.rows()
+        assert rows.dtype == VIOLATION_DTYPE
+        assert rows['step'].tolist() == [2, 3, 3, 3, 4, 4, 4]
+        assert np.array_equal(rows['time'], 0.1 * rows['step'])
+        assert [VIOLATION_TYPES[code] for code in rows['type'][-3:]] == ['SAFE_DISTANCE_VIOLATION'] * 2 + [
+            'NEGATIVE_VELOCITY']
+        assert [log.vehicle_ids[index] for index in rows['front'][-3:]] == ['v1', 'v2', 'v3']
+        
+        assert not violations._dicts
+        assert violations[1] == {'type': 'SAFE_DISTANCE_VIOLATION', 'vehicles': ('v2', 'v3'), 'actual_gap': 1.0,
+                                 'safe_gap': safe_distance(-1.0, 20.0, monitor.safety_params), 'timestamp': 0.4}
+        assert list(violations) == log[-3:]
+        assert log[-1] is not log[-1]  # The log keeps rows only, never the dicts it hands out
+        assert monitor.verify_safety(self._unsafe_states(1.0))[2]['timestamp'] is None
+        assert [v['type'] for v in monitor.verify_safety(self._unsafe_states(50.0))] == ['NEGATIVE_VELOCITY']
+    
+    def test_bounded_by_default(self):
+        assert SafetyMonitor().violation_history.max_entries == DEFAULT_MAX_VIOLATIONS
+        monitor = SafetyMonitor(max_violations=None)
+        for _ in range(5):
+            monitor.verify_safety(self._unsafe_states(1.0))
+        assert len(monitor.violation_history) == monitor.get_safety_stats()['total_violations'] == 15
+        
+        with pytest.raises(ValueError):
+            ViolationLog(spill_path="violations.jsonl")
+
+class TestPrefilter:
+    """Skipping checks that provably still pass"""
+    
+    @staticmethod
+    def _trajectory(count: int, steps: int, spacing: float, seed: int, dt: float = 0.1):
+        """Platoon states under bang-bang accelerations in [-max_deceleration, max_acceleration]"""
+        rng = np.random.default_rng(seed)
+        params = SafetyParameters()
+        position = 1000.0 - spacing * np.arange(count)
+        velocity = rng.uniform(5.0, 25.0, count)
+        ids = [f"v{i:02d}" for i in range(count)]
+        for _ in range(steps):
+            yield {vid: {'position': position[k], 'velocity': velocity[k]} for k, vid in enumerate(ids)}
+            accel = np.where(rng.random(count) < 0.5, -params.max_deceleration, params.max_acceleration)
+            stopped = velocity + accel * dt < 0
+            travel = np.where(stopped, velocity ** 2 / (2 * params.max_deceleration),
+                              velocity * dt + 0.5 * accel * dt ** 2)
+            position, velocity = position + travel, np.maximum(velocity + accel * dt, 0.0)
+    
+    @staticmethod
+    def _report(violations):
+        return [(v['type'], v.get('vehicles', v.get('vehicle')), v.get('actual_gap', v.get('velocity')))
+                for v in violations]
+    
+    @pytest.mark.parametrize("spacing", [12.0, 40.0])
+    def test_reports_match_full_checks(self, spacing):
+        full, filtered = SafetyMonitor(), SafetyMonitor(prefilter=True)
+        reported = 0
+        for step, states in enumerate(self._trajectory(30, 400, spacing, seed=int(spacing))):
+            expected = self._report(full.verify_safety(states, current_time=0.1 * step))
+            assert self._report(filtered.verify_safety(states, current_time=0.1 * step)) == expected
+            reported += len(expected)
+        assert reported > 100
+        assert filtered.evaluations < full.evaluations
+    
+    def test_cost_follows_pairs_at_risk(self):
+        """A steady 100 Hz platoon is re-checked about once per pair per horizon"""
+        states = {f"v{i:02d}": {'position': 1000.0 - 30.0 * i, 'velocity': 20.0} for i in range(50)}
+        monitor = SafetyMonitor(prefilter=True)
+        for step in range(100):
+            for k, state in enumerate(states.values()):
+                state['position'] = 1000.0 - 30.0 * k + 0.2 * step
+            assert len(monitor.verify_safety(states, current_time=0.01 * step)) == 0
+        assert monitor.evaluations < 99 * 2  # The first call evaluates all 99 checks
+        
+        # Moving a vehicle by hand breaks the dynamics assumption until the schedule is reset
+        states["v07"]['position'] = states["v06"]['position'] - 1.0
+        assert len(monitor.verify_safety(states, current_time=1.0)) == 0
+        monitor.reset_prefilter()
+        assert [v['vehicles'] for v in monitor.verify_safety(states, current_time=1.0)] == [("v06", "v07")]
+        # A changed vehicle set starts a new schedule by itself
+        del states["v49"]
+        assert len(monitor.verify_safety(states, current_time=1.01)) == 1
+
+@pytest.fixture(scope="module")
+def table():
+    return compile_policy_table(velocity_step=0.5)
+
+class TestPolicyTable:
+    """Compiled follower law against the analytic one"""
+    
+    def test_certified_bounds_hold(self, table):
+        controller = FormalPlatooningController("v1")
+        rng = np.random.default_rng(3)
+        early = 0
+        for _ in range(20000):
+            v_ego, v_pred = rng.uniform(0.0, 30.0, 2)
+            safe = controller._calculate_safe_distance(v_ego, v_pred)
+            gap = safe + (rng.uniform(-2.0, 60.0) if rng.random() < 0.5 else rng.uniform(-0.1, 2.0))
+            acceleration, emergency = table.lookup(gap, v_ego, v_pred)
+            if gap < safe:
+                assert emergency and acceleration == -controller.safety_params.max_deceleration
+            elif emergency:
+                assert gap - safe <= table.emergency_band
+                early += 1
+            else:
+                expected = controller._apply_bounds(controller._control_law(gap, safe, v_ego, v_pred))
+                assert abs(acceleration - expected) <= table.max_error
+        assert early > 0
+        assert table.lookup(10.0, 31.0, 0.0) is None
+    
+    def test_memory_mapped_controller(self, table, tmp_path):
+        table.save(str(tmp_path))
+        mapped = PolicyTable.load(str(tmp_path))
+        assert isinstance(mapped.accelerations, np.memmap)
+        assert mapped.max_error == table.max_error
+        
+        controller = LookupTableController("v1", mapped)
+        states = {"v0": {'position': 40.0, 'velocity': 18.0, 'timestamp': 0.0},
+                  "v1": {'position': 0.0, 'velocity': 20.0, 'timestamp': 0.0}}
+        controller.update_state(0.0, 20.0, 0.0)
+        assert controller.compute_verified_action(states, 0.0).acceleration == table.lookup(40.0, 20.0, 18.0)[0]
+        states["v0"]['position'] = 5.0
+        assert controller.compute_verified_action(states, 0.0).emergency
+        assert controller.emergency_events == 1
+        # Beyond the tabulated velocities the analytic law takes over
+        controller.update_state(0.0, 40.0, 0.0)
+        states["v0"].update(position=400.0, velocity=40.0)
+        assert controller.compute_verified_action(states, 0.0).acceleration == 2.0
+        assert controller.table_misses == 1
+
+class _GatedAsyncMonitor(AsyncSafetyMonitor):
+    """Worker thread that takes nothing off the queue until the gate opens"""
+    
+    def __init__(self, *args, **kwargs):
+        self.gate = threading.Event()
+        super().__init__(*args, **kwargs)
+    
+    def _thread_worker(self):
+        self.gate.wait()
+        super()._thread_worker()
+
+class TestAsyncSafetyMonitor:
+    """Monitoring in a worker off the control loop"""
+    
+    @staticmethod
+    def _snapshots(count: int):
+        rng = np.random.default_rng(5)
+        return [{f"v{i}": {'position': 100.0 - 8.0 * i + rng.normal(), 'velocity': rng.uniform(-1.0, 25.0)}
+                 for i in range(12)} for _ in range(count)]
+    
+    @staticmethod
+    def _named(log):
+        rows = log.rows()
+        names = np.array(log.vehicle_ids + [None], dtype=object)
+        return list(zip(rows['step'].tolist(), rows['time'].tolist(), rows['type'].tolist(), names[rows['front']],
+                        names[rows['rear']], rows['actual'].tolist(), rows['limit'].tolist()))
+    
+    @pytest.mark.parametrize("mode", ["thread", "process"])
+    def test_blocking_worker_matches_inline_checks(self, mode):
+        snapshots = self._snapshots(120)
+        inline = SafetyMonitor()
+        for step, states in enumerate(snapshots):
+            inline.verify_safety(states, current_time=0.1 * step)
+        
+        with AsyncSafetyMonitor(capacity=8, policy='block', mode=mode, max_batch=16) as monitor:
+            assert all(monitor.submit(states, current_time=0.1 * step) for step, states in enumerate(snapshots))
+        assert monitor.get_stats() == {'submitted': 120, 'processed': 120, 'dropped': 0, 'pending': 0}
+        assert self._named(monitor.monitor.violation_history) == self._named(inline.violation_history)
+        assert monitor.monitor.checks == inline.checks
+    
+    @pytest.mark.parametrize("policy", ["sample", "drop_oldest"])
+    def test_lossy_policies_keep_originating_time(self, policy):
+        snapshots = self._snapshots(10)
+        monitor = _GatedAsyncMonitor(capacity=4, policy=policy)
+        accepted = [monitor.submit(states, current_time=0.1 * step) for step, states in enumerate(snapshots)]
+        monitor.gate.set()
+        monitor.close()
+        
+        rows = monitor.monitor.violation_history.rows()
+        checked = sorted(set(rows['step'].tolist()))  # Every snapshot has a violation
+        assert monitor.processed == len(checked) and monitor.processed + monitor.dropped == 10
+        assert np.allclose(rows['time'], 0.1 * rows['step'])
+        if policy == 'sample':
+            assert checked == [step for step, kept in enumerate(accepted) if kept]
+            assert checked == [0, 1, 2, 3]  # The stalled worker never frees room for a kept snapshot
+        else:
+            assert all(accepted) and checked == [6, 7, 8, 9]
+    
+    def test_sample_thins_evenly_while_backlogged(self):
+        snapshots = self._snapshots(24)
+        monitor = _GatedAsyncMonitor(capacity=4, policy='sample')
+        # Each kept snapshot that finds the queue full doubles the stride: 4, 6 and 8 do
+        backlogged = [monitor.submit(states, current_time=0.1 * step) for step, states in enumerate(snapshots[:16])]
+        assert [step for step, kept in enumerate(backlogged) if kept] == [0, 1, 2, 3] and monitor._stride == 8
+        monitor.gate.set()
+        monitor.flush()
+        # With the queue drained the stride halves per submission: 16 (stride 4), 18 on (stride 1)
+        recovered = []
+        for step, states in enumerate(snapshots[16:], 16):
+            if monitor.submit(states, current_time=0.1 * step):
+                recovered.append(step)
+            monitor.flush()
+        monitor.close()
+        assert recovered == [16, 18, 19, 20, 21, 22, 23]
+        assert sorted(set(monitor.monitor.violation_history.rows()['step'].tolist())) == [0, 1, 2, 3] + recovered
+    
+    def test_block_waits_for_the_worker(self):
+        monitor = _GatedAsyncMonitor(capacity=2, policy='block')
+        threading.Timer(0.2, monitor.gate.set).start()
+        with monitor:
+            for step, states in enumerate(self._snapshots(10)):
+                monitor.submit(states, current_time=float(step))
+        assert sorted(set(monitor.monitor.violation_history.rows()['step'].tolist())) == list(range(10))
+        
+        with pytest.raises(ValueError):
+            AsyncSafetyMonitor(policy='drop_newest')
+
+class TestPlatoonTopology:
+    """Shared platoon ordering"""
+    
+    def test_membership_changes(self):
+        topology = PlatoonTopology([f"vehicle_{i}" for i in range(12)])
+        assert topology.predecessor("vehicle_10") == "vehicle_9"  # Not vehicle_1, as sorted ids would give
+        assert topology.successor("vehicle_11") is None
+        assert topology.predecessor("vehicle_0") is None
+        
+        topology.leave("vehicle_5")
+        assert topology.predecessor("vehicle_6") == "vehicle_4"
+        topology.join("vehicle_5", index=2)
+        assert topology.index("vehicle_5") == 2 and topology.successor("vehicle_5") == "vehicle_2"
+        
+        tail = topology.split("vehicle_8")
+        assert topology.successor("vehicle_7") is None
+        assert tail.leader == "vehicle_8" and tail.predecessor("vehicle_8") is None and len(tail) == 4
+        
+        topology.merge(tail)
+        assert len(tail) == 0
+        assert topology.predecessor("vehicle_8") == "vehicle_7"
+        assert topology.pairs()[-1] == ("vehicle_10", "vehicle_11")
+        
+        with pytest.raises(ValueError):
+            topology.join("vehicle_3")
+        with pytest.raises(KeyError):
+            topology.predecessor("vehicle_12")
+        with pytest.raises(KeyError):
+            topology.successor("vehicle_12")
+    
+    def test_controller_and_monitor_use_topology(self):
+        """Both follow the topology order instead of sorted ids"""
+        states = {f"vehicle_{i}": {'position': 200.0 - 30.0 * i, 'velocity': 20.0, 'acceleration': 0.0,
+                                   'timestamp': 0.0} for i in range(11)}
+        states["vehicle_10"]['position'] = states["vehicle_9"]['position'] - 5.0  # Unsafe gap
+        topology = PlatoonTopology.from_positions(states)
+        assert list(topology) == [f"vehicle_{i}" for i in range(11)]
+        
+        controller = FormalPlatooningController("vehicle_10", topology=topology)
+        assert controller._find_predecessor(states) is states["vehicle_9"]
+        assert FormalPlatooningController("vehicle_10")._find_predecessor(states) is states["vehicle_1"]
+        
+        violations = SafetyMonitor(topology=topology).verify_safety(states)
+        assert [v['vehicles'] for v in violations] == [("vehicle_9", "vehicle_10")]
+        
+        positions = np.array([[states[vid]['position'] for vid in states]])
+        velocities = np.full_like(positions, 20.0)
+        table = SafetyMonitor(topology=topology).verify_trajectory(positions, velocities, list(states))
+        assert [(row['front'], row['rear']) for row in table] == [(9, 10)]
+        
+        # A vehicle missing from the topology must not drop out of the checks unnoticed
+        states["vehicle_11"] = dict(states["vehicle_10"], position=states["vehicle_10"]['position'] - 30.0)
+        with pytest.raises(KeyError):
+            SafetyMonitor(topology=topology).verify_safety(states)
+        with pytest.raises(KeyError):
+            SafetyMonitor(topology=topology).verify_trajectory(np.zeros((1, 12)), np.zeros((1, 12)), list(states))
+
+    def test_vehicle_outside_topology_has_no_predecessor(self):
+        """A controller whose vehicle left or has not joined falls back to the safe action"""
+        states = {vid: {'position': 100.0 - 20.0 * k, 'velocity': 20.0, 'acceleration': 0.0, 'timestamp': 0.0}
+                  for k, vid in enumerate("abc")}
+        topology = PlatoonTopology(["a", "b", "c"])
+        topology.leave("c")
+        controller = FormalPlatooningController("c", topology=topology)
+        controller.update_state(states["c"]['position'], 20.0, 0.0)
+        action = controller.compute_verified_action(states, 0.0)
+        assert action.emergency and "No predecessor" in action.reason
+        
+        controllers = [FormalPlatooningController(vid, VehicleRole.LEADER if vid == "a" else VehicleRole.FOLLOWER,
+                                                  topology) for vid in "abc"]
+        accelerations, emergency = compute_verified_actions(
+            controllers, [state['position'] for state in states.values()], np.full(3, 20.0), np.zeros(3), 0.0)
+        assert emergency.tolist() == [False, False, True]
+        assert accelerations[2] == action.acceleration
+
+class TestSTLMonitor:
+    """Streaming temporal requirements"""
+    
+    def test_sliding_extremum_matches_brute_force(self):
+        rng = np.random.default_rng(3)
+        values = rng.integers(-5, 5, 500).astype(float)  # Ties exercise the deque's pop condition
+        for size in (1, 4, 37):
+            highest, lowest = SlidingExtremum(size), SlidingExtremum(size, maximum=False)
+            for k, value in enumerate(values):
+                window = values[max(0, k - size + 1):k + 1]
+                assert highest.push(value) == window.max()
+                assert lowest.push(value) == window.min()
+    
+    def test_formulas_match_offline_robustness(self):
+        rng = np.random.default_rng(4)
+        gap, speed = rng.normal(0.0, 1.0, 300), rng.normal(10.0, 2.0, 300)
+        # Mixed horizons: the past operand is delayed to line up with the future one
+        formula = And(Eventually(Predicate('gap'), 0.5), Historically(Predicate('speed', 8.0), 0.3))
+        monitor = STLMonitor({'spec': formula}, dt=0.1)
+        judged = [monitor.update(0.1 * k, {'gap': gap[k], 'speed': speed[k]})['spec'] for k in range(300)]
+        
+        assert judged[:5] == [None] * 5
+        for j in range(295):
+            expected = min(gap[j:j + 6].max(), speed[max(0, j - 3):j + 1].min() - 8.0)
+            assert judged[j + 5] == pytest.approx(expected)
+        assert monitor.worst['spec'] == pytest.approx(min(judged[5:]))
+    
+    def test_gap_duration_and_recovery(self):
+        margin = np.ones(40)
+        margin[10:16] = -1.0  # 6 samples = 0.6 s below the safe distance
+        monitor = STLMonitor({'gap': gap_duration_spec(0.5)}, dt=0.1)
+        for k, value in enumerate(margin):
+            monitor.update(0.1 * k, {'gap_margin': value})
+        assert monitor.first_violation['gap'] == pytest.approx(1.0)
+        monitor.reset()
+        margin[15] = 1.0  # 0.5 s is still allowed
+        for k, value in enumerate(margin):
+            monitor.update(0.1 * k, {'gap_margin': value})
+        assert monitor.satisfied() == {'gap': True}
+        
+        velocity = np.full(80, 20.0)
+        velocity[20:50] = 5.0
+        emergency = np.zeros(80)
+        emergency[20] = 1.0
+        for recovered_at, holds in ((50, True), (51, False)):
+            velocity[50] = 20.0 if recovered_at == 50 else 5.0
+            monitor = STLMonitor({'recover': velocity_recovery_spec(15.0, 3.0)}, dt=0.1)
+            for k in range(80):
+                monitor.update(0.1 * k, {'emergency': emergency[k], 'min_velocity': velocity[k]})
+            assert monitor.satisfied()['recover'] is holds
+            assert monitor.first_violation['recover'] == (None if holds else pytest.approx(2.0))
+    
+    def test_both_simulations_feed_the_monitor(self):
+        specs = lambda: {'gap': gap_duration_spec(0.5), 'recover': velocity_recovery_spec(15.0)}
+        basic = PlatooningSimulation(num_vehicles=3, stl_monitor=STLMonitor(specs(), dt=0.1))
+        basic.run(5.0)
+        assert basic.stl_monitor.samples == 50
+        assert basic.stl_monitor.robustness['gap'] is not None
+        
+        # Past ten vehicles sorted ids would pair vehicle_1 with vehicle_10
+        long = PlatooningSimulation(num_vehicles=12, stl_monitor=STLMonitor(specs(), dt=0.1))
+        at_rest = {vid: {'emergency': False} for vid in long.vehicles}
+        assert long._stl_signals(at_rest)['gap_margin'] == pytest.approx(
+            15.0 - safe_distance(18.0, 18.0, long.safety_params))
+        long.run(1.0)
+        assert long._stl_signals(at_rest)['gap_margin'] > 0
+        assert long.stl_monitor.first_violation['gap'] is None
+        
+        enhanced = EnhancedPlatooningSimulation(num_vehicles=6, scenario="emergency",
+                                                stl_monitor=STLMonitor(specs(), dt=0.1))
+        enhanced.set_emergency_vehicle("vehicle_0")
+        enhanced.run(10.0, record_history=False, skip_quiescent=True)
+        assert enhanced.stl_monitor.samples == 100 and enhanced.skipped_steps == 0
+        # The braking leader stops for good, so the recovery requirement fails from the trigger on
+        assert enhanced.stl_monitor.first_violation['recover'] == pytest.approx(3.1)
+        
+        with pytest.raises(ValueError):
+            EnhancedPlatooningSimulation(dt=0.05, stl_monitor=STLMonitor(specs(), dt=0.1))
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file